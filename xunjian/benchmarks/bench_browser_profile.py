@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+浏览器配置基准测试：用 full 和 lean 配置加载同一批页面，比较导航耗时和传输字节数
+
+每个配置使用一个独立的浏览器，先预热一次再计时；每轮导航前清空缓存，保证每次都是冷加载。
+
+用法:
+    python benchmarks/bench_browser_profile.py https://example.com https://example.com/news --rounds 5 --headless
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+# 添加上级目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from selenium_check import BROWSER_PROFILES, _create_webdriver, _page_transfer_bytes
+
+
+def measure(profile_name: str, urls, rounds: int, headless: bool, chromedriver_path=None):
+    """返回 (每次导航耗时毫秒列表, 每次导航传输字节数列表)"""
+    driver = _create_webdriver(headless=headless, chromedriver_path=chromedriver_path,
+                               profile=BROWSER_PROFILES[profile_name])
+    durations, transferred = [], []
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.get(urls[0])
+        for _ in range(rounds):
+            for url in urls:
+                driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+                driver.get("about:blank")
+                start = time.perf_counter()
+                driver.get(url)
+                durations.append((time.perf_counter() - start) * 1000.0)
+                transferred.append(_page_transfer_bytes(driver) or 0)
+    finally:
+        driver.quit()
+    return durations, transferred
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare navigation time and bytes of the browser profiles")
+    parser.add_argument("urls", nargs="+", help="Pages to load")
+    parser.add_argument("--rounds", type=int, default=3, help="Loads per page and profile")
+    parser.add_argument("--headless", action="store_true")
+    parser.add_argument("--chromedriver-path", default=os.environ.get("CHROMEDRIVER"))
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'profile':<10}{'p50(ms)':>10}{'mean(ms)':>10}{'p50(KB)':>10}{'mean(KB)':>10}")
+    for name in BROWSER_PROFILES:
+        durations, transferred = measure(name, args.urls, args.rounds, args.headless, args.chromedriver_path)
+        results[name] = (statistics.median(durations), statistics.median(transferred))
+        print(
+            f"{name:<10}{results[name][0]:>10.1f}{statistics.mean(durations):>10.1f}"
+            f"{results[name][1] / 1024:>10.1f}{statistics.mean(transferred) / 1024:>10.1f}"
+        )
+
+    full_ms, full_bytes = results["full"]
+    for name, (ms, transferred) in results.items():
+        if name == "full":
+            continue
+        saved_ms = full_ms - ms
+        saved_kb = (full_bytes - transferred) / 1024
+        print(
+            f"{name} saves {saved_ms:.1f} ms ({saved_ms / full_ms * 100 if full_ms else 0:.0f}%) and "
+            f"{saved_kb:.1f} KB ({saved_kb * 1024 / full_bytes * 100 if full_bytes else 0:.0f}%) per navigation (p50)"
+        )
+
+
+if __name__ == "__main__":
+    main()
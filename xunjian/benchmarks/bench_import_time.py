@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+导入耗时基准测试：在全新的解释器中导入巡检入口模块，记录耗时并检查 OCR 依赖没有被提前导入
+
+每轮启动一个子进程，通过 -X importtime 读取目标模块的累计导入耗时（包含其全部依赖）。
+不包含 OCR 动作的 suite 不应导入 cv2/numpy/PIL/pytesseract，出现时以非零状态退出。
+
+用法:
+    python benchmarks/bench_import_time.py --rounds 10
+    python benchmarks/bench_import_time.py --module selenium_actions --max-ms 300
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+XUNJIAN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 添加上级目录到 Python 路径
+sys.path.insert(0, XUNJIAN_DIR)
+
+from selenium_report import percentile
+
+# 只应在 flow 包含 OCR 动作时才导入的模块
+HEAVY_MODULES = ("cv2", "numpy", "PIL", "pytesseract", "tesserocr")
+
+PROBE = (
+    "import json, sys; __import__(sys.argv[1]); "
+    "print(json.dumps(sorted(m for m in sys.argv[2:] if m in sys.modules)))"
+)
+
+
+def measure(module: str):
+    """在子进程中导入 module，返回 (累计导入耗时毫秒, 已导入的重量级模块)"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE, module, *HEAVY_MODULES],
+        cwd=XUNJIAN_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative_us = None
+    # 格式: "import time: self [us] | cumulative | imported package"
+    for line in proc.stderr.splitlines():
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            cumulative_us = int(parts[1])
+    if cumulative_us is None:
+        raise RuntimeError(f"No importtime entry for {module}:\n{proc.stderr[-2000:]}")
+    return cumulative_us / 1000.0, json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure cold import time of the patrol entry modules")
+    parser.add_argument("--module", action="append", dest="modules",
+        help="Module to import (repeatable, default: selenium_flow_suite and selenium_actions)")
+    parser.add_argument("--rounds", type=int, default=5, help="Fresh interpreters per module")
+    parser.add_argument("--max-ms", type=float, default=None, help="Fail when the median import time exceeds this")
+    args = parser.parse_args()
+
+    modules = args.modules or ["selenium_flow_suite", "selenium_actions"]
+    failed = False
+    print(f"{'module':<22}{'p50(ms)':>10}{'p95(ms)':>10}{'max(ms)':>10}  heavy modules imported")
+    for module in modules:
+        timings = []
+        heavy = set()
+        for _ in range(args.rounds):
+            elapsed_ms, loaded = measure(module)
+            timings.append(elapsed_ms)
+            heavy.update(loaded)
+        median = statistics.median(timings)
+        print(
+            f"{module:<22}{percentile(timings, 50):>10.1f}{percentile(timings, 95):>10.1f}"
+            f"{max(timings):>10.1f}  {', '.join(sorted(heavy)) or '-'}"
+        )
+        if heavy or (args.max_ms is not None and median > args.max_ms):
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+OCR 后端基准测试：比较各 OCR 后端的单张图片识别延迟
+
+默认使用程序生成的验证码样式图片，也可以用 --images 指定真实验证码图片。
+
+用法:
+    python benchmarks/bench_ocr_engine.py --rounds 50
+    python benchmarks/bench_ocr_engine.py --images captcha1.png captcha2.png
+"""
+
+import argparse
+import os
+import random
+import statistics
+import string
+import sys
+import time
+
+# 添加上级目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+from PIL import Image, ImageDraw
+
+from selenium_ocr import OCR_ENGINES, TESSEROCR_AVAILABLE
+from selenium_report import percentile
+
+
+def _synthetic_captcha(text: str) -> np.ndarray:
+    img = Image.new("RGB", (120, 40), "white")
+    draw = ImageDraw.Draw(img)
+    draw.text((10, 12), text, fill="black")
+    for _ in range(4):
+        draw.line([(random.randint(0, 120), random.randint(0, 40)) for _ in range(2)], fill="gray")
+    return cv2.cvtColor(np.array(img), cv2.COLOR_RGB2BGR)
+
+
+def _load_images(paths, count: int):
+    if paths:
+        return [cv2.imread(p) for p in paths]
+    alphabet = string.ascii_uppercase + string.digits
+    return [_synthetic_captcha("".join(random.choices(alphabet, k=4))) for _ in range(count)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare per-image latency of the OCR backends")
+    parser.add_argument("--rounds", type=int, default=30, help="Images per engine")
+    parser.add_argument("--images", nargs="*", help="Captcha images to use instead of generated ones")
+    args = parser.parse_args()
+
+    images = _load_images(args.images, args.rounds)
+    print(f"{'engine':<14}{'first(ms)':>10}{'mean(ms)':>10}{'p50(ms)':>10}{'p95(ms)':>10}")
+    for name, engine_cls in OCR_ENGINES.items():
+        if name == "tesserocr" and not TESSEROCR_AVAILABLE:
+            print(f"{name:<14}{'skipped (pip install tesserocr)':>40}")
+            continue
+        try:
+            engine = engine_cls()
+        except Exception as e:
+            print(f"{name:<14}skipped ({e})")
+            continue
+        try:
+            latencies = []
+            for img in images:
+                start = time.perf_counter()
+                engine.recognize(img)
+                latencies.append((time.perf_counter() - start) * 1000.0)
+        except Exception as e:
+            # 例如 pytesseract 找不到 tesseract 可执行文件、tesserocr 找不到 tessdata
+            print(f"{name:<14}skipped ({type(e).__name__}: {e})")
+            continue
+        finally:
+            engine.close()
+        # 第一次调用包含引擎加载时间，单独列出
+        steady = latencies[1:] or latencies
+        print(
+            f"{name:<14}{latencies[0]:>10.1f}{statistics.mean(steady):>10.1f}"
+            f"{percentile(steady, 50):>10.1f}{percentile(steady, 95):>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+suite 加载基准测试：生成一个大 suite，比较首次加载（流式解析 + 校验 + 编译）与命中编译缓存的耗时
+
+用法:
+    python benchmarks/bench_suite_load.py --flows 2000 --steps 20 --rounds 5
+    python benchmarks/bench_suite_load.py --suite path/to/suite.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# 添加上级目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from selenium_flow_suite import load_compiled_suite
+
+
+def write_synthetic_suite(path: str, flows: int, steps: int) -> None:
+    suite = {
+        "timeout": 20,
+        "flows": [
+            {
+                "name": f"flow-{i}",
+                "variables": {"base": f"https://example.com/{i}", "user": f"user{i}"},
+                "steps": [
+                    {"action": "goto", "url": "${base}/page/" + str(j)}
+                    if j % 2 == 0
+                    else {"action": "type", "selector": f"#field-{j}", "text": "${user}"}
+                    for j in range(steps)
+                ],
+            }
+            for i in range(flows)
+        ],
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(suite, f, indent=2)
+
+
+def timed_load(suite_path: str, cache_path: str) -> float:
+    cli = argparse.Namespace(plugin=[], compile_cache=cache_path)
+    start = time.perf_counter()
+    load_compiled_suite(suite_path, cli)
+    return (time.perf_counter() - start) * 1000.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure suite load time with and without the compile cache")
+    parser.add_argument("--suite", default=None, help="Existing suite file (default: generate one)")
+    parser.add_argument("--flows", type=int, default=1000)
+    parser.add_argument("--steps", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        suite_path = args.suite or os.path.join(tmp, "suite.json")
+        if not args.suite:
+            write_synthetic_suite(suite_path, args.flows, args.steps)
+        cache_path = os.path.join(tmp, "suite.cache")
+
+        cold, warm = [], []
+        for _ in range(args.rounds):
+            if os.path.exists(cache_path):
+                os.remove(cache_path)
+            cold.append(timed_load(suite_path, cache_path))
+            warm.append(timed_load(suite_path, cache_path))
+
+        size_kb = os.path.getsize(suite_path) / 1024
+        print(f"suite: {suite_path} ({size_kb:.0f} KB)")
+        print(f"{'load':<8}{'p50(ms)':>10}{'min(ms)':>10}")
+        print(f"{'cold':<8}{statistics.median(cold):>10.1f}{min(cold):>10.1f}")
+        print(f"{'cached':<8}{statistics.median(warm):>10.1f}{min(warm):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
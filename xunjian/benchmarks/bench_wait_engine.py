@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+等待引擎基准测试：比较 "poll"（WebDriverWait）与 "observer"（MutationObserver）的步骤延迟
+
+页面在随机延迟后插入目标元素，记录等待返回时间与元素实际出现时间之差。
+
+用法:
+    python benchmarks/bench_wait_engine.py --rounds 30 --headless
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+# 添加上级目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from selenium_check import WAIT_ENGINES, _create_webdriver, _wait_for
+from selenium_report import percentile
+
+
+PAGE = (
+    "data:text/html,<html><body><div id='root'></div><script>"
+    "window.schedule = function (ms, cls) {"
+    "  setTimeout(function () {"
+    "    var el = document.createElement('button'); el.className = cls; el.textContent = 'ready';"
+    "    document.getElementById('root').appendChild(el);"
+    "  }, ms);"
+    "};"
+    "</script></body></html>"
+)
+
+
+def run(rounds: int, headless: bool, condition: str, chromedriver_path=None) -> None:
+    driver = _create_webdriver(headless=headless, chromedriver_path=chromedriver_path)
+    try:
+        driver.get(PAGE)
+        delays = [random.randint(50, 400) for _ in range(rounds)]
+        print(f"{'engine':<10}{'mean(ms)':>10}{'p50(ms)':>10}{'p95(ms)':>10}{'max(ms)':>10}")
+        for engine in WAIT_ENGINES:
+            overheads = []
+            for i, delay in enumerate(delays):
+                cls = f"{engine}-{i}"
+                driver.execute_script("window.schedule(arguments[0], arguments[1]);", delay, cls)
+                start = time.perf_counter()
+                _wait_for(driver, f"button.{cls}", condition, 10, engine)
+                elapsed_ms = (time.perf_counter() - start) * 1000.0
+                # 扣除页面本身的延迟，只保留等待引擎引入的额外时间
+                overheads.append(max(0.0, elapsed_ms - delay))
+            print(
+                f"{engine:<10}{statistics.mean(overheads):>10.1f}{percentile(overheads, 50):>10.1f}"
+                f"{percentile(overheads, 95):>10.1f}{max(overheads):>10.1f}"
+            )
+    finally:
+        driver.quit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare step latency of the poll and observer wait engines")
+    parser.add_argument("--rounds", type=int, default=20, help="Waits per engine")
+    parser.add_argument("--condition", choices=("presence", "visible", "clickable"), default="clickable")
+    parser.add_argument("--headless", action="store_true")
+    parser.add_argument("--chromedriver-path", default=os.environ.get("CHROMEDRIVER"))
+    args = parser.parse_args()
+    run(args.rounds, args.headless, args.condition, args.chromedriver_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,857 @@
+"""
+Flow 步骤动作注册表
+
+每个动作通过 register_action 注册处理函数，并声明需要插值的字段和必填字段。
+compile_flow 在启动浏览器之前把 flow 的 steps 编译成一组绑定好的可调用对象，
+格式错误的步骤会在此时报错；插件模块也可以用 register_action 注册新动作。
+动作依赖的重量级模块（如 OCR）通过 preload 钩子在编译时按需加载。
+"""
+
+import importlib
+import json
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from selenium_check import (
+    GOTO_WAIT_UNTIL,
+    WAIT_ENGINES,
+    KeywordScanner,
+    _get_body_text,
+    _navigate,
+    _budget_violations,
+    _page_performance,
+    _page_checks,
+    _wait_for,
+    _type,
+    _click,
+    Template,
+    compile_template,
+    get_keyword_scanner,
+    js_regex_problem,
+    validate_perf_budget,
+    _wait_presence,
+    _wait_visible,
+    _wait_clickable,
+)
+from selenium.common.exceptions import TimeoutException
+
+from selenium_network import NetworkLog
+from selenium_ocr import (
+    VOTE_MODES,
+    is_ocr_available,
+    load_ocr_stack,
+    ocr_captcha,
+    solve_simple_captcha,
+    validate_outcome_conditions,
+    validate_preprocessing,
+)
+from selenium_session import (
+    capture_session,
+    credential_values,
+    get_session_cache,
+    report_cookie_restore,
+    restore_session,
+    session_key,
+    set_cookies,
+    url_origin,
+)
+
+
+# 支持插值的字段；字段值是字符串，动作通过 list_fields 声明的字段也可以是字符串列表（逐项插值）
+INTERPOLATED_FIELDS: Tuple[str, ...] = (
+    "selector", "url", "text", "value", "path", "contains", "not_contains", "matches", "not_matches"
+)
+
+# 必填字段：字符串表示该字段必须存在，元组表示其中任意一个存在即可
+Requirement = Union[str, Tuple[str, ...]]
+Handler = Callable[["FlowContext", Dict[str, Any], Dict[str, Any]], Optional[int]]
+
+# goto 的页面性能指标超出预算时的退出码
+PERF_BUDGET_EXCEEDED = 5
+
+
+class FlowContext:
+    """单个 flow 运行期间的共享状态"""
+
+    def __init__(
+        self,
+        driver,
+        variables: Dict[str, Any],
+        timeout: int,
+        wait_engine: str = "poll",
+        keyword_scanner: Optional[KeywordScanner] = None,
+        perf_budget: Optional[Dict[str, float]] = None,
+    ):
+        self.driver = driver
+        self.variables = variables
+        self.timeout = timeout
+        self.wait_engine = wait_engine
+        # check_error_keyword 和 assert_page 的 error_keyword 使用的关键词集合
+        self.keyword_scanner = keyword_scanner or get_keyword_scanner()
+        # 每次 goto 之后检查的页面性能预算（suite/flow 的 perf_budget），goto 的 budget 可以覆盖
+        self.perf_budget: Dict[str, float] = perf_budget or {}
+        # 处理函数设置后，下一步从该序号（从 0 开始）继续执行，用于跳过整个步骤块
+        self.jump_to: Optional[int] = None
+        # 当前步骤的附加指标（如 goto 的传输字节数），写入该步骤的计时记录
+        self.metrics: Dict[str, Any] = {}
+        # login_begin 未命中缓存时记录的会话信息，由 login_end 保存
+        self.login: Optional[Dict[str, Any]] = None
+        # 启用网络采集时本 flow 的请求记录
+        self.network: Optional[NetworkLog] = None
+
+
+class ActionSpec:
+    """已注册动作的描述"""
+
+    __slots__ = ("name", "handler", "fields", "required", "defines", "preload", "block_end", "list_fields", "validate")
+
+    def __init__(
+        self,
+        name: str,
+        handler: Handler,
+        fields: Tuple[str, ...],
+        required: Tuple[Requirement, ...],
+        defines: Optional[str] = None,
+        preload: Optional[Callable[[], None]] = None,
+        block_end: Optional[str] = None,
+        list_fields: Tuple[str, ...] = (),
+        validate: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ):
+        self.name = name
+        self.handler = handler
+        self.fields = fields
+        self.required = required
+        self.defines = defines
+        self.preload = preload
+        self.block_end = block_end
+        self.list_fields = list_fields
+        self.validate = validate
+
+
+ACTIONS: Dict[str, ActionSpec] = {}
+
+
+def register_action(
+    name: str,
+    fields: Sequence[str] = (),
+    required: Sequence[Requirement] = (),
+    defines: Optional[str] = None,
+    preload: Optional[Callable[[], None]] = None,
+    block_end: Optional[str] = None,
+    list_fields: Sequence[str] = (),
+    validate: Optional[Callable[[Dict[str, Any]], None]] = None,
+    replace: bool = False,
+) -> Callable[[Handler], Handler]:
+    """注册动作处理函数的装饰器
+
+    Args:
+        name: 动作名称，对应 step 中的 "action"
+        fields: 运行时需要插值的字段，只有这些字段会被插值并传给处理函数
+        required: 编译时检查的必填字段
+        defines: 保存变量名的字段（如 "name"），后续步骤可以引用该变量
+        preload: flow 中出现该动作时在编译阶段调用，用于提前导入重量级依赖，抛出的异常作为编译错误报告
+        block_end: 该动作开启一个步骤块时，对应的结束动作名称；编译时检查配对，
+                   处理函数通过 args["block_end"] 得到结束步骤的序号，
+                   通过 args["block_variables"] 得到块内步骤（含开始步骤）引用的、块外定义的变量名
+        list_fields: fields 中允许取字符串列表的字段，其余插值字段只能是字符串
+        validate: 编译时检查步骤其余选项（如枚举值）的函数，抛出的 ValueError 作为编译错误报告
+        replace: 是否允许覆盖已注册的同名动作
+
+    处理函数签名为 handler(ctx, step, args)，args 包含声明的插值字段以及 "timeout"；
+    返回非零退出码会终止 flow，返回 None 或 0 继续下一步；设置 ctx.jump_to 可以跳转到指定步骤。
+    """
+    unknown = [f for f in fields if f not in INTERPOLATED_FIELDS]
+    if unknown:
+        raise ValueError(f"Action '{name}' declares unknown interpolated fields: {unknown}")
+    stray = [f for f in list_fields if f not in fields]
+    if stray:
+        raise ValueError(f"Action '{name}' declares list fields that are not interpolated: {stray}")
+
+    def decorator(handler: Handler) -> Handler:
+        if name in ACTIONS and not replace:
+            raise ValueError(f"Action '{name}' is already registered")
+        ACTIONS[name] = ActionSpec(
+            name, handler, tuple(fields), tuple(required), defines, preload, block_end, tuple(list_fields), validate
+        )
+        return handler
+
+    return decorator
+
+
+def load_plugins(modules: Iterable[str]) -> None:
+    """导入插件模块，插件在导入时通过 register_action 注册动作"""
+    for module in modules:
+        importlib.import_module(module)
+
+
+class CompiledStep:
+    """绑定了处理函数和预编译插值模板的步骤"""
+
+    __slots__ = ("index", "action", "step", "_handler", "_args", "_templates")
+
+    def __init__(self, index: int, spec: ActionSpec, step: Dict[str, Any]):
+        self.index = index
+        self.action = spec.name
+        self.step = step
+        self._handler = spec.handler
+        # 不含 ${} 的字段在编译时就确定取值，运行时只渲染真正的模板
+        args: Dict[str, Any] = {f: None for f in INTERPOLATED_FIELDS}
+        templates: List[Tuple[str, Union[Template, Tuple[Template, ...]]]] = []
+        for field in spec.fields:
+            raw = step.get(field)
+            if not raw:
+                continue
+            if isinstance(raw, list):
+                items = tuple(compile_template(str(item)) for item in raw)
+                if all(t.literal for t in items):
+                    args[field] = [t.source for t in items]
+                else:
+                    templates.append((field, items))
+                continue
+            template = compile_template(raw)
+            if template.literal:
+                args[field] = template.source
+            else:
+                templates.append((field, template))
+        args["timeout"] = int(step["timeout"]) if "timeout" in step else None
+        args["block_end"] = None
+        args["block_variables"] = []
+        self._args = args
+        self._templates = tuple(templates)
+
+    def bind_block_end(self, index: int, variables: Sequence[str] = ()) -> None:
+        """记录与本步骤配对的块结束步骤序号，以及块内步骤引用的变量名"""
+        self._args["block_end"] = index
+        self._args["block_variables"] = list(variables)
+
+    @property
+    def variable_names(self) -> List[Tuple[str, str]]:
+        """返回 (字段, 变量名) 列表"""
+        names: List[Tuple[str, str]] = []
+        for field, compiled in self._templates:
+            items = compiled if isinstance(compiled, tuple) else (compiled,)
+            names.extend((field, name) for t in items for name in sorted(t.names))
+        return names
+
+    def __call__(self, ctx: FlowContext) -> Optional[int]:
+        args = dict(self._args)
+        for field, compiled in self._templates:
+            if isinstance(compiled, tuple):
+                args[field] = [t.render(ctx.variables) for t in compiled]
+            else:
+                args[field] = compiled.render(ctx.variables)
+        if args["timeout"] is None:
+            args["timeout"] = ctx.timeout
+        return self._handler(ctx, self.step, args)
+
+
+def _describe(requirement: Requirement) -> str:
+    if isinstance(requirement, str):
+        return f"'{requirement}'"
+    return " or ".join(f"'{r}'" for r in requirement)
+
+
+class FlowCompileError(ValueError):
+    """flow 编译失败，problems 为 (步骤序号或 None, 问题描述) 列表，str() 为全部问题拼接"""
+
+    def __init__(self, problems: List[Tuple[Optional[int], str]]):
+        super().__init__("; ".join(message for _, message in problems))
+        self.problems = problems
+
+    def __reduce__(self):
+        return type(self), (self.problems,)
+
+
+def _field_type_problem(step: Dict[str, Any], field: str, allow_list: bool = False) -> Optional[str]:
+    """插值字段只能是字符串；allow_list 时也可以是由字符串/数字组成的列表"""
+    raw = step.get(field)
+    if raw is None or isinstance(raw, str):
+        return None
+    if not allow_list:
+        return f"'{field}' must be a string, got {type(raw).__name__}"
+    if isinstance(raw, list) and all(isinstance(item, (str, int, float)) and not isinstance(item, bool) for item in raw):
+        return None
+    return f"'{field}' must be a string or a list of strings, got {type(raw).__name__}"
+
+
+# 动作在运行时转换为数字的步骤选项；编译时检查，避免浏览器启动后才因格式错误失败
+_NUMERIC_OPTIONS: Dict[str, Callable[[Any], float]] = {
+    "timeout": int,
+    "nav_timeout": float,
+    "idle_ms": int,
+    "seconds": float,
+    "max_attempts": int,
+    "outcome_timeout": float,
+    "ttl": float,
+    "check_timeout": int,
+    "min_status": int,
+    "max_ms": float,
+}
+
+
+def _block_variables(block: List[CompiledStep]) -> List[str]:
+    """块内步骤引用的变量名，不含块内步骤自己定义的变量（如识别出的验证码）"""
+    defined_inside = {
+        s.step[ACTIONS[s.action].defines] for s in block if ACTIONS[s.action].defines and s.step.get(ACTIONS[s.action].defines)
+    }
+    return sorted({name for s in block for _, name in s.variable_names} - defined_inside)
+
+
+def preload_actions(steps: Iterable[CompiledStep]) -> List[str]:
+    """调用步骤用到的动作的 preload 钩子（每个动作一次），返回失败信息列表"""
+    problems: List[str] = []
+    for spec in {ACTIONS[s.action] for s in steps}:
+        if spec.preload is not None:
+            try:
+                spec.preload()
+            except Exception as e:
+                problems.append(f"{spec.name}: {e}")
+    return problems
+
+
+def compile_flow(flow: Dict[str, Any]) -> List[CompiledStep]:
+    """把 flow 的 steps 编译成可直接执行的步骤列表
+
+    Raises:
+        FlowCompileError: 存在缺少 action、未知 action、缺少必填字段、字段类型错误或引用未定义变量的步骤时，
+                          一次性报告所有问题（ValueError 的子类，problems 中带有步骤序号）
+    """
+    steps = flow.get("steps")
+    if not isinstance(steps, list):
+        raise FlowCompileError([(None, "Flow requires a 'steps' array")])
+
+    # flow 变量以及前面步骤（set_var、ocr_captcha、prompt 等）定义的变量
+    defined = set((flow.get("variables") or {}).keys())
+    compiled: List[CompiledStep] = []
+    problems: List[Tuple[Optional[int], str]] = []
+    if flow.get("error_keywords") is not None:
+        try:
+            get_keyword_scanner(flow["error_keywords"])
+        except ValueError as e:
+            problems.append((None, f"error_keywords: {e}"))
+    if flow.get("perf_budget") is not None:
+        try:
+            validate_perf_budget(flow["perf_budget"])
+        except ValueError as e:
+            problems.append((None, f"perf_budget: {e}"))
+    if flow.get("wait_engine") is not None and flow["wait_engine"] not in WAIT_ENGINES:
+        problems.append((None, f"Unknown wait_engine: {flow['wait_engine']} (expected one of {', '.join(WAIT_ENGINES)})"))
+    block_ends = {spec.block_end for spec in ACTIONS.values() if spec.block_end}
+    # 结束动作名称 -> 尚未闭合的块开始步骤
+    open_blocks: Dict[str, CompiledStep] = {}
+    for idx, step in enumerate(steps):
+        if not isinstance(step, dict):
+            problems.append((idx, f"Step {idx+1} must be an object"))
+            continue
+        action = step.get("action")
+        if not action:
+            problems.append((idx, f"Step {idx+1} missing 'action'"))
+            continue
+        spec = ACTIONS.get(action)
+        if spec is None:
+            problems.append((idx, f"Step {idx+1}: Unsupported action: {action}"))
+            continue
+        for requirement in spec.required:
+            names = (requirement,) if isinstance(requirement, str) else requirement
+            if not any(step.get(n) for n in names):
+                problems.append((idx, f"Step {idx+1}: {action} requires {_describe(requirement)}"))
+        invalid = False
+        for field in spec.fields:
+            problem = _field_type_problem(step, field, field in spec.list_fields)
+            if problem:
+                problems.append((idx, f"Step {idx+1}: {action} {problem}"))
+                invalid = True
+        if "budget" in step:
+            try:
+                validate_perf_budget(step["budget"])
+            except ValueError as e:
+                problems.append((idx, f"Step {idx+1}: {action} has invalid 'budget': {e}"))
+                invalid = True
+        if "credentials" in step:
+            credentials = step["credentials"]
+            if not isinstance(credentials, list) or not all(isinstance(name, str) for name in credentials):
+                problems.append((idx, f"Step {idx+1}: {action} 'credentials' must be a list of variable names"))
+            else:
+                for name in credentials:
+                    if name not in defined:
+                        problems.append((idx, f"Step {idx+1}: {action} credentials reference undefined variable '{name}'"))
+        if spec.validate is not None:
+            try:
+                spec.validate(step)
+            except ValueError as e:
+                problems.append((idx, f"Step {idx+1}: {action} {e}"))
+                invalid = True
+        for option, convert in _NUMERIC_OPTIONS.items():
+            if option not in step:
+                continue
+            value = step[option]
+            try:
+                if isinstance(value, bool) or convert(value) < 0:
+                    raise ValueError(value)
+            except (TypeError, ValueError):
+                problems.append((idx, f"Step {idx+1}: {action} has invalid '{option}': {value!r}"))
+                invalid = True
+        if invalid:
+            continue
+        compiled_step = CompiledStep(idx, spec, step)
+        for field, name in compiled_step.variable_names:
+            if name not in defined:
+                problems.append((idx, f"Step {idx+1}: {action} references undefined variable '${{{name}}}' in '{field}'"))
+        if spec.defines and step.get(spec.defines):
+            defined.add(step[spec.defines])
+        begin = open_blocks.pop(action, None)
+        if begin is not None:
+            begin.bind_block_end(idx, _block_variables([s for s in compiled if s.index >= begin.index]))
+        elif action in block_ends:
+            problems.append((idx, f"Step {idx+1}: {action} has no matching block start"))
+        if spec.block_end:
+            if spec.block_end in open_blocks:
+                problems.append((idx, f"Step {idx+1}: {action} blocks cannot be nested"))
+            else:
+                open_blocks[spec.block_end] = compiled_step
+        compiled.append(compiled_step)
+
+    for end, begin in open_blocks.items():
+        problems.append((begin.index, f"Step {begin.index+1}: {begin.action} has no matching '{end}'"))
+
+    # 只有 flow 实际用到的动作才加载其依赖，每个动作只加载一次
+    problems.extend((None, problem) for problem in preload_actions(compiled))
+
+    if problems:
+        raise FlowCompileError(problems)
+    return compiled
+
+
+# ---------------------------------------------------------------------------
+# 内置动作
+# ---------------------------------------------------------------------------
+
+def _validate_goto(step: Dict[str, Any]) -> None:
+    wait_until = step.get("wait_until")
+    if wait_until and wait_until not in GOTO_WAIT_UNTIL:
+        raise ValueError(f"has unknown 'wait_until': {wait_until!r} (expected one of {', '.join(GOTO_WAIT_UNTIL)})")
+
+
+@register_action("goto", fields=("url", "selector"), required=("url",), validate=_validate_goto)
+def _action_goto(ctx: FlowContext, step: Dict[str, Any], args: Dict[str, Any]) -> Optional[int]:
+    # wait_until: load / domcontentloaded / networkidle / selector / none；给出 selector 时默认等待该元素，
+    # 否则默认为页面加载策略对应的状态（normal: load，eager: domcontentloaded，none: 不等待）
+    wait_until = step.get("wait_until") or ("selector" if args["selector"] else None)
+    nav_timeout = step.get("nav_timeout")
+    _navigate(
+        ctx.driver,
+        args["url"],
+        wait_until,
+        args["selector"],
+        args["timeout"],
+        float(nav_timeout) if nav_timeout is not None else None,
+        ctx.wait_engine,
+        int(step.get("idle_ms", 500)),
+    )
+    # 导航耗时、paint、LCP 和传输字节数一次读取，记录到该步骤的计时中
+    perf = _page_performance(ctx.driver)
+    ctx.metrics["page_bytes"] = perf.pop("page_bytes", None)
+    ctx.metrics["perf"] = perf
+    budget = dict(ctx.perf_budget)
+    if step.get("budget"):
+        budget.update(validate_perf_budget(step["budget"]))
+    violations = _budget_violations(dict(perf, page_bytes=ctx.metrics["page_bytes"]), budget)
+    if violations:
+        ctx.metrics["budget_exceeded"] = violations
+        print(f"Performance budget exceeded for {args['url']}: {', '.join(violations)}", file=sys.stderr)
+        return PERF_BUDGET_EXCEEDED
+    return None
+
+
+@register_action("type", fields=("selector", "text"), required=("selector",))
+def _action_type(ctx: FlowContext, step: Dict[str, Any], args: Dict[str, Any]) -> None:
+    _type(ctx.driver, args["selector"], args["text"] or "", args["timeout"], ctx.wait_engine)
+
+
+@register_action("click", fields=("selector",), required=("selector",))
+def _action_click(ctx: FlowContext, step: Dict[str, Any], args: Dict[str, Any]) -> None:
+    _click(ctx.driver, args["selector"], args["timeout"], ctx.wait_engine)
+
+
+@register_action("wait_presence", fields=("selector",), required=("selector",))
+def _action_wait_presence(ctx: FlowContext, step: Dict[str, Any], args: Dict[str, Any]) -> None:
+    _wait_presence(ctx.driver, args["selector"], args["timeout"], ctx.wait_engine)
+
+
+@register_action("wait_visible", fields=("selector",), required=("selector",))
+def _action_wait_visible(ctx: FlowContext, step: Dict[str, Any], args: Dict[str, Any]) -> None:
+    _wait_visible(ctx.driver, args["selector"], args["timeout"], ctx.wait_engine)
+
+
+@register_action("wait_clickable", fields=("selector",), required=("selector",))
+def _action_wait_clickable(ctx: FlowContext, step: Dict[str, Any], args: Dict[str, Any]) -> None:
+    _wait_clickable(ctx.driver, args["selector"], args["timeout"], ctx.wait_engine)
+
+
+@register_action("sleep")
+def _action_sleep(ctx: FlowContext, step: Dict[str, Any], args: Dict[str, Any]) -> None:
+    time.sleep(float(step.get("seconds", 1)))
+
+
+@register_action("assert_page_contains", fields=("text", "value"), required=(("text", "value"),))
+def _action_assert_page_contains(ctx: FlowContext, step: Dict[str, Any], args: Dict[str, Any]) -> Optional[int]:
+    needle = args["text"] or args["value"]
+    if not _page_checks(ctx.driver, [needle])[0]:
+        print(f"Assertion failed: page does not contain '{needle}'", file=sys.stderr)
+        return 1
+    return None
+
+
+@register_action("assert_page_not_contains", fields=("text", "value"), required=(("text", "value"),))
+def _action_assert_page_not_contains(ctx: FlowContext, step: Dict[str, Any], args: Dict[str, Any]) -> Optional[int]:
+    needle = args["text"] or args["value"]
+    if _page_checks(ctx.driver, [needle])[0]:
+        print(f"Assertion failed: page unexpectedly contains '{needle}'", file=sys.stderr)
+        return 1
+    return None
+
+
+def _validate_assert_page(step: Dict[str, Any]) -> None:
+    # 含变量的正则只能在运行时检查（浏览器拒绝时 _page_checks 抛出 ValueError）
+    flags = step.get("flags", "")
+    problem = js_regex_problem("", flags)
+    if problem:
+        raise ValueError(f"has {problem}")
+    for field in ("matches", "not_matches"):
+        raw = step.get(field) or []
+        for pattern in raw if isinstance(raw, list) else [raw]:
+            if not compile_template(str(pattern)).literal:
+                continue
+            problem = js_regex_problem(str(pattern), flags)
+            if problem:
+                raise ValueError(f"'{field}' contains {problem}")
+
+
+@register_action(
+    "assert_page",
+    fields=("contains", "not_contains", "matches", "not_matches"),
+    required=(("contains", "not_contains", "matches", "not_matches", "error_keyword"),),
+    list_fields=("contains", "not_contains", "matches", "not_matches"),
+    validate=_validate_assert_page,
+)
+def _action_assert_page(ctx: FlowContext, step: Dict[str, Any], args: Dict[str, Any]) -> Optional[int]:
+    # 在浏览器内一次性完成所有文本/正则断言，只返回布尔结果向量
+    # matches/not_matches 为 JavaScript 正则，"flags" 作用于所有正则
+    flags = step.get("flags", "")
+    contains = args["contains"] or []
+    not_contains = args["not_contains"] or []
+    matches = [(p, flags) for p in (args["matches"] or [])]
+    not_matches = [(p, flags) for p in (args["not_matches"] or [])]
+    patterns = matches + not_matches
+    if step.get("error_keyword"):
+        patterns.append((ctx.keyword_scanner.source, "i"))
+
+    outcome = _page_checks(ctx.driver, list(contains) + list(not_contains), patterns)
+    n1, n2, n3 = len(contains), len(contains) + len(not_contains), len(contains) + len(not_contains) + len(matches)
+    failures: List[str] = []
+    failures += [f"page does not contain '{x}'" for x, ok in zip(contains, outcome[:n1]) if not ok]
+    failures += [f"page unexpectedly contains '{x}'" for x, ok in zip(not_contains, outcome[n1:n2]) if ok]
+    failures += [f"page does not match /{p}/{f}" for (p, f), ok in zip(matches, outcome[n2:n3]) if not ok]
+    failures += [f"page unexpectedly matches /{p}/{f}" for (p, f), ok in zip(not_matches, outcome[n3:]) if ok]
+    if step.get("error_keyword") and outcome[-1]:
+        # 只有命中时才再扫描一次，取得具体的关键词和位置
+        failures.append(_describe_keyword_match(ctx, ctx.keyword_scanner.scan_page(ctx.driver)))
+    if failures:
+        for failure in failures:
+            print(f"Assertion failed: {failure}", file=sys.stderr)
+        return 1
+    return None
+
+
+def _element_text(ctx: FlowContext, args: Dict[str, Any]) -> str:
+    element = _wait_for(ctx.driver, args["selector"], "visible", args["timeout"], ctx.wait_engine)
+    return element.text or ""
+
+
+@register_action(
+    "assert_element_contains", fields=("selector", "text", "value"), required=("selector", ("text", "value"))
+)
+def _action_assert_element_contains(ctx: FlowContext, step: Dict[str, Any], args: Dict[str, Any]) -> Optional[int]:
+    needle = args["text"] or args["value"]
+    if needle not in _element_text(ctx, args):
+        print(f"Assertion failed: element text does not contain '{needle}'", file=sys.stderr)
+        return 1
+    return None
+
+
+@register_action(
+    "assert_element_not_contains", fields=("selector", "text", "value"), required=("selector", ("text", "value"))
+)
+def _action_assert_element_not_contains(ctx: FlowContext, step: Dict[str, Any], args: Dict[str, Any]) -> Optional[int]:
+    needle = args["text"] or args["value"]
+    if needle in _element_text(ctx, args):
+        print(f"Assertion failed: element text unexpectedly contains '{needle}'", file=sys.stderr)
+        return 1
+    return None
+
+
+def _describe_keyword_match(ctx: FlowContext, match) -> str:
+    if match is None:
+        return "found an error keyword on the page"
+    ctx.metrics["error_keyword"] = match.keyword
+    ctx.metrics["error_keyword_offset"] = match.offset
+    context = " ".join(match.context.split())
+    return f"found error keyword '{match.keyword}' at offset {match.offset}: ...{context}..."
+
+
+@register_action("check_error_keyword")
+def _action_check_error_keyword(ctx: FlowContext, step: Dict[str, Any], args: Dict[str, Any]) -> Optional[int]:
+    match = ctx.keyword_scanner.scan_page(ctx.driver)
+    if match is not None:
+        print(f"Error keyword check failed: {_describe_keyword_match(ctx, match)}")
+        return 1
+    return None
+
+
+@register_action("screenshot", fields=("path",), required=("path",))
+def _action_screenshot(ctx: FlowContext, step: Dict[str, Any], args: Dict[str, Any]) -> None:
+    path = args["path"]
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    ctx.driver.save_screenshot(path)
+
+
+@register_action("save_source", fields=("path",), required=("path",))
+def _action_save_source(ctx: FlowContext, step: Dict[str, Any], args: Dict[str, Any]) -> None:
+    path = args["path"]
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(ctx.driver.page_source or "")
+
+
+@register_action("set_var", fields=("text", "value"), required=("name",), defines="name")
+def _action_set_var(ctx: FlowContext, step: Dict[str, Any], args: Dict[str, Any]) -> None:
+    ctx.variables[step["name"]] = args["text"] or args["value"] or ""
+
+
+# 需要 OCR 的动作；cv2/numpy/PIL/pytesseract 只在 flow 包含这些动作时才导入
+OCR_ACTIONS: Tuple[str, ...] = ("ocr_captcha", "solve_captcha")
+
+
+def _preload_ocr() -> None:
+    # 依赖未安装时保持原有行为：运行时识别返回空结果并提示手动输入
+    if is_ocr_available():
+        load_ocr_stack()
+
+
+def _validate_preprocessing(step: Dict[str, Any]) -> None:
+    if "preprocessing" in step:
+        try:
+            validate_preprocessing(step["preprocessing"])
+        except ValueError as e:
+            raise ValueError(f"has invalid 'preprocessing': {e}") from None
+
+
+def _validate_ocr_captcha(step: Dict[str, Any]) -> None:
+    _validate_preprocessing(step)
+    if "vote" in step and step["vote"] not in VOTE_MODES:
+        raise ValueError(f"has unknown 'vote': {step['vote']!r} (expected one of {', '.join(VOTE_MODES)})")
+
+
+def _validate_solve_captcha(step: Dict[str, Any]) -> None:
+    _validate_preprocessing(step)
+    for kind in ("success", "failure"):
+        if step.get(kind) is not None:
+            try:
+                validate_outcome_conditions(step[kind])
+            except ValueError as e:
+                raise ValueError(f"has invalid '{kind}': {e}") from None
+
+
+@register_action(
+    "ocr_captcha",
+    fields=("selector",),
+    required=("selector", "name"),
+    defines="name",
+    preload=_preload_ocr,
+    validate=_validate_ocr_captcha,
+)
+def _action_ocr_captcha(ctx: FlowContext, step: Dict[str, Any], args: Dict[str, Any]) -> None:
+    # 使用 pytesseract 识别验证码并存储到变量
+    name = step["name"]
+    preprocessing = step.get("preprocessing", "default")
+    captcha_text = ocr_captcha(ctx.driver, args["selector"], preprocessing, vote=step.get("vote", "majority"))
+    ctx.variables[name] = captcha_text
+    print(f"验证码识别结果存储到变量 {name}: {captcha_text}")
+
+
+@register_action(
+    "solve_captcha",
+    required=("captcha_selector", "input_selector"),
+    preload=_preload_ocr,
+    validate=_validate_solve_captcha,
+)
+def _action_solve_captcha(ctx: FlowContext, step: Dict[str, Any], args: Dict[str, Any]) -> None:
+    # 自动解决验证码（识别+输入+验证）
+    # 传递selenium_check模块的函数引用
+    selenium_check_funcs = (_get_body_text, _type, _click)
+    success = solve_simple_captcha(
+        ctx.driver,
+        step["captcha_selector"],
+        step["input_selector"],
+        step.get("submit_selector"),
+        int(step.get("max_attempts", 3)),
+        step.get("preprocessing", "default"),
+        selenium_check_funcs,
+        success=step.get("success"),
+        failure=step.get("failure"),
+        outcome_timeout=float(step.get("outcome_timeout", 2.0)),
+    )
+    if not success:
+        print("验证码解决失败，请手动输入", file=sys.stderr)
+
+
+@register_action("wait_user", fields=("text", "value"))
+def _action_wait_user(ctx: FlowContext, step: Dict[str, Any], args: Dict[str, Any]) -> None:
+    # 等待用户手动操作（如复杂验证码）
+    msg = args["text"] or args["value"] or "请在浏览器内完成验证码后按回车继续..."
+    try:
+        input(msg)
+    except EOFError:
+        # 在CI环境中回退为固定等待
+        time.sleep(float(step.get("seconds", 30)))
+
+
+@register_action("prompt", fields=("text", "value"), required=("name",), defines="name")
+def _action_prompt(ctx: FlowContext, step: Dict[str, Any], args: Dict[str, Any]) -> None:
+    # 提示用户输入并存储到变量
+    name = step["name"]
+    prompt_msg = args["text"] or args["value"] or f"请输入 {name} 的值: "
+    try:
+        ctx.variables[name] = input(prompt_msg)
+    except EOFError:
+        ctx.variables[name] = ""
+
+
+@register_action("switch_to_default_content")
+def _action_switch_to_default_content(ctx: FlowContext, step: Dict[str, Any], args: Dict[str, Any]) -> None:
+    # 切换回主文档
+    ctx.driver.switch_to.default_content()
+
+
+@register_action("login_begin", fields=("url", "selector"), required=("url", "selector"), block_end="login_end")
+def _action_login_begin(ctx: FlowContext, step: Dict[str, Any], args: Dict[str, Any]) -> None:
+    # 命中未过期的会话缓存时恢复会话并跳过整个登录块，否则继续执行登录步骤；
+    # 未指定 credentials 时以登录块引用的全部变量作为缓存键，不同账号不会共用会话
+    origin = url_origin(args["url"])
+    credentials = step["credentials"] if "credentials" in step else args["block_variables"]
+    key = session_key(origin, credential_values(ctx.variables, credentials))
+    cache = get_session_cache()
+    entry = cache.get(key)
+    if entry is not None:
+        restore_session(ctx.driver, entry)
+        ctx.driver.get(args["url"])
+        if _logged_in(ctx, args["selector"], step):
+            print(f"复用登录会话: {origin}")
+            ctx.jump_to = args["block_end"] + 1
+            return
+        print(f"缓存的登录会话已失效，重新登录: {origin}")
+        cache.invalidate(key)
+        ctx.driver.delete_all_cookies()
+        ctx.driver.execute_script("try { window.localStorage.clear(); } catch (e) {}")
+    ctx.login = {"key": key, "ttl": float(step.get("ttl", 3600)), "selector": args["selector"], "step": step}
+
+
+def _logged_in(ctx: FlowContext, selector: str, step: Dict[str, Any]) -> bool:
+    # selector 为只有登录后才出现的元素，在 login_begin 的 check_timeout 秒内出现才算已登录
+    try:
+        _wait_for(ctx.driver, selector, "presence", int(step.get("check_timeout", 5)), ctx.wait_engine)
+        return True
+    except TimeoutException:
+        return False
+
+
+@register_action("login_end")
+def _action_login_end(ctx: FlowContext, step: Dict[str, Any], args: Dict[str, Any]) -> None:
+    # 登录步骤全部成功且当前页面出现 login_begin 的 selector 后，保存 cookies 和 localStorage；
+    # 找不到 selector 说明登录未成功（或停在了别的页面），此时不缓存，避免之后的 flow 复用无效会话
+    login, ctx.login = ctx.login, None
+    if login is None:
+        return
+    if not _logged_in(ctx, login["selector"], login["step"]):
+        print(f"登录后未找到 {login['selector']}，不缓存本次会话", file=sys.stderr)
+        return
+    session = capture_session(ctx.driver)
+    get_session_cache().put(
+        login["key"], url_origin(ctx.driver.current_url), session["cookies"], session["local_storage"], login["ttl"]
+    )
+
+
+@register_action("save_cookies", fields=("path",), required=("path",))
+def _action_save_cookies(ctx: FlowContext, step: Dict[str, Any], args: Dict[str, Any]) -> None:
+    # 保存登录后的cookies
+    path = args["path"]
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(ctx.driver.get_cookies(), f, ensure_ascii=False, indent=2)
+
+
+@register_action("load_cookies", fields=("path", "url"), required=("path",))
+def _action_load_cookies(ctx: FlowContext, step: Dict[str, Any], args: Dict[str, Any]) -> None:
+    # 加载之前保存的cookies；通过 CDP 一次注入，无需先打开 cookie 所属页面
+    path = args["path"]
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Cookies文件未找到: {path}")
+    with open(path, "r", encoding="utf-8") as f:
+        cookies = json.load(f)
+    report_cookie_restore(set_cookies(ctx.driver, cookies, args["url"]))
+
+
+def _network_log(ctx: FlowContext, action: str) -> NetworkLog:
+    if ctx.network is None:
+        raise RuntimeError(f"{action} requires network capture (\"network_capture\": true or --network-capture)")
+    ctx.network.refresh()
+    return ctx.network
+
+
+@register_action("assert_no_5xx", fields=("url",))
+def _action_assert_no_5xx(ctx: FlowContext, step: Dict[str, Any], args: Dict[str, Any]) -> Optional[int]:
+    # 检查本 flow 至今的请求；url 为可选的 URL 子串/通配符过滤，
+    # min_status 默认 500，include_failed 为 true 时连接失败等网络错误也算失败
+    log = _network_log(ctx, "assert_no_5xx")
+    min_status = int(step.get("min_status", 500))
+    include_failed = bool(step.get("include_failed", False))
+    bad = [
+        r for r in log.requests(args["url"])
+        if (r.status is not None and r.status >= min_status)
+        or (include_failed and r.error and r.error != "canceled")
+    ]
+    ctx.metrics["bad_requests"] = len(bad)
+    if bad:
+        for r in bad[:10]:
+            print(f"Assertion failed: {r.method} {r.url} -> {r.status or r.error}", file=sys.stderr)
+        if len(bad) > 10:
+            print(f"Assertion failed: ... and {len(bad) - 10} more requests", file=sys.stderr)
+        return 1
+    return None
+
+
+@register_action("assert_api_latency", fields=("url",), required=("url", "max_ms"))
+def _action_assert_api_latency(ctx: FlowContext, step: Dict[str, Any], args: Dict[str, Any]) -> Optional[int]:
+    # 等待（最长 timeout 秒）至少一个匹配 url 的请求完成，然后要求所有已完成的匹配请求都不超过 max_ms
+    log = _network_log(ctx, "assert_api_latency")
+    max_ms = float(step["max_ms"])
+    deadline = time.monotonic() + args["timeout"]
+    while True:
+        finished = [r for r in log.requests(args["url"]) if r.done]
+        if finished:
+            break
+        if time.monotonic() >= deadline:
+            raise TimeoutException(f"No finished request matching '{args['url']}' within {args['timeout']}s")
+        time.sleep(0.1)
+        log.refresh()
+    slowest = max(finished, key=lambda r: r.duration_ms)
+    ctx.metrics["api_ms"] = slowest.duration_ms
+    if slowest.duration_ms > max_ms:
+        print(
+            f"Assertion failed: {slowest.method} {slowest.url} took {slowest.duration_ms} ms (limit {max_ms:g} ms)",
+            file=sys.stderr,
+        )
+        return 1
+    return None
@@ -3,39 +3,283 @@ import re
 import os
 import argparse
 import time
-from typing import Optional, Tuple, Dict, Any
+from functools import lru_cache
+from typing import Optional, Tuple, Dict, Any, FrozenSet, List, NamedTuple, Sequence, Union
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
+from selenium.common.exceptions import (
+    InvalidSelectorException,
+    JavascriptException,
+    TimeoutException,
+    NoSuchElementException,
+    WebDriverException,
+)
 
+from selenium_network import NetworkCapture
 
-def _create_webdriver(headless: bool, chromedriver_path: Optional[str] = None) -> webdriver.Chrome:
 
+class BrowserProfile(NamedTuple):
+    """浏览器启动配置，可哈希，同时作为驱动池的分组键"""
+
+    name: str
+    window_size: str = "1920,1080"
+    page_load_strategy: str = "normal"
+    disable_extensions: bool = False
+    # 通过 CDP Network.setBlockedURLs 屏蔽的 URL 通配符
+    blocked_urls: Tuple[str, ...] = ()
+    # driver.get 的默认超时（秒），goto 可以用 nav_timeout 单独覆盖
+    page_load_timeout: float = 60.0
+    # 通过性能日志采集 CDP Network 事件（见 selenium_network）
+    network_capture: bool = False
+
+
+# 巡检只检查文本和少量元素：屏蔽静态图片、字体、音视频和常见统计脚本。
+# 图片按扩展名屏蔽，动态生成的验证码接口（如 /captcha?t=...）不受影响；
+# 含 OCR 动作的 flow 不屏蔽图片（见 resolve_browser_profile 的 keep_images），验证码可能是静态文件
+IMAGE_URL_PATTERNS: Tuple[str, ...] = ("*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico", "*.bmp")
+
+_LEAN_BLOCKED_URLS: Tuple[str, ...] = IMAGE_URL_PATTERNS + (
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3", "*.m3u8",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*hm.baidu.com*", "*cnzz.com*",
+)
+
+# normal: driver.get 等到 load 事件；eager: 等到 DOMContentLoaded；none: 只等到导航开始
+PAGE_LOAD_STRATEGIES = ("normal", "eager", "none")
+
+BROWSER_PROFILES: Dict[str, BrowserProfile] = {
+    "full": BrowserProfile("full"),
+    "lean": BrowserProfile("lean", "1280,800", "eager", True, _LEAN_BLOCKED_URLS),
+}
+
+_PROFILE_FIELDS = (
+    "window_size", "page_load_strategy", "disable_extensions", "blocked_urls", "page_load_timeout", "network_capture"
+)
+
+
+def resolve_browser_profile(
+    spec: Union[None, str, Dict[str, Any], BrowserProfile] = None,
+    page_load_strategy: Optional[str] = None,
+    network_capture: bool = False,
+    keep_images: bool = False,
+) -> BrowserProfile:
+    """解析 suite/flow 中的 "browser_profile" 配置
+
+    Args:
+        spec: None（full）、配置名称，或在某个配置基础上调整的对象，如
+              {"base": "lean", "window_size": "1024,768", "blocked_urls": ["*ads.example.com*"],
+               "unblocked_urls": ["*.jpg"]}，
+              其中 blocked_urls 追加到基础配置的屏蔽列表，unblocked_urls 从中移除
+        page_load_strategy: 覆盖配置中的页面加载策略（"normal"、"eager" 或 "none"）
+        network_capture: 为 True 时在配置基础上启用网络请求采集
+        keep_images: 为 True 时不屏蔽 IMAGE_URL_PATTERNS（用于含验证码识别的 flow）
+
+    Raises:
+        ValueError: 未知配置名称、字段或加载策略
+    """
+    profile = _resolve_profile_spec(spec)
+    if keep_images and any(pattern in IMAGE_URL_PATTERNS for pattern in profile.blocked_urls):
+        profile = profile._replace(
+            blocked_urls=tuple(pattern for pattern in profile.blocked_urls if pattern not in IMAGE_URL_PATTERNS)
+        )
+    if page_load_strategy:
+        profile = profile._replace(page_load_strategy=page_load_strategy)
+    if network_capture and not profile.network_capture:
+        profile = profile._replace(network_capture=True)
+    if profile.page_load_strategy not in PAGE_LOAD_STRATEGIES:
+        raise ValueError(f"Unknown page load strategy: {profile.page_load_strategy}")
+    return profile
+
+
+def _resolve_profile_spec(spec: Union[None, str, Dict[str, Any], BrowserProfile]) -> BrowserProfile:
+    if spec is None:
+        return BROWSER_PROFILES["full"]
+    if isinstance(spec, BrowserProfile):
+        return spec
+    if isinstance(spec, str):
+        if spec not in BROWSER_PROFILES:
+            raise ValueError(f"Unknown browser profile: {spec}")
+        return BROWSER_PROFILES[spec]
+    if not isinstance(spec, dict):
+        raise ValueError(f"browser_profile must be a name or an object, got {spec!r}")
+
+    unknown = [k for k in spec if k not in _PROFILE_FIELDS + ("base", "name", "unblocked_urls")]
+    if unknown:
+        raise ValueError(f"Unknown browser_profile fields: {unknown}")
+    base = _resolve_profile_spec(spec.get("base", "full"))
+    overrides: Dict[str, Any] = {k: spec[k] for k in _PROFILE_FIELDS if k in spec}
+    for field in ("blocked_urls", "unblocked_urls"):
+        if field in spec and (not isinstance(spec[field], (list, tuple)) or not all(isinstance(p, str) for p in spec[field])):
+            raise ValueError(f"browser_profile '{field}' must be a list of URL patterns")
+    if "blocked_urls" in spec or "unblocked_urls" in spec:
+        unblocked = set(spec.get("unblocked_urls") or ())
+        overrides["blocked_urls"] = tuple(
+            pattern for pattern in base.blocked_urls + tuple(spec.get("blocked_urls") or ()) if pattern not in unblocked
+        )
+    name = spec.get("name") or (f"{base.name}*" if overrides else base.name)
+    return base._replace(name=name, **overrides)
+
+
+def _create_webdriver(
+    headless: bool, chromedriver_path: Optional[str] = None, profile: Optional[BrowserProfile] = None
+) -> webdriver.Chrome:
+
+    profile = profile or BROWSER_PROFILES["full"]
     chrome_options = Options()
     if headless:
         chrome_options.add_argument("--headless=new")
     chrome_options.add_argument("--no-sandbox")
     chrome_options.add_argument("--disable-dev-shm-usage")
     chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--window-size=1920,1080")
+    chrome_options.add_argument(f"--window-size={profile.window_size}")
+    if profile.disable_extensions:
+        chrome_options.add_argument("--disable-extensions")
+    chrome_options.page_load_strategy = profile.page_load_strategy
+    if profile.network_capture:
+        chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        chrome_options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
 
     # Prefer a locally provided chromedriver path (works offline)
     if chromedriver_path and os.path.exists(chromedriver_path):
         service = Service(chromedriver_path)
         driver = webdriver.Chrome(service=service, options=chrome_options)
-        driver.set_page_load_timeout(60)
-        return driver
+    else:
+        # Use Selenium Manager (Chrome must be installed)
+        driver = webdriver.Chrome(options=chrome_options)
+    driver.set_page_load_timeout(profile.page_load_timeout)
+    # 记录默认值，goto 临时修改 nav_timeout 后据此恢复
+    driver._xunjian_page_load_timeout = profile.page_load_timeout
 
-    # Use Selenium Manager (Chrome must be installed)
-    driver = webdriver.Chrome(options=chrome_options)
-    driver.set_page_load_timeout(60)
+    # 屏蔽规则对该标签页之后的所有页面生效，驱动池复用时无需重新设置
+    _apply_blocked_urls(driver, profile.blocked_urls)
+    if profile.network_capture:
+        driver._xunjian_network = NetworkCapture(driver)
     return driver
 
 
+def _apply_blocked_urls(driver, blocked_urls: Sequence[str]) -> None:
+    """在当前标签页启用 CDP URL 屏蔽（规则按标签页生效，新标签页需要重新设置）"""
+    if blocked_urls:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(blocked_urls)})
+
+
+# 当前页面（导航及其全部子资源）实际传输的字节数；跨域资源未设置
+# Timing-Allow-Origin 时浏览器报告为 0，因此结果是下限。
+# _TRANSFER_BYTES_SCRIPT 和 _PAGE_PERFORMANCE_SCRIPT 共用这一个函数定义
+_TRANSFER_BYTES_JS = """
+function transferBytes() {
+    var entries = performance.getEntriesByType("navigation").concat(performance.getEntriesByType("resource"));
+    var total = 0;
+    for (var i = 0; i < entries.length; i++) total += entries[i].transferSize || 0;
+    return total;
+}
+"""
+
+_TRANSFER_BYTES_SCRIPT = _TRANSFER_BYTES_JS + "return transferBytes();"
+
+
+def _page_transfer_bytes(driver) -> Optional[int]:
+    # 只是统计指标，任何异常都不应导致步骤失败
+    try:
+        return int(driver.execute_script(_TRANSFER_BYTES_SCRIPT) or 0)
+    except (WebDriverException, TypeError, ValueError):
+        return None
+
+
+# goto 之后一次往返读取 Navigation Timing、paint 和 LCP，以及传输字节数（_TRANSFER_BYTES_JS）。
+# LCP 只能通过 PerformanceObserver 读取：buffered 条目用 takeRecords() 同步取出，
+# 取不到时最多再等 arguments[0] 毫秒的回调
+_PAGE_PERFORMANCE_SCRIPT = _TRANSFER_BYTES_JS + """
+var waitMs = arguments[0], done = arguments[arguments.length - 1];
+var out = {}, lcp = null, observer = null, finished = false;
+function round(v) { return v === undefined || v === null || v < 0 ? null : Math.round(v * 10) / 10; }
+var nav = performance.getEntriesByType("navigation")[0];
+if (nav) {
+    out.ttfb_ms = round(nav.responseStart);
+    out.dns_ms = round(nav.domainLookupEnd - nav.domainLookupStart);
+    out.connect_ms = round(nav.connectEnd - nav.connectStart);
+    out.response_ms = round(nav.responseEnd - nav.responseStart);
+    out.dom_content_loaded_ms = round(nav.domContentLoadedEventEnd || null);
+    out.load_ms = round(nav.loadEventEnd || null);
+}
+var paints = performance.getEntriesByType("paint");
+for (var i = 0; i < paints.length; i++) {
+    if (paints[i].name === "first-paint") out.fp_ms = round(paints[i].startTime);
+    if (paints[i].name === "first-contentful-paint") out.fcp_ms = round(paints[i].startTime);
+}
+out.page_bytes = transferBytes();
+function take(list) { if (list.length) lcp = list[list.length - 1].startTime; }
+function finish() {
+    if (finished) return;
+    finished = true;
+    if (observer) { take(observer.takeRecords()); observer.disconnect(); }
+    out.lcp_ms = round(lcp);
+    done(out);
+}
+try {
+    observer = new PerformanceObserver(function (list) { take(list.getEntries()); finish(); });
+    observer.observe({type: "largest-contentful-paint", buffered: true});
+    take(observer.takeRecords());
+} catch (e) {
+    observer = null;
+}
+if (lcp !== null || !observer) finish(); else setTimeout(finish, waitMs);
+"""
+
+# 可以设置预算的页面性能指标（毫秒，page_bytes 为字节）
+PERF_METRICS: Tuple[str, ...] = (
+    "ttfb_ms", "fp_ms", "fcp_ms", "lcp_ms", "dom_content_loaded_ms", "load_ms", "page_bytes",
+)
+
+
+def _page_performance(driver, lcp_wait_ms: int = 100) -> Dict[str, Any]:
+    """读取当前页面的导航耗时、首次绘制、LCP 和传输字节数，浏览器不支持的指标为 None
+
+    只是统计指标，任何异常都返回空字典而不会导致步骤失败。
+    """
+    try:
+        result = driver.execute_async_script(_PAGE_PERFORMANCE_SCRIPT, lcp_wait_ms)
+    except (WebDriverException, TypeError, ValueError):
+        return {}
+    if not isinstance(result, dict):
+        return {}
+    return {key: value for key, value in result.items() if value is None or isinstance(value, (int, float))}
+
+
+def validate_perf_budget(budget: Any) -> Dict[str, float]:
+    """检查性能预算配置，如 {"ttfb_ms": 500, "lcp_ms": 2500}
+
+    Raises:
+        ValueError: 不是对象、未知指标或阈值不是非负数
+    """
+    if not isinstance(budget, dict):
+        raise ValueError(f"Performance budget must be an object, got {budget!r}")
+    unknown = [k for k in budget if k not in PERF_METRICS]
+    if unknown:
+        raise ValueError(f"Unknown performance budget metrics: {unknown} (expected {', '.join(PERF_METRICS)})")
+    limits: Dict[str, float] = {}
+    for metric, limit in budget.items():
+        if isinstance(limit, bool) or not isinstance(limit, (int, float)) or limit < 0:
+            raise ValueError(f"Performance budget '{metric}' must be a non-negative number, got {limit!r}")
+        limits[metric] = float(limit)
+    return limits
+
+
+def _budget_violations(metrics: Dict[str, Any], budget: Dict[str, float]) -> List[str]:
+    """返回超出预算的指标描述；浏览器没有报告的指标不参与检查"""
+    return [
+        f"{metric} {metrics[metric]:g} > {limit:g}"
+        for metric, limit in budget.items()
+        if metrics.get(metric) is not None and metrics[metric] > limit
+    ]
+
+
 def _resolve_locator(selector: str) -> Tuple[str, str]:
     """Infer locator strategy from the selector string.
 
@@ -64,54 +308,473 @@ def _get_body_text(driver: webdriver.Chrome) -> str:
     except Exception:
         return driver.page_source or ""
 
-def _contains_error_keyword(text: str) -> bool:
+# Runs every check against the rendered body text inside the browser and
+# returns only a list of booleans, so the page text never crosses the wire.
+_PAGE_CHECKS_SCRIPT = """
+var root = document.body || document.documentElement;
+var text = root ? (root.innerText || root.textContent || "") : "";
+var needles = arguments[0], patterns = arguments[1], out = [];
+for (var i = 0; i < needles.length; i++) {
+    out.push(text.indexOf(needles[i]) !== -1);
+}
+for (var j = 0; j < patterns.length; j++) {
+    var re;
+    try { re = new RegExp(patterns[j][0], patterns[j][1]); }
+    catch (e) { return {invalidPattern: j, message: String(e.message || e)}; }
+    out.push(re.test(text));
+}
+return out;
+"""
 
-    if not text:
-        return False
-    # Case-insensitive search for the keyword 'ERROR'
-    return re.search(r"\berror\b", text, flags=re.IGNORECASE) is not None
+def _page_checks(
+	driver: webdriver.Chrome, needles: Sequence[str] = (), patterns: Sequence[Tuple[str, str]] = ()
+) -> List[bool]:
+	"""Check substrings and (JavaScript) regex patterns against the page body in one round trip.
 
-def _wait_presence(driver, selector: str, timeout: int) -> None:
+	Returns one boolean per needle followed by one per (pattern, flags) pair.
+	Raises ValueError when the browser rejects a pattern, e.g. one built from
+	variables that compile_flow could not check.
+	"""
+	result = driver.execute_script(_PAGE_CHECKS_SCRIPT, list(needles), [list(p) for p in patterns])
+	if isinstance(result, dict):
+		pattern, flags = patterns[int(result["invalidPattern"])]
+		raise ValueError(f"Invalid regex /{pattern}/{flags}: {result.get('message')}")
+	return [bool(r) for r in (result or [])]
 
-    by, value = _resolve_locator(selector)
-    WebDriverWait(driver, timeout).until(EC.presence_of_element_located((by, value)))
+# 错误关键词：字符串按字面匹配（不区分大小写），ASCII 单词边界处自动加 \b，
+# 因此 "error" 不会匹配 "errors_total"，而 "错误" 可以匹配 "发生错误"；
+# {"regex": "..."} 为正则，只能使用 Python 与 JavaScript 通用的语法（编译时检查）。
+# Python 端以 re.ASCII 编译，使 \b、\w、\d 与浏览器一致；代价是非 ASCII 字母的大小写折叠
+# （如 "É" 与 "é"）只在浏览器内生效
+KeywordSpec = Union[str, Dict[str, str]]
 
+DEFAULT_ERROR_KEYWORDS: Tuple[KeywordSpec, ...] = ("error",)
 
-def _wait_visible(driver, selector: str, timeout: int) -> None:
+_JS_SPECIAL = re.compile(r"[.*+?^${}()|[\]\\/]")
+
+# 正则关键词的词法单元：转义、字符类、Python 专有的组语法和量词，其余逐字符跳过
+_REGEX_TOKEN = re.compile(
+    r"\\.|\[\^?\]?(?:\\.|[^\]\\])*\]?|\(\?P|\(\?#|\(\?\(|\(\?>|\(\?[a-zA-Z-]+[:)]"
+    r"|\{\d*,?\d*\}\+|[*+?]\+|\{,|.",
+    re.S,
+)
+# JavaScript 不支持或含义不同的 Python 语法
+_PYTHON_ONLY_SYNTAX = (
+    (re.compile(r"\\[AZzN]"), "escapes \\A, \\Z and \\N are Python-only"),
+    (re.compile(r"\(\?P"), "named groups (?P<name>...) are Python-only"),
+    (re.compile(r"\(\?#"), "comments (?#...) are Python-only"),
+    (re.compile(r"\(\?\("), "conditional groups (?(...)...) are Python-only"),
+    (re.compile(r"\(\?>"), "atomic groups (?>...) are Python-only"),
+    (re.compile(r"\(\?[a-zA-Z-]"), "inline flags such as (?i) are Python-only"),
+    (re.compile(r"(?:[*+?]|\{\d*,?\d*\})\+"), "possessive quantifiers are Python-only"),
+    (re.compile(r"\{,"), "'{,n}' is a quantifier only in Python"),
+    (re.compile(r"\[\^?\]"), "'[]' and '[^]' mean different things in Python and JavaScript"),
+)
+
+
+def _js_incompatibility(pattern: str) -> Optional[str]:
+    """返回正则中 JavaScript 不支持或含义不同的语法说明，兼容时返回 None"""
+    for token in _REGEX_TOKEN.findall(pattern):
+        if len(token) < 2:
+            continue
+        for syntax, message in _PYTHON_ONLY_SYNTAX:
+            if syntax.match(token):
+                return message
+    return None
 
-    by, value = _resolve_locator(selector)
-    WebDriverWait(driver, timeout).until(EC.visibility_of_element_located((by, value)))
 
+# JavaScript RegExp 支持的 flags
+JS_REGEX_FLAGS = "dgimsuy"
+
+
+def js_regex_problem(pattern: str, flags: str = "") -> Optional[str]:
+    """返回 (pattern, flags) 不能作为 JavaScript 正则使用的原因，可以使用时返回 None
+
+    正则须能被 Python 编译且不含 Python 专有语法（见 _js_incompatibility），
+    flags 须为 JS_REGEX_FLAGS 中互不重复的字母。
+    """
+    if not isinstance(flags, str) or any(f not in JS_REGEX_FLAGS for f in flags) or len(set(flags)) != len(flags):
+        return f"invalid flags {flags!r} (use distinct letters from '{JS_REGEX_FLAGS}')"
+    try:
+        re.compile(pattern)
+    except re.error as e:
+        return f"invalid regex /{pattern}/: {e}"
+    incompatibility = _js_incompatibility(pattern)
+    if incompatibility:
+        return f"non-JavaScript regex /{pattern}/: {incompatibility}"
+    return None
+
+# 在浏览器内用合并后的正则扫描页面文本，只返回命中的关键词序号、位置和上下文
+_KEYWORD_SCAN_SCRIPT = """
+var source = arguments[0], context = arguments[1];
+var cache = window.__xunjianKeywordScan;
+if (!cache || cache.source !== source) {
+    cache = window.__xunjianKeywordScan = {source: source, re: new RegExp(source, "i")};
+}
+var root = document.body || document.documentElement;
+var text = root ? (root.innerText || root.textContent || "") : "";
+var m = cache.re.exec(text);
+if (!m) return null;
+for (var i = 1; i < m.length; i++) {
+    if (m[i] !== undefined) {
+        return [i - 1, m.index, text.slice(Math.max(0, m.index - context), m.index + m[0].length + context)];
+    }
+}
+return null;
+"""
+
+
+class KeywordMatch(NamedTuple):
+    keyword: str  # 命中的关键词（正则关键词为其表达式）
+    offset: int  # 在页面文本中的字符位置
+    context: str  # 命中位置附近的文本
+
+
+def _keyword_source(spec: KeywordSpec) -> Tuple[str, str]:
+    """返回 (关键词显示名称, 正则表达式)"""
+    if isinstance(spec, dict):
+        if set(spec) != {"regex"} or not isinstance(spec["regex"], str) or not spec["regex"]:
+            raise ValueError(f"Keyword objects must be {{\"regex\": \"...\"}}, got {spec!r}")
+        problem = _js_incompatibility(spec["regex"])
+        if problem:
+            raise ValueError(f"Regex keyword {spec['regex']!r} must also work in the browser: {problem}")
+        return spec["regex"], spec["regex"]
+    if not isinstance(spec, str) or not spec:
+        raise ValueError(f"Keywords must be non-empty strings, got {spec!r}")
+    pattern = _JS_SPECIAL.sub(lambda m: "\\" + m.group(0), spec)
+    if spec[0].isascii() and (spec[0].isalnum() or spec[0] == "_"):
+        pattern = r"\b" + pattern
+    if spec[-1].isascii() and (spec[-1].isalnum() or spec[-1] == "_"):
+        pattern += r"\b"
+    return spec, pattern
+
+
+class KeywordScanner:
+    """把一组错误关键词合并成一个正则，单次扫描即可找到最先出现的关键词
+
+    同一个正则在 Python（scan）和浏览器内（scan_page）使用，后者不会把页面文本传回本地。
+    """
 
-def _wait_clickable(driver, selector: str, timeout: int) -> None:
+    def __init__(self, keywords: Sequence[KeywordSpec] = DEFAULT_ERROR_KEYWORDS, context: int = 40):
+        """
+        Raises:
+            ValueError: 关键词为空、格式错误或正则无效
+        """
+        if not keywords:
+            raise ValueError("error_keywords must not be empty")
+        sources = [_keyword_source(spec) for spec in keywords]
+        self.keywords: Tuple[str, ...] = tuple(name for name, _ in sources)
+        self.context = context
+        # 每个关键词一个捕获组，命中的组序号即关键词序号；关键词自身的组必须是非捕获组
+        self.source = "|".join(f"({pattern})" for _, pattern in sources)
+        try:
+            self._pattern = re.compile(self.source, re.IGNORECASE | re.ASCII)
+        except re.error as e:
+            raise ValueError(f"Invalid error keyword pattern: {e}") from e
+        if self._pattern.groups != len(sources):
+            raise ValueError("Regex keywords must use non-capturing groups (?:...)")
 
+    def scan(self, text: str) -> Optional[KeywordMatch]:
+        """返回文本中最先出现的关键词，没有则返回 None"""
+        if not text:
+            return None
+        match = self._pattern.search(text)
+        if match is None:
+            return None
+        start, end = match.span()
+        return KeywordMatch(
+            self.keywords[match.lastindex - 1],
+            start,
+            text[max(0, start - self.context):end + self.context],
+        )
+
+    def scan_page(self, driver: webdriver.Chrome) -> Optional[KeywordMatch]:
+        """在浏览器内扫描页面正文，一次往返"""
+        result = driver.execute_script(_KEYWORD_SCAN_SCRIPT, self.source, self.context)
+        if not result:
+            return None
+        index, offset, context = result
+        return KeywordMatch(self.keywords[int(index)], int(offset), context or "")
+
+
+def _keyword_key(keywords: Sequence[KeywordSpec]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(("regex", k["regex"]) if isinstance(k, dict) else ("text", k) for k in keywords)
+
+
+@lru_cache(maxsize=64)
+def _cached_scanner(key: Tuple[Tuple[str, str], ...]) -> KeywordScanner:
+    return KeywordScanner([{"regex": value} if kind == "regex" else value for kind, value in key])
+
+
+def get_keyword_scanner(keywords: Optional[Sequence[KeywordSpec]] = None) -> KeywordScanner:
+    """返回关键词集合对应的扫描器，同一集合只编译一次；keywords 为 None 时使用默认关键词
+
+    Raises:
+        ValueError: 关键词格式错误
+    """
+    if keywords is None:
+        keywords = DEFAULT_ERROR_KEYWORDS
+    if not isinstance(keywords, (list, tuple)):
+        raise ValueError(f"error_keywords must be a list, got {type(keywords).__name__}")
+    try:
+        key = _keyword_key(keywords)
+    except (KeyError, TypeError):
+        raise ValueError(f"Invalid error_keywords: {keywords!r}") from None
+    return _cached_scanner(key)
+
+
+def _contains_error_keyword(text: str, scanner: Optional[KeywordScanner] = None) -> bool:
+
+    return (scanner or get_keyword_scanner()).scan(text) is not None
+
+# Wait engines: "poll" uses WebDriverWait (0.5 s poll interval),
+# "observer" injects a MutationObserver that resolves as soon as the condition holds.
+WAIT_ENGINES: Tuple[str, ...] = ("poll", "observer")
+
+_POLL_CONDITIONS = {
+    "presence": EC.presence_of_element_located,
+    "visible": EC.visibility_of_element_located,
+    "clickable": EC.element_to_be_clickable,
+}
+
+_OBSERVER_WAIT_SCRIPT = """
+var by = arguments[0], sel = arguments[1], cond = arguments[2], timeoutMs = arguments[3];
+var done = arguments[arguments.length - 1];
+function find() {
+    if (by === "xpath") {
+        return document.evaluate(sel, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    }
+    return document.querySelector(sel);
+}
+function visible(el) {
+    if (!el.isConnected) return false;
+    var style = window.getComputedStyle(el);
+    if (style.display === "none" || style.visibility === "hidden" || parseFloat(style.opacity) === 0) return false;
+    var rect = el.getBoundingClientRect();
+    return rect.width > 0 && rect.height > 0;
+}
+function check() {
+    var el = find();
+    if (!el) return null;
+    if (cond === "presence") return el;
+    if (!visible(el)) return null;
+    if (cond === "clickable" && el.disabled) return null;
+    return el;
+}
+var found;
+// An invalid CSS/XPath selector throws here; report it instead of waiting out the timeout
+try { found = check(); } catch (e) { done({invalidSelector: String(e && e.message || e)}); return; }
+if (found) { done(found); return; }
+var finished = false, observer, timer, fallback;
+function finish(value) {
+    if (finished) return;
+    finished = true;
+    observer.disconnect();
+    clearTimeout(timer);
+    clearInterval(fallback);
+    done(value);
+}
+function recheck() { var el = check(); if (el) finish(el); }
+observer = new MutationObserver(recheck);
+observer.observe(document, {childList: true, subtree: true, attributes: true, characterData: true});
+// Layout-only changes (CSS transitions, resizes) do not fire mutations
+fallback = setInterval(recheck, 100);
+timer = setTimeout(function () { finish(null); }, timeoutMs);
+"""
+
+
+# ChromeDriver errors for a script whose document went away during navigation
+_DOCUMENT_GONE = re.compile(r"unloaded|context with specified id|execution context", re.IGNORECASE)
+
+
+def _wait_observer(driver, by: str, value: str, condition: str, timeout: float):
+    """Wait for an element with a MutationObserver injected into the page."""
+    deadline = time.monotonic() + timeout
+    # The script timer fires first; the WebDriver script timeout is only a safety net
+    if getattr(driver, "_xunjian_script_timeout", 0) < timeout + 5:
+        driver.set_script_timeout(timeout + 5)
+        driver._xunjian_script_timeout = timeout + 5
+    js_by = "xpath" if by == By.XPATH else "css"
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            element = driver.execute_async_script(
+                _OBSERVER_WAIT_SCRIPT, js_by, value, condition, int(remaining * 1000)
+            )
+        except JavascriptException as err:
+            # The document was replaced while waiting (navigation); observe the new one
+            if not _DOCUMENT_GONE.search(err.msg or ""):
+                raise
+            time.sleep(0.05)
+            continue
+        if isinstance(element, dict) and "invalidSelector" in element:
+            raise InvalidSelectorException(f"Invalid selector {value!r}: {element['invalidSelector']}")
+        if element is not None:
+            return element
+    raise TimeoutException(f"Timed out after {timeout}s waiting for {condition} of {value}")
+
+
+def _wait_for(driver, selector: str, condition: str, timeout: int, engine: str = "poll"):
+    """Wait until the element matching selector satisfies condition and return it.
+
+    condition is one of "presence", "visible", "clickable".
+    """
     by, value = _resolve_locator(selector)
-    WebDriverWait(driver, timeout).until(EC.element_to_be_clickable((by, value)))
+    if engine == "observer":
+        return _wait_observer(driver, by, value, condition, timeout)
+    if engine != "poll":
+        raise ValueError(f"Unknown wait engine: {engine}")
+    return WebDriverWait(driver, timeout).until(_POLL_CONDITIONS[condition]((by, value)))
+
+
+GOTO_WAIT_UNTIL = ("load", "domcontentloaded", "networkidle", "selector", "none")
+
+# goto 未指定 wait_until 时的等待条件：与页面加载策略下 driver.get 已经等到的状态一致，不再额外等待
+_STRATEGY_WAIT_UNTIL: Dict[str, str] = {"normal": "load", "eager": "domcontentloaded", "none": "none"}
+
+# 一次往返读取文档状态以及距最后一个请求完成的毫秒数（导航和子资源）
+_NAV_STATE_SCRIPT = """
+var entries = performance.getEntriesByType("navigation").concat(performance.getEntriesByType("resource"));
+var lastEnd = 0;
+for (var i = 0; i < entries.length; i++) {
+    if (entries[i].responseEnd > lastEnd) lastEnd = entries[i].responseEnd;
+}
+return [document.readyState, performance.now() - lastEnd];
+"""
+
 
-def _type(driver, selector: str, text: str, timeout: int) -> None:
+def _navigate(
+    driver,
+    url: str,
+    wait_until: Optional[str] = None,
+    selector: Optional[str] = None,
+    timeout: float = 20,
+    nav_timeout: Optional[float] = None,
+    engine: str = "poll",
+    idle_ms: int = 500,
+) -> None:
+    """Open url and wait until the page satisfies wait_until.
 
-	by, value = _resolve_locator(selector)
-	element = WebDriverWait(driver, timeout).until(EC.visibility_of_element_located((by, value)))
+    wait_until is one of GOTO_WAIT_UNTIL, or None for what the browser's page
+    load strategy already waits for (see _STRATEGY_WAIT_UNTIL): "load" under
+    "normal", "domcontentloaded" under "eager" and no wait under "none", so
+    the eager/none strategies actually end a default goto early. An explicit
+    "load" under eager/none polls until readyState is complete. "networkidle" waits until no request has
+    finished for idle_ms (requests still in flight are not visible to the page, so
+    this is an approximation). When selector is given the element must also be
+    present. nav_timeout bounds driver.get and the readiness wait; without it
+    driver.get uses the browser's page load timeout and the wait uses timeout.
+
+    With the "normal" page load strategy driver.get blocks until the load event;
+    when an earlier condition is requested and the load times out, the page load
+    is stopped and the condition is checked instead of failing the step.
+    """
+    strategy = (getattr(driver, "capabilities", None) or {}).get("pageLoadStrategy", "normal")
+    if wait_until is None:
+        wait_until = _STRATEGY_WAIT_UNTIL.get(strategy, "load")
+    if wait_until not in GOTO_WAIT_UNTIL:
+        raise ValueError(f"Unknown wait_until: {wait_until} (expected one of {', '.join(GOTO_WAIT_UNTIL)})")
+    if wait_until == "selector" and not selector:
+        raise ValueError("wait_until 'selector' requires a 'selector'")
+
+    if nav_timeout is not None:
+        driver.set_page_load_timeout(nav_timeout)
+        timeout = nav_timeout
+    try:
+        driver.get(url)
+    except TimeoutException:
+        if wait_until == "load":
+            raise
+        driver.execute_script("window.stop();")
+    finally:
+        if nav_timeout is not None:
+            driver.set_page_load_timeout(getattr(driver, "_xunjian_page_load_timeout", 60))
+
+    # normal 策略下 driver.get 返回时 load 已经完成，无需再检查
+    if wait_until in ("domcontentloaded", "networkidle") or (wait_until == "load" and strategy != "normal"):
+        def ready(d) -> bool:
+            state, idle = d.execute_script(_NAV_STATE_SCRIPT)
+            if wait_until == "load":
+                return state == "complete"
+            if wait_until == "domcontentloaded":
+                return state != "loading"
+            return state != "loading" and idle >= idle_ms
+
+        WebDriverWait(driver, timeout, poll_frequency=0.1).until(ready)
+    if selector and wait_until != "none":
+        _wait_for(driver, selector, "presence", timeout, engine)
+
+
+def _wait_presence(driver, selector: str, timeout: int, engine: str = "poll") -> None:
+
+    _wait_for(driver, selector, "presence", timeout, engine)
+
+
+def _wait_visible(driver, selector: str, timeout: int, engine: str = "poll") -> None:
+
+    _wait_for(driver, selector, "visible", timeout, engine)
+
+
+def _wait_clickable(driver, selector: str, timeout: int, engine: str = "poll") -> None:
+
+    _wait_for(driver, selector, "clickable", timeout, engine)
+
+def _type(driver, selector: str, text: str, timeout: int, engine: str = "poll") -> None:
+
+	element = _wait_for(driver, selector, "visible", timeout, engine)
 	element.clear()
 	element.send_keys(text)
 
-def _click(driver, selector: str, timeout: int) -> None:
+def _click(driver, selector: str, timeout: int, engine: str = "poll") -> None:
 
-	by, value = _resolve_locator(selector)
-	element = WebDriverWait(driver, timeout).until(EC.element_to_be_clickable((by, value)))
+	element = _wait_for(driver, selector, "clickable", timeout, engine)
 	element.click()
 
+_VARIABLE_PATTERN = re.compile(r"\$\{([^}]+)\}")
+
+
+class Template:
+	"""A `${name}` template parsed once into literal and variable segments."""
+
+	__slots__ = ("source", "segments", "names", "literal")
+
+	def __init__(self, source: str):
+		self.source = source
+		segments = []
+		pos = 0
+		for match in _VARIABLE_PATTERN.finditer(source):
+			if match.start() > pos:
+				segments.append((False, source[pos:match.start()]))
+			segments.append((True, match.group(1)))
+			pos = match.end()
+		if pos < len(source):
+			segments.append((False, source[pos:]))
+		self.segments: Tuple[Tuple[bool, str], ...] = tuple(segments)
+		self.names: FrozenSet[str] = frozenset(name for is_var, name in segments if is_var)
+		# Fields without any ${} skip interpolation entirely
+		self.literal: bool = not self.names
+
+	def render(self, variables: Dict[str, Any]) -> str:
+		if self.literal:
+			return self.source
+		return "".join(
+			str(variables.get(part, "")) if is_var else part for is_var, part in self.segments
+		)
+
+
+@lru_cache(maxsize=4096)
+def compile_template(text: str) -> Template:
+
+	return Template(text)
+
+
 def _interpolate(text: str, variables: Dict[str, Any]) -> str:
 
 	if text is None:
 		return text
-
-	def repl(match: re.Match) -> str:
-		key = match.group(1)
-		value = variables.get(key, "")
-		return str(value)
-
-	return re.sub(r"\$\{([^}]+)\}", repl, text)
+	return compile_template(text).render(variables)
 
 def _wait_user(msg: str, step):
     msg = "请在浏览器内完成验证码后按回车继续..."
@@ -3,38 +3,46 @@ import json
 import os
 import re
 import sys
+import threading
 import time
 
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Callable, Deque, Dict, Generator, Iterator, List, Optional, Tuple, Union
 
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
 
-# OCR module import
-from selenium_ocr import (
-    is_ocr_available,
-    ocr_captcha,
-    solve_simple_captcha,
-    CaptchaSolver
-)
+# OCR availability check
+from selenium_ocr import OCR_ENGINES, configure_ocr_engine, is_ocr_available
 
 OCR_AVAILABLE = is_ocr_available()
 
+from selenium_actions import OCR_ACTIONS, CompiledStep, FlowCompileError, FlowContext, compile_flow, load_plugins, preload_actions
 from selenium_check import (
-	_create_webdriver,
-	_get_body_text,
-	_contains_error_keyword,
-	_resolve_locator,
-	_type,
-	_click,
-	_interpolate,
-	_wait_presence,
-	_wait_visible,
-	_wait_clickable
-	
+    BROWSER_PROFILES,
+    PAGE_LOAD_STRATEGIES,
+    WAIT_ENGINES,
+    BrowserProfile,
+    _create_webdriver,
+    get_keyword_scanner,
+    resolve_browser_profile,
+    validate_perf_budget,
+)
+from selenium_matrix import compile_view, expand_flow
+from selenium_network import flow_uses_network, network_capture
+from selenium_pool import WebDriverPool
+from selenium_scheduler import build_schedules, run_scheduler
+from selenium_session import configure_session_cache
+from selenium_suite import FlowPosition, load_compile_cache, problem_location, read_suite, save_compile_cache
+from selenium_tabs import close_isolated_tab, open_isolated_tab
+from selenium_report import (
+    JsonlResultSink,
+    SuiteCheckpoint,
+    flow_fingerprint,
+    read_jsonl_results,
+    summarize_flow_timing,
+    summarize_suite_timing,
 )
 
 
@@ -44,6 +52,7 @@ STATUS_BY_CODE: Dict[int, str] = {
     2: "SELENIUM_TIMEOUT_OR_NO_SUCH_ELEMENT", # SELENIUM超时或没有找到对应元素
     3: "WEBDRIVER_ERROR", # WEBDRIVER驱动错误
     4: "UNEXPECTED_ERROR", # 未预知的错误
+    5: "PERF_BUDGET_EXCEEDED", # 页面性能指标超出预算
 }
 
 
@@ -56,308 +65,961 @@ def parse_args() -> argparse.Namespace:
         )
     )
 
-    parser.add_argument("--suite", required=True, help="Path to suite JSON file")
+    parser.add_argument("--suite", help="Path to suite JSON file (or .jsonl with one flow per line)")
     parser.add_argument("--output", default="selenium_results.json", help="Path to write JSON report")
+    parser.add_argument("--results-jsonl", default=None, metavar="PATH",
+        help="Append one JSON line per finished flow to PATH as the suite runs",
+    )
+    parser.add_argument("--jsonl-steps", action="store_true",
+        help="Also write one JSON line per finished step to --results-jsonl",
+    )
+    parser.add_argument("--checkpoint", default=None, metavar="PATH",
+        help="Checkpoint file recording each finished flow (default: <output>.checkpoint.jsonl)",
+    )
+    parser.add_argument("--resume", action="store_true",
+        help="Skip flows that already passed in the run recorded in the checkpoint file",
+    )
+    parser.add_argument("--daemon", action="store_true",
+        help="Keep running and re-run each flow on its 'interval' (seconds) or 'cron' schedule",
+    )
+    parser.add_argument("--interval", type=float, default=None,
+        help="Default schedule in seconds for --daemon flows without 'interval'/'cron' (default: 300)",
+    )
+    parser.add_argument("--rebuild-report", default=None, metavar="JSONL",
+        help="Rebuild the --output report from a results JSONL file instead of running a suite",
+    )
     parser.add_argument("--headless", action="store_true", help="Default headless when a flow omits it")
     parser.add_argument("--default-timeout", type=int, default=20, help="Default per-step timeout seconds")
     parser.add_argument("--chromedriver-path",default=os.environ.get("CHROMEDRIVER"),
         help="Default local chromedriver path for all flows (each flow can override)",
     )
     parser.add_argument("--stop-on-fail", action="store_true", help="Stop after the first non-zero exit code")
+    parser.add_argument("--workers", type=int, default=1,
+        help="Number of flows to run concurrently, each in its own browser (default: 1, sequential)",
+    )
+    parser.add_argument("--tabs-per-browser", type=int, default=1,
+        help="Pack up to N flows into isolated tabs (separate CDP browser contexts) of one Chrome and "
+        "interleave their steps; each of the --workers threads drives one such browser. Loads only overlap with "
+        "--page-load-strategy eager/none and gotos without wait_until load/networkidle (default: 1, off)",
+    )
+    parser.add_argument("--reuse-drivers", action="store_true",
+        help="Keep browsers warm in a pool and reset them between flows instead of relaunching Chrome",
+    )
+    parser.add_argument("--wait-engine", choices=WAIT_ENGINES, default=None,
+        help="How element waits detect readiness: 'poll' (WebDriverWait) or 'observer' (MutationObserver). "
+        "Defaults to the suite's 'wait_engine' or 'poll'",
+    )
+    parser.add_argument("--browser-profile", choices=tuple(BROWSER_PROFILES), default=None,
+        help="Browser launch profile: 'full' (default) or 'lean' (eager load, small viewport, no extensions, "
+        "blocked images/fonts/media/analytics). Suites and flows can set 'browser_profile' with overrides",
+    )
+    parser.add_argument("--page-load-strategy", choices=PAGE_LOAD_STRATEGIES, default=None,
+        help="When driver.get returns: 'normal' (load event), 'eager' (DOMContentLoaded) or 'none'. "
+        "Overrides the browser profile; suites and flows can set 'page_load_strategy'",
+    )
+    parser.add_argument("--ocr-engine", choices=("auto",) + tuple(OCR_ENGINES), default=None,
+        help="OCR backend for captcha actions (default: suite 'ocr_engine', $XUNJIAN_OCR_ENGINE or auto)",
+    )
+    parser.add_argument("--plugin", action="append", default=[], metavar="MODULE",
+        help="Import a module that registers extra step actions (repeatable)",
+    )
+    parser.add_argument("--session-cache", default=None, metavar="PATH",
+        help="Persist login_begin/login_end sessions to this file so later runs can reuse them "
+        "(default: suite 'session_cache', otherwise in memory for this run only)",
+    )
+    parser.add_argument("--network-capture", action="store_true",
+        help="Record every flow's network requests (status, timing, bytes) from Chrome performance logs into the report; "
+        "flows using assert_no_5xx/assert_api_latency enable it automatically",
+    )
+    parser.add_argument("--perf-budget", action="append", default=[], metavar="METRIC=LIMIT",
+        help="Fail a flow with PERF_BUDGET_EXCEEDED when a goto exceeds this budget, e.g. ttfb_ms=500 "
+        "(repeatable; overrides suite 'perf_budget', flows and goto steps can override it)",
+    )
+    parser.add_argument("--error-keywords", default=None, metavar="FILE",
+        help="File with one error keyword per line for check_error_keyword "
+        "(default: suite 'error_keywords', otherwise 'error')",
+    )
+    parser.add_argument("--compile-cache", default=None, metavar="PATH",
+        help="Cache the parsed and compiled suite in PATH; later runs reuse it while the suite file is unchanged",
+    )
+    parser.add_argument("--check", action="store_true",
+        help="Only validate the suite: report every problem with its file position and exit",
+    )
+    parser.add_argument("--driver-max-uses", type=int, default=50,
+        help="Recycle a pooled browser after this many flows (only with --reuse-drivers)",
+    )
 
-    return parser.parse_args()
+    args = parser.parse_args()
+    if not args.suite and not args.rebuild_report:
+        parser.error("--suite is required unless --rebuild-report is given")
+    return args
 
 
 def load_suite(suite_path: str) -> Dict[str, Any]:
 
-    if not os.path.exists(suite_path):
-        raise FileNotFoundError(f"Suite file not found: {suite_path}")
-    with open(suite_path, "r", encoding="utf-8") as f:
-        data: Union[Dict[str, Any], List[Dict[str, Any]]] = json.load(f)
+    suite, _ = read_suite(suite_path)
+    return suite
+
+
+def load_compiled_suite(
+    suite_path: str, cli: argparse.Namespace
+) -> Tuple[Dict[str, Any], List[Union[List[CompiledStep], ValueError]]]:
+    """Read, validate and compile a suite file, using the compile cache when configured.
+
+    Every invalid flow is reported with its file position before any browser
+    starts. A cache hit skips parsing and compiling; only the actions' preload
+    hooks run again.
+    """
+    plugins = list(getattr(cli, "plugin", None) or [])
+    cache_path = getattr(cli, "compile_cache", None)
+    cached = load_compile_cache(cache_path, suite_path, plugins) if cache_path else None
+    if cached is not None:
+        suite, positions, compiled = cached
+        for index, steps in enumerate(compiled):
+            if isinstance(steps, ValueError):
+                _report_invalid(index, suite["flows"][index], steps, suite_path, positions[index])
+                continue
+            problems = preload_actions(steps)
+            if problems:
+                compiled[index] = ValueError("; ".join(problems))
+                _report_invalid(index, suite["flows"][index], compiled[index], suite_path, positions[index])
+        return suite, compiled
+
+    suite, positions = read_suite(suite_path)
+    load_plugins(plugins + list(suite.get("plugins", [])))
+    compiled = compile_suite(suite["flows"], suite_path, positions)
+    if cache_path:
+        save_compile_cache(cache_path, suite_path, plugins, suite, positions, compiled)
+    return suite, compiled
+
+
+def run_flow_steps(
+	flow: Dict[str, Any],
+	cli_overrides: argparse.Namespace,
+	pool: Optional[WebDriverPool] = None,
+	steps: Optional[List[CompiledStep]] = None,
+	timing: Optional[Dict[str, Any]] = None,
+	on_step: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> int:
+	"""Run one flow and return its exit code (see STATUS_BY_CODE).
+
+	When a timing dict is passed it is filled with monotonic-clock durations in
+	milliseconds: driver_create_ms, driver_teardown_ms, total_ms and one entry
+	per executed step ({"index", "action", "duration_ms", "status"} plus any
+	metrics the action reports, e.g. page_bytes and perf for goto).
+	on_step is called with each step entry as soon as the step finishes.
+	"""
+	if timing is None:
+		timing = {}
+	timing["steps"] = []
+	flow_started = time.perf_counter()
 
-    if isinstance(data, list):
-        return {"flows": data}
-    if isinstance(data, dict):
-        flows = data.get("flows")
-        if isinstance(flows, list):
-            return data
-        raise ValueError("Suite JSON object must contain a 'flows' array")
-    raise ValueError("Suite JSON must be an array of flows or an object with a 'flows' array")
-    
+	driver = None
+	driver_broken = False
+	ctx: Optional[FlowContext] = None
+	try:
+		# 在启动浏览器之前编译 flow，格式错误的步骤直接报错
+		if steps is None:
+			steps = compile_flow(flow)
+		headless, chromedriver_path, profile = _browser_settings(flow, cli_overrides)
+		timing["browser_profile"] = profile.name
+
+		started = time.perf_counter()
+		if pool is not None:
+			driver = pool.acquire(headless=headless, chromedriver_path=chromedriver_path, profile=profile)
+		else:
+			driver = _create_webdriver(headless=headless, chromedriver_path=chromedriver_path, profile=profile)
+		timing["driver_create_ms"] = _elapsed_ms(started)
+
+		ctx = _flow_context(flow, cli_overrides, driver)
+		capture = network_capture(driver)
+		if capture is not None:
+			ctx.network = capture.start()
+		return _drain(_step_runner(ctx, steps, timing, on_step))
+
+	except Exception as err:
+		exit_code, driver_broken = _classify_error(err)
+		return exit_code
+	finally:
+		_record_network(ctx, timing)
+		if driver is not None:
+			started = time.perf_counter()
+			if pool is not None:
+				# 会话异常的驱动不再放回池中
+				pool.release(driver, discard=driver_broken)
+			else:
+				try:
+					driver.quit()
+				except Exception:
+					pass
+			timing["driver_teardown_ms"] = _elapsed_ms(started)
+		timing["total_ms"] = _elapsed_ms(flow_started)
 
-def run_flow_steps(flow: Dict[str, Any], cli_overrides: argparse.Namespace) -> int:
 
-	variables: Dict[str, Any] = flow.get("variables", {}) or {}
-	default_timeout: int = (
-		cli_overrides.timeout if getattr(cli_overrides, "timeout", None) is not None else int(flow.get("timeout", 20))
-	)
+def _browser_settings(flow: Dict[str, Any], cli_overrides: argparse.Namespace) -> Tuple[bool, Optional[str], BrowserProfile]:
+	"""Return (headless, chromedriver_path, profile) for a flow."""
 	headless: bool = bool(getattr(cli_overrides, "headless", False) or flow.get("headless", False))
 	chromedriver_path: Optional[str] = (
 		getattr(cli_overrides, "chromedriver_path", None) if getattr(cli_overrides, "chromedriver_path", None) else flow.get("chromedriver_path")
 	)
+	profile_spec = getattr(cli_overrides, "browser_profile", None) or flow.get("browser_profile")
+	page_load_strategy = getattr(cli_overrides, "page_load_strategy", None) or flow.get("page_load_strategy")
+	# 使用网络断言的 flow 自动启用网络采集；识别验证码的 flow 不屏蔽图片
+	capture = bool(getattr(cli_overrides, "network_capture", False) or flow.get("network_capture")) or flow_uses_network(flow)
+	return headless, chromedriver_path, resolve_browser_profile(profile_spec, page_load_strategy, capture, _flow_uses_ocr(flow))
 
-	driver = None
-	try:
-		driver = _create_webdriver(headless=headless, chromedriver_path=chromedriver_path)
-
-		for idx, step in enumerate(flow["steps"]):
-			action = step.get("action")
-			if not action:
-				raise ValueError(f"Step {idx+1} missing 'action'")
-
-			step_timeout = int(step.get("timeout", default_timeout))
-			# Interpolate common params
-			selector = _interpolate(step.get("selector"), variables) if step.get("selector") else None
-			url = _interpolate(step.get("url"), variables) if step.get("url") else None
-			text = _interpolate(step.get("text"), variables) if step.get("text") else None
-			value = _interpolate(step.get("value"), variables) if step.get("value") else None
-			path = _interpolate(step.get("path"), variables) if step.get("path") else None
-
-			if action == "goto":
-				if not url:
-					raise ValueError("goto requires 'url'")
-				driver.get(url)
-
-			elif action == "type":
-				if not selector:
-					raise ValueError("type requires 'selector'")
-				_type(driver, selector, text or "", step_timeout)
-
-			elif action == "click":
-				if not selector:
-					raise ValueError("click requires 'selector'")
-				_click(driver, selector, step_timeout)
-
-			elif action == "wait_presence":
-				if not selector:
-					raise ValueError("wait_presence requires 'selector'")
-				_wait_presence(driver, selector, step_timeout)
-
-			elif action == "wait_visible":
-				if not selector:
-					raise ValueError("wait_visible requires 'selector'")
-				_wait_visible(driver, selector, step_timeout)
-
-			elif action == "wait_clickable":
-				if not selector:
-					raise ValueError("wait_clickable requires 'selector'")
-				_wait_clickable(driver, selector, step_timeout)
-
-			elif action == "sleep":
-				seconds = float(step.get("seconds", 1))
-				time.sleep(seconds)
-
-			elif action == "assert_page_contains":
-				needle = text or value
-				if not needle:
-					raise ValueError("assert_page_contains requires 'text' or 'value'")
-				page_text = _get_body_text(driver)
-				if needle not in page_text:
-					print(f"Assertion failed: page does not contain '{needle}'", file=sys.stderr)
-					return 1
-
-			elif action == "assert_page_not_contains": # 需要参数 text or value
-				needle = text or value
-				if not needle:
-					raise ValueError("assert_page_not_contains requires 'text' or 'value'")
-				page_text = _get_body_text(driver)
-				if needle in page_text:
-					print(f"Assertion failed: page unexpectedly contains '{needle}'", file=sys.stderr)
-					return 1
-
-			elif action == "assert_element_contains": # 需要参数 selector 以及 text or value
-				if not selector:
-					raise ValueError("assert_element_contains requires 'selector'")
-				needle = text or value
-				if not needle:
-					raise ValueError("assert_element_contains requires 'text' or 'value'")
-				by, val = _resolve_locator(selector)
-				element = WebDriverWait(driver, step_timeout).until(EC.visibility_of_element_located((by, val)))
-				if needle not in (element.text or ""):
-					print(f"Assertion failed: element text does not contain '{needle}'", file=sys.stderr)
-					return 1
-
-			elif action == "assert_element_not_contains": # 需要参数 selector 以及 text or value
-				if not selector:
-					raise ValueError("assert_element_not_contains requires 'selector'")
-				needle = text or value
-				if not needle:
-					raise ValueError("assert_element_not_contains requires 'text' or 'value'")
-				by, val = _resolve_locator(selector)
-				element = WebDriverWait(driver, step_timeout).until(EC.visibility_of_element_located((by, val)))
-				if needle in (element.text or ""):
-					print(f"Assertion failed: element text unexpectedly contains '{needle}'", file=sys.stderr)
-					return 1
-
-			elif action == "check_error_keyword":
-				page_text = _get_body_text(driver)
-				if _contains_error_keyword(page_text):
-					print("Found ERROR keyword on the page.")
-					return 1
-
-			elif action == "screenshot":
-				if not path:
-					raise ValueError("screenshot requires 'path'")
-				os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
-				driver.save_screenshot(path)
-
-			elif action == "save_source":
-				if not path:
-					raise ValueError("save_source requires 'path'")
-				os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
-				with open(path, "w", encoding="utf-8") as f:
-					f.write(driver.page_source or "")
-
-			elif action == "set_var":
-				name = step.get("name")
-				if not name:
-					raise ValueError("set_var requires 'name'")
-				variables[name] = text or value or ""
-
-			elif action == "ocr_captcha":
-				# 使用 pytesseract 识别验证码并存储到变量
-				if not selector:
-					raise ValueError("ocr_captcha requires 'selector' (captcha image)")
-				name = step.get("name")
-				if not name:
-					raise ValueError("ocr_captcha requires 'name' to store result variable")
-				preprocessing = step.get("preprocessing", "default")
-				captcha_text = ocr_captcha(driver, selector, preprocessing)
-				variables[name] = captcha_text
-				print(f"验证码识别结果存储到变量 {name}: {captcha_text}")
-
-			elif action == "solve_captcha":
-				# 自动解决验证码（识别+输入+验证）
-				captcha_selector = step.get("captcha_selector")
-				input_selector = step.get("input_selector")
-				submit_selector = step.get("submit_selector")
-				max_attempts = int(step.get("max_attempts", 3))
-				preprocessing = step.get("preprocessing", "default")
-				
-				if not captcha_selector:
-					raise ValueError("solve_captcha requires 'captcha_selector'")
-				if not input_selector:
-					raise ValueError("solve_captcha requires 'input_selector'")
-				
-				# 传递selenium_check模块的函数引用
-				selenium_check_funcs = (_get_body_text, _type, _click)
-				success = solve_simple_captcha(
-					driver, captcha_selector, input_selector, submit_selector, 
-					max_attempts, preprocessing, selenium_check_funcs
-				)
-				if not success:
-					print("验证码解决失败，请手动输入", file=sys.stderr)
-					
-					
-
-			elif action == "wait_user":
-				# 等待用户手动操作（如复杂验证码）
-				msg = text or value or "请在浏览器内完成验证码后按回车继续..."
-				try:
-					input(msg)
-				except EOFError:
-					# 在CI环境中回退为固定等待
-					time.sleep(float(step.get("seconds", 30)))
-
-			elif action == "prompt":
-				# 提示用户输入并存储到变量
-				name = step.get("name")
-				if not name:
-					raise ValueError("prompt requires 'name' to store user input variable")
-				prompt_msg = text or value or f"请输入 {name} 的值: "
-				try:
-					variables[name] = input(prompt_msg)
-				except EOFError:
-					variables[name] = ""
-
-
-
-			elif action == "switch_to_default_content":
-				# 切换回主文档
-				driver.switch_to.default_content()
-
-			elif action == "save_cookies":
-				# 保存登录后的cookies
-				if not path:
-					raise ValueError("save_cookies requires 'path'")
-				os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
-				with open(path, "w", encoding="utf-8") as f:
-					json.dump(driver.get_cookies(), f, ensure_ascii=False, indent=2)
-
-			elif action == "load_cookies":
-				# 加载之前保存的cookies
-				if not path:
-					raise ValueError("load_cookies requires 'path'")
-				if not os.path.exists(path):
-					raise FileNotFoundError(f"Cookies文件未找到: {path}")
-				with open(path, "r", encoding="utf-8") as f:
-					cookies = json.load(f)
-				for ck in cookies:
-					try:
-						# 确保cookie字段有效
-						ck.pop('sameSite', None)  # 某些驱动对大小写敏感
-						driver.add_cookie(ck)
-					except Exception:
-						pass
 
-			else:
-				raise ValueError(f"Unsupported action: {action}")
-
-		# Completed all steps successfully
-		return 0
-
-	except (TimeoutException, NoSuchElementException) as sel_err:
-		print(f"Selenium element/timeout error: {sel_err}", file=sys.stderr)
-		return 2
-	except WebDriverException as wd_err:
-		print(f"WebDriver error: {wd_err}", file=sys.stderr)
-		return 3
-	except Exception as unexpected:
-		print(f"Unexpected error: {unexpected}", file=sys.stderr)
-		return 4
-	finally:
-		if driver is not None:
-			try:
-				driver.quit()
-			except Exception:
-				pass
+def _flow_context(flow: Dict[str, Any], cli_overrides: argparse.Namespace, driver) -> FlowContext:
+
+	# 复制一份变量，set_var 等动作不会修改 suite 中的定义
+	variables: Dict[str, Any] = dict(flow.get("variables", {}) or {})
+	default_timeout: int = (
+		cli_overrides.timeout if getattr(cli_overrides, "timeout", None) is not None else int(flow.get("timeout", 20))
+	)
+	wait_engine: str = getattr(cli_overrides, "wait_engine", None) or flow.get("wait_engine", "poll")
+	keywords = getattr(cli_overrides, "error_keywords", None) or flow.get("error_keywords")
+	perf_budget = validate_perf_budget(getattr(cli_overrides, "perf_budget", None) or flow.get("perf_budget") or {})
+	return FlowContext(driver, variables, default_timeout, wait_engine, get_keyword_scanner(keywords), perf_budget)
 
 
-def run_suite(suite: Dict[str, Any], cli: argparse.Namespace) -> List[Dict[str, Any]]:
+def _record_network(ctx: Optional[FlowContext], timing: Dict[str, Any]) -> None:
 
-    defaults: Dict[str, Any] = {
-        "headless": bool(cli.headless or suite.get("headless", False)),
-        "timeout": int(suite.get("timeout", cli.default_timeout)),
-        "chromedriver_path": suite.get("chromedriver_path", cli.chromedriver_path),
+	if ctx is None or ctx.network is None:
+		return
+	# 只是统计信息，驱动已失效等异常不影响 flow 结果
+	try:
+		ctx.network.close()
+		timing["network"] = ctx.network.summary()
+	except Exception:
+		pass
+
+
+def _step_runner(
+	ctx: FlowContext,
+	steps: List[CompiledStep],
+	timing: Dict[str, Any],
+	on_step: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Generator[None, None, int]:
+	"""Execute steps one at a time, yielding after each one.
+
+	The generator returns the flow's exit code; step exceptions propagate to the
+	caller. Driving it with _drain runs the flow straight through, while the
+	multi-tab runner interleaves several runners on one browser.
+	"""
+	position = 0
+	while position < len(steps):
+		step = steps[position]
+		started = time.perf_counter()
+		status = "error"
+		ctx.metrics = {}
+		try:
+			exit_code = step(ctx)
+			status = "failed" if exit_code else "ok"
+		finally:
+			entry = {
+				"index": step.index + 1,
+				"action": step.action,
+				"duration_ms": _elapsed_ms(started),
+				"status": status,
+			}
+			entry.update(ctx.metrics)
+			timing["steps"].append(entry)
+			if on_step is not None:
+				on_step(entry)
+		if exit_code:
+			return exit_code
+		if ctx.jump_to is not None:
+			position, ctx.jump_to = ctx.jump_to, None
+		else:
+			position += 1
+		yield
+
+	# Completed all steps successfully
+	return 0
+
+
+def _drain(runner: Generator[None, None, int]) -> int:
+
+	while True:
+		try:
+			next(runner)
+		except StopIteration as done:
+			return done.value
+
+
+def _classify_error(err: Exception) -> Tuple[int, bool]:
+	"""Report a flow error and return (exit_code, driver_broken)."""
+	if isinstance(err, (TimeoutException, NoSuchElementException)):
+		print(f"Selenium element/timeout error: {err}", file=sys.stderr)
+		return 2, False
+	if isinstance(err, WebDriverException):
+		print(f"WebDriver error: {err}", file=sys.stderr)
+		return 3, True
+	print(f"Unexpected error: {err}", file=sys.stderr)
+	return 4, False
+
+
+def _elapsed_ms(started: float) -> float:
+
+	return round((time.perf_counter() - started) * 1000.0, 1)
+
+
+def _flow_overrides(flow: Dict[str, Any], defaults: Dict[str, Any]) -> argparse.Namespace:
+
+    # Merge default knobs via CLI overrides interface expected by run_flow_steps
+    return argparse.Namespace(
+        headless=bool(flow.get("headless", defaults["headless"])),
+        timeout=int(flow.get("timeout", defaults["timeout"])),
+        chromedriver_path=flow.get("chromedriver_path", defaults["chromedriver_path"]),
+        wait_engine=flow.get("wait_engine", defaults["wait_engine"]),
+        browser_profile=flow.get("browser_profile", defaults["browser_profile"]),
+        page_load_strategy=flow.get("page_load_strategy", defaults["page_load_strategy"]),
+        error_keywords=flow.get("error_keywords", defaults.get("error_keywords")),
+        network_capture=bool(flow.get("network_capture", defaults.get("network_capture", False))),
+        # flow 的预算按指标覆盖 suite 的预算
+        perf_budget={**(defaults.get("perf_budget") or {}), **(flow.get("perf_budget") or {})},
+    )
+
+
+def _flow_name(index: int, flow: Dict[str, Any]) -> str:
+
+    return flow.get("name") or f"flow_{index+1}"
+
+
+def compile_suite(
+    flows: List[Dict[str, Any]],
+    path: Optional[str] = None,
+    positions: Optional[List[FlowPosition]] = None,
+) -> List[Union[List[CompiledStep], ValueError]]:
+    """Compile every flow before any browser starts.
+
+    Flows that fail to compile are reported immediately and kept as the
+    ValueError so the runner can record them without launching a driver.
+    With the suite path and flow positions from read_suite, each problem is
+    reported at its file:line. Matrix/dataset flows are compiled once, with
+    their parameters declared as variables; all of their instances share
+    the compiled steps.
+    """
+    compiled: List[Union[List[CompiledStep], ValueError]] = []
+    for index, flow in enumerate(flows):
+        try:
+            compiled.append(compile_flow(compile_view(flow)))
+        except ValueError as err:
+            _report_invalid(index, flow, err, path, positions[index] if positions else None)
+            compiled.append(err)
+    return compiled
+
+
+def _report_invalid(
+    index: int,
+    flow: Dict[str, Any],
+    err: ValueError,
+    path: Optional[str],
+    position: Optional[FlowPosition],
+) -> None:
+
+    name = _flow_name(index, flow)
+    if path is None:
+        print(f"Flow '{name}' is invalid: {err}", file=sys.stderr)
+        return
+    problems = err.problems if isinstance(err, FlowCompileError) else [(None, str(err))]
+    for step_index, message in problems:
+        print(f"{problem_location(path, position, step_index)}: flow '{name}': {message}", file=sys.stderr)
+
+
+def iter_instances(
+    flows: List[Dict[str, Any]],
+    compiled: List[Union[List[CompiledStep], ValueError]],
+) -> Iterator[Tuple[int, Dict[str, Any], Union[List[CompiledStep], ValueError]]]:
+    """Expand matrix/dataset flows lazily into (instance index, flow, steps).
+
+    Plain flows and flows that failed to compile are yielded once; unnamed
+    flows keep the flow_<n> name of their position in the suite. A dataset
+    that turns out to be malformed part way through ends its flow with one
+    invalid instance carrying the error, so it is reported like any other
+    invalid flow instead of aborting the suite.
+    """
+    index = 0
+    for position, flow in enumerate(flows):
+        steps = compiled[position]
+        name = _flow_name(position, flow)
+        if not flow.get("name"):
+            flow = dict(flow, name=name)
+        if isinstance(steps, ValueError):
+            yield index, flow, steps
+            index += 1
+            continue
+        instances = expand_flow(flow, name)
+        while True:
+            try:
+                instance = next(instances)
+            except StopIteration:
+                break
+            except (OSError, ValueError) as err:
+                print(f"Flow '{name}' could not be expanded: {err}", file=sys.stderr)
+                yield index, flow, ValueError(str(err))
+                index += 1
+                break
+            yield index, instance, steps
+            index += 1
+
+
+def _materialize_instances(
+    flows: List[Dict[str, Any]],
+    compiled: List[Union[List[CompiledStep], ValueError]],
+) -> Tuple[List[Dict[str, Any]], List[Union[List[CompiledStep], ValueError]]]:
+
+    instances = list(iter_instances(flows, compiled))
+    return [flow for _, flow, _ in instances], [steps for _, _, steps in instances]
+
+
+class SuiteRuntime:
+    """Per-run settings and services shared by every flow of a suite run."""
+
+    def __init__(
+        self,
+        defaults: Dict[str, Any],
+        pool: Optional[WebDriverPool] = None,
+        sink: Optional[JsonlResultSink] = None,
+        checkpoint: Optional[SuiteCheckpoint] = None,
+    ):
+        self.defaults = defaults
+        self.pool = pool
+        self.sink = sink
+        self.checkpoint = checkpoint
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.close()
+        if self.sink is not None:
+            self.sink.close()
+        if self.checkpoint is not None:
+            self.checkpoint.close()
+
+
+def _run_flow(
+    index: int,
+    flow: Dict[str, Any],
+    steps: Union[List[CompiledStep], ValueError, None],
+    runtime: SuiteRuntime,
+) -> Dict[str, Any]:
+
+    name: str = _flow_name(index, flow)
+    previous = _resumed_result(index, name, flow, runtime)
+    if previous is not None:
+        return previous
+
+    overrides = _flow_overrides(flow, runtime.defaults)
+    timing: Dict[str, Any] = {}
+    if isinstance(steps, ValueError):
+        exit_code = 4
+    else:
+        exit_code = run_flow_steps(flow, overrides, runtime.pool, steps, timing, _step_sink(index, name, runtime))
+    return _record_result(index, name, flow, overrides, exit_code, timing, runtime)
+
+
+def _resumed_result(index: int, name: str, flow: Dict[str, Any], runtime: SuiteRuntime) -> Optional[Dict[str, Any]]:
+
+    checkpoint = runtime.checkpoint
+    if checkpoint is None:
+        return None
+    previous = checkpoint.passed(name, flow_fingerprint(flow))
+    if previous is None:
+        return None
+    # 中断前已通过的 flow 直接沿用上次结果
+    result = dict(previous, resumed=True)
+    if runtime.sink is not None:
+        runtime.sink.write_flow(index, result)
+    return result
+
+
+def _step_sink(index: int, name: str, runtime: SuiteRuntime) -> Optional[Callable[[Dict[str, Any]], None]]:
+
+    sink = runtime.sink
+    if sink is not None and sink.include_steps:
+        return lambda entry: sink.write_step(index, name, entry)
+    return None
+
+
+def _record_result(
+    index: int,
+    name: str,
+    flow: Dict[str, Any],
+    overrides: argparse.Namespace,
+    exit_code: int,
+    timing: Dict[str, Any],
+    runtime: SuiteRuntime,
+) -> Dict[str, Any]:
+
+    result = {
+        "name": name,
+        "exit_code": exit_code,
+        "status": STATUS_BY_CODE.get(exit_code, "UNKNOWN"),
+        "timeout": overrides.timeout,
+        "headless": overrides.headless,
+        "timing": summarize_flow_timing(timing),
     }
+    if "instance_of" in flow:
+        result["instance_of"] = flow["instance_of"]
+        result["instance"] = flow["instance"]
+    if runtime.sink is not None:
+        runtime.sink.write_flow(index, result)
+    if runtime.checkpoint is not None:
+        runtime.checkpoint.record(name, flow_fingerprint(flow), result)
+    return result
+
+
+class _TabJob:
+    """A flow running in one isolated tab of a shared browser."""
+
+    __slots__ = ("index", "name", "overrides", "timing", "ctx", "runner", "tab", "started")
+
+    def __init__(self, index, name, overrides, timing, ctx, runner, tab, started):
+        self.index = index
+        self.name = name
+        self.overrides = overrides
+        self.timing = timing
+        self.ctx = ctx
+        self.runner = runner
+        self.tab = tab
+        self.started = started
+
+
+def _run_tab_batch(
+    indices: List[int],
+    flows: List[Dict[str, Any]],
+    compiled: List[Union[List[CompiledStep], ValueError]],
+    runtime: SuiteRuntime,
+) -> Dict[int, Dict[str, Any]]:
+    """Run compiled flows that share browser settings in isolated tabs of one browser.
+
+    Each flow gets its own CDP browser context (separate cookies and storage).
+    Steps are interleaved round-robin, one step per flow at a time, over the
+    browser's single WebDriver session: a driver.get or element wait blocks
+    every tab until it returns. With the default "normal" page load strategy
+    a tab still loading therefore holds up the others; the overlap only pays
+    off with "eager" or "none" (e.g. the lean profile), where a goto without
+    wait_until returns at DOMContentLoaded (eager) or at once (none) and the
+    remaining loading happens while other tabs run. A goto that asks for
+    wait_until "load" or "networkidle" still blocks the session until then. A flow's
+    driver_create_ms/driver_teardown_ms measure opening and closing its tab.
+    Switching tabs resets frame focus to the top document, so flows that work
+    inside an iframe across several steps should not be run in this mode.
+    """
+    results: Dict[int, Dict[str, Any]] = {}
+    first_overrides = _flow_overrides(flows[indices[0]], runtime.defaults)
+    headless, chromedriver_path, profile = _browser_settings(flows[indices[0]], first_overrides)
+
+    def finish(index: int, overrides: argparse.Namespace, exit_code: int, timing: Dict[str, Any]) -> None:
+        name = _flow_name(index, flows[index])
+        results[index] = _record_result(index, name, flows[index], overrides, exit_code, timing, runtime)
+
+    pool = runtime.pool
+    try:
+        if pool is not None:
+            # 各 flow 的隔离标签页由这里自己开关，不需要池再套一层上下文
+            driver = pool.acquire(headless=headless, chromedriver_path=chromedriver_path, profile=profile, isolate=False)
+        else:
+            driver = _create_webdriver(headless=headless, chromedriver_path=chromedriver_path, profile=profile)
+        home_handle = driver.current_window_handle
+    except Exception as err:
+        exit_code, _ = _classify_error(err)
+        for index in indices:
+            finish(index, _flow_overrides(flows[index], runtime.defaults), exit_code, {"steps": []})
+        return results
+
+    driver_broken = False
+    active: Deque[_TabJob] = deque()
+    try:
+        for index in indices:
+            flow = flows[index]
+            name = _flow_name(index, flow)
+            overrides = _flow_overrides(flow, runtime.defaults)
+            timing: Dict[str, Any] = {"steps": [], "browser_profile": profile.name}
+            started = time.perf_counter()
+            try:
+                tab = open_isolated_tab(driver, profile.blocked_urls)
+            except Exception as err:
+                exit_code, broken = _classify_error(err)
+                driver_broken = driver_broken or broken
+                timing["total_ms"] = _elapsed_ms(started)
+                finish(index, overrides, exit_code, timing)
+                continue
+            timing["driver_create_ms"] = _elapsed_ms(started)
+            ctx = _flow_context(flow, overrides, driver)
+            capture = network_capture(driver)
+            if capture is not None:
+                ctx.network = capture.start(tab.target_id)
+            runner = _step_runner(ctx, compiled[index], timing, _step_sink(index, name, runtime))
+            active.append(_TabJob(index, name, overrides, timing, ctx, runner, tab, started))
+
+        while active:
+            job = active.popleft()
+            try:
+                driver.switch_to.window(job.tab.handle)
+                next(job.runner)
+                active.append(job)
+                continue
+            except StopIteration as done:
+                exit_code = done.value
+            except Exception as err:
+                exit_code, broken = _classify_error(err)
+                driver_broken = driver_broken or broken
+            _record_network(job.ctx, job.timing)
+            started = time.perf_counter()
+            close_isolated_tab(driver, job.tab, home_handle)
+            job.timing["driver_teardown_ms"] = _elapsed_ms(started)
+            job.timing["total_ms"] = _elapsed_ms(job.started)
+            finish(job.index, job.overrides, exit_code, job.timing)
+    finally:
+        # 异常中断时剩余 flow 按 WebDriver 错误记录
+        for job in active:
+            _record_network(job.ctx, job.timing)
+            job.timing["total_ms"] = _elapsed_ms(job.started)
+            finish(job.index, job.overrides, 3, job.timing)
+        if pool is not None:
+            pool.release(driver, discard=driver_broken)
+        else:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+    return results
 
-    results: List[Dict[str, Any]] = []
-    for index, flow in enumerate(suite["flows"]):
-        name: str = flow.get("name") or f"flow_{index+1}"
 
-        # Merge default knobs via CLI overrides interface expected by run_flow_steps
-        overrides = argparse.Namespace(
-            headless=bool(flow.get("headless", defaults["headless"])),
-            timeout=int(flow.get("timeout", defaults["timeout"])),
-            chromedriver_path=flow.get("chromedriver_path", defaults["chromedriver_path"]),
-        )
+def _run_suite_parallel(
+    flows: List[Dict[str, Any]],
+    compiled: List[Union[List[CompiledStep], ValueError]],
+    runtime: SuiteRuntime,
+    workers: int,
+    stop_on_fail: bool,
+) -> List[Dict[str, Any]]:
+    """Run flows on a bounded thread pool and return results in suite order.
+
+    Flow instances are pulled from iter_instances only as workers free up
+    (at most two per worker are queued), so a large dataset is never expanded
+    into memory up front. With stop_on_fail, the first failing flow cancels
+    every flow that has not started yet; flows already running are allowed
+    to finish and are reported.
+    """
+    stop = threading.Event()
+    instances = iter_instances(flows, compiled)
+    max_pending = workers * 2
+
+    def task(index: int, flow: Dict[str, Any], steps: Union[List[CompiledStep], ValueError]) -> Optional[Dict[str, Any]]:
+        if stop.is_set():
+            return None
+        return _run_flow(index, flow, steps, runtime)
+
+    finished: Dict[int, Dict[str, Any]] = {}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="flow") as executor:
+        pending: Dict[Any, int] = {}
+
+        def refill() -> None:
+            while len(pending) < max_pending and not stop.is_set():
+                item = next(instances, None)
+                if item is None:
+                    return
+                pending[executor.submit(task, *item)] = item[0]
+
+        refill()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                if future.cancelled():
+                    continue
+                result = future.result()
+                if result is None:
+                    continue
+                finished[index] = result
+                if stop_on_fail and result["exit_code"] != 0 and not stop.is_set():
+                    stop.set()
+                    for other in pending:
+                        other.cancel()
+            refill()
+
+    return [finished[index] for index in sorted(finished)]
+
+
+def _flow_uses_ocr(flow: Dict[str, Any]) -> bool:
+
+    steps = flow.get("steps")
+    return isinstance(steps, list) and any(isinstance(s, dict) and s.get("action") in OCR_ACTIONS for s in steps)
+
+
+def uses_ocr(compiled: List[Union[List[CompiledStep], ValueError]]) -> bool:
+    """Return True when any successfully compiled flow contains an OCR action."""
+    return any(
+        not isinstance(steps, ValueError) and any(step.action in OCR_ACTIONS for step in steps)
+        for steps in compiled
+    )
 
-        exit_code = run_flow_steps(flow, overrides)
 
-        results.append(
-            {
-                "name": name,
-                "exit_code": exit_code,
-                "status": STATUS_BY_CODE.get(exit_code, "UNKNOWN"),
-                "timeout": overrides.timeout,
-                "headless": overrides.headless,
-            }
-        )
+def _suite_keywords(suite: Dict[str, Any], cli: argparse.Namespace) -> Optional[List[Any]]:
+    """Return the suite-wide error keywords, validated (and compiled) before any flow runs."""
+
+    path = getattr(cli, "error_keywords", None)
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            keywords = [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+    else:
+        keywords = suite.get("error_keywords")
+    if keywords is not None:
+        try:
+            get_keyword_scanner(keywords)
+        except ValueError as err:
+            raise ValueError(f"Invalid error_keywords{f' in {path}' if path else ''}: {err}") from err
+    return keywords
+
+
+def _suite_perf_budget(suite: Dict[str, Any], cli: argparse.Namespace) -> Dict[str, float]:
+    """Merge the suite's perf_budget with --perf-budget METRIC=LIMIT overrides."""
+
+    try:
+        budget = validate_perf_budget(suite.get("perf_budget") or {})
+        for item in getattr(cli, "perf_budget", None) or []:
+            metric, sep, limit = item.partition("=")
+            if not sep:
+                raise ValueError(f"expected METRIC=LIMIT, got {item!r}")
+            budget.update(validate_perf_budget({metric.strip(): float(limit)}))
+    except ValueError as err:
+        raise ValueError(f"Invalid perf_budget: {err}") from err
+    return budget
+
+
+def _suite_defaults(suite: Dict[str, Any], cli: argparse.Namespace) -> Dict[str, Any]:
+    """Merge the suite-level settings with the CLI; raises ValueError/OSError for bad settings."""
+
+    try:
+        timeout = int(suite.get("timeout", cli.default_timeout))
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid timeout: {suite.get('timeout')!r}") from None
+    wait_engine = getattr(cli, "wait_engine", None) or suite.get("wait_engine", "poll")
+    if wait_engine not in WAIT_ENGINES:
+        raise ValueError(f"Unknown wait_engine: {wait_engine} (expected one of {', '.join(WAIT_ENGINES)})")
+    return {
+        "headless": bool(cli.headless or suite.get("headless", False)),
+        "timeout": timeout,
+        "chromedriver_path": suite.get("chromedriver_path", cli.chromedriver_path),
+        "wait_engine": wait_engine,
+        "browser_profile": getattr(cli, "browser_profile", None) or suite.get("browser_profile"),
+        "page_load_strategy": getattr(cli, "page_load_strategy", None) or suite.get("page_load_strategy"),
+        "error_keywords": _suite_keywords(suite, cli),
+        "network_capture": bool(getattr(cli, "network_capture", False) or suite.get("network_capture", False)),
+        "perf_budget": _suite_perf_budget(suite, cli),
+    }
 
-        if cli.stop_on_fail and exit_code != 0:
-            break
 
-    return results
+def check_suite(
+    suite: Dict[str, Any],
+    cli: argparse.Namespace,
+    compiled: List[Union[List[CompiledStep], ValueError]],
+    schedules: bool = True,
+) -> List[str]:
+    """Return the problems compile_flow cannot see, before any browser starts.
+
+    Covers the suite-level settings (error_keywords, perf_budget, timeout,
+    wait_engine, ocr_engine), each valid flow's browser_profile/page_load_strategy as
+    merged with the suite defaults and, with `schedules`, the interval/cron
+    schedules used by --daemon.
+    """
+
+    try:
+        defaults = _suite_defaults(suite, cli)
+    except (OSError, TypeError, ValueError) as err:
+        return [str(err)]
+    problems: List[str] = []
+    ocr_engine = getattr(cli, "ocr_engine", None) or suite.get("ocr_engine")
+    if ocr_engine and ocr_engine != "auto" and ocr_engine not in OCR_ENGINES:
+        problems.append(f"Unknown ocr_engine: {ocr_engine}")
+    for index, flow in enumerate(suite["flows"]):
+        if isinstance(compiled[index], ValueError):
+            continue
+        try:
+            _browser_settings(flow, _flow_overrides(flow, defaults))
+        except (TypeError, ValueError) as err:
+            problems.append(f"flow '{_flow_name(index, flow)}': {err}")
+    if schedules:
+        try:
+            build_schedules(suite["flows"], suite, float(getattr(cli, "interval", None) or 300))
+        except ValueError as err:
+            problems.append(str(err))
+    return problems
+
+
+def prepare_suite(
+    suite: Dict[str, Any],
+    cli: argparse.Namespace,
+    use_checkpoint: bool = True,
+    compiled: Optional[List[Union[List[CompiledStep], ValueError]]] = None,
+) -> Tuple[List[Dict[str, Any]], List[Union[List[CompiledStep], ValueError]], SuiteRuntime]:
+    """Load plugins, compile every flow and build the shared runtime for a suite run.
+
+    Pass `compiled` from load_compiled_suite to skip compiling again.
+    """
+
+    defaults = _suite_defaults(suite, cli)
+
+    load_plugins(list(getattr(cli, "plugin", None) or []) + list(suite.get("plugins", [])))
+
+    flows: List[Dict[str, Any]] = suite["flows"]
+    if compiled is None:
+        compiled = compile_suite(flows)
+
+    # OCR 后端在整个 suite 中只加载一次，各 worker 线程复用；没有 OCR 动作的 suite 不加载
+    ocr_engine = getattr(cli, "ocr_engine", None) or suite.get("ocr_engine")
+    if ocr_engine and OCR_AVAILABLE and uses_ocr(compiled):
+        configure_ocr_engine(ocr_engine)
+
+    session_cache = getattr(cli, "session_cache", None) or suite.get("session_cache")
+    if session_cache:
+        configure_session_cache(session_cache)
+
+    workers = max(1, int(getattr(cli, "workers", 1) or 1))
+    runtime = SuiteRuntime(defaults)
+    if getattr(cli, "reuse_drivers", False):
+        runtime.pool = WebDriverPool(max_uses=int(getattr(cli, "driver_max_uses", 50)), max_idle_per_key=workers)
+    if getattr(cli, "results_jsonl", None):
+        runtime.sink = JsonlResultSink(cli.results_jsonl, include_steps=bool(getattr(cli, "jsonl_steps", False)))
+    checkpoint_path = getattr(cli, "checkpoint", None) or (
+        f"{cli.output}.checkpoint.jsonl" if getattr(cli, "output", None) else None
+    )
+    if use_checkpoint and checkpoint_path:
+        runtime.checkpoint = SuiteCheckpoint(checkpoint_path, resume=bool(getattr(cli, "resume", False)))
+    return flows, compiled, runtime
+
+
+def _run_suite_tabs(
+    flows: List[Dict[str, Any]],
+    compiled: List[Union[List[CompiledStep], ValueError]],
+    runtime: SuiteRuntime,
+    workers: int,
+    tabs_per_browser: int,
+    stop_on_fail: bool,
+) -> List[Dict[str, Any]]:
+    """Pack flows into batches of up to tabs_per_browser tabs per browser.
+
+    Only flows with the same headless/chromedriver/profile settings share a
+    browser. Invalid flows run alone so they are reported as usual. Batches
+    run on a pool of `workers` threads. With stop_on_fail, a failure cancels
+    the batches that have not started yet. Matrix/dataset flows are expanded
+    up front here, since batching needs to see every instance.
+    """
+    flows, compiled = _materialize_instances(flows, compiled)
+    solo: List[List[int]] = []
+    groups: Dict[Tuple[bool, Optional[str], BrowserProfile], List[int]] = {}
+    for index, flow in enumerate(flows):
+        if isinstance(compiled[index], ValueError):
+            solo.append([index])
+            continue
+        try:
+            key = _browser_settings(flow, _flow_overrides(flow, runtime.defaults))
+        except ValueError:
+            solo.append([index])
+            continue
+        groups.setdefault(key, []).append(index)
+    batches = solo + [
+        members[start:start + tabs_per_browser]
+        for members in groups.values()
+        for start in range(0, len(members), tabs_per_browser)
+    ]
+    batches.sort(key=lambda batch: batch[0])
+
+    stop = threading.Event()
+
+    def task(batch: List[int]) -> Dict[int, Dict[str, Any]]:
+        if stop.is_set():
+            return {}
+        results: Dict[int, Dict[str, Any]] = {}
+        pending: List[int] = []
+        for index in batch:
+            previous = _resumed_result(index, _flow_name(index, flows[index]), flows[index], runtime)
+            if previous is not None:
+                results[index] = previous
+            else:
+                pending.append(index)
+        if len(pending) == 1:
+            results[pending[0]] = _run_flow(pending[0], flows[pending[0]], compiled[pending[0]], runtime)
+        elif pending:
+            results.update(_run_tab_batch(pending, flows, compiled, runtime))
+        if stop_on_fail and any(r["exit_code"] != 0 for r in results.values()):
+            stop.set()
+        return results
+
+    finished: Dict[int, Dict[str, Any]] = {}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="browser") as executor:
+        for batch_results in executor.map(task, batches):
+            finished.update(batch_results)
+    return [finished[index] for index in sorted(finished)]
+
+
+def run_suite(
+    suite: Dict[str, Any],
+    cli: argparse.Namespace,
+    compiled: Optional[List[Union[List[CompiledStep], ValueError]]] = None,
+) -> List[Dict[str, Any]]:
+
+    flows, compiled, runtime = prepare_suite(suite, cli, compiled=compiled)
+    workers = max(1, int(getattr(cli, "workers", 1) or 1))
+    tabs_per_browser = max(1, int(getattr(cli, "tabs_per_browser", 1) or 1))
+
+    try:
+        if tabs_per_browser > 1:
+            return _run_suite_tabs(flows, compiled, runtime, workers, tabs_per_browser, cli.stop_on_fail)
+        if workers > 1:
+            return _run_suite_parallel(flows, compiled, runtime, workers, cli.stop_on_fail)
+
+        results: List[Dict[str, Any]] = []
+        for index, flow, steps in iter_instances(flows, compiled):
+            result = _run_flow(index, flow, steps, runtime)
+            results.append(result)
+
+            if cli.stop_on_fail and result["exit_code"] != 0:
+                break
+
+        return results
+    finally:
+        runtime.close()
+
+
+def run_daemon(
+    suite: Dict[str, Any],
+    cli: argparse.Namespace,
+    compiled: Optional[List[Union[List[CompiledStep], ValueError]]] = None,
+    stop: Optional[threading.Event] = None,
+) -> None:
+    """Run every flow on its interval/cron schedule until SIGINT/SIGTERM or `stop`.
+
+    Schedules are validated before anything starts. Drivers are always
+    pooled and the OCR engine is loaded once, so both stay warm between runs.
+    """
+
+    flows, compiled, runtime = prepare_suite(suite, cli, use_checkpoint=False, compiled=compiled)
+    try:
+        # matrix/dataset flow 在启动时展开一次，每个实例按各自的周期调度
+        flows, compiled = _materialize_instances(flows, compiled)
+        schedules = build_schedules(flows, suite, float(getattr(cli, "interval", None) or 300))
+        workers = max(1, int(getattr(cli, "workers", 1) or 1))
+
+        # 常驻模式下总是复用浏览器
+        if runtime.pool is None:
+            runtime.pool = WebDriverPool(max_uses=int(getattr(cli, "driver_max_uses", 50)), max_idle_per_key=workers)
+
+        # 包含 OCR 动作时提前加载 OCR 引擎，之后每次运行直接复用
+        if OCR_AVAILABLE and uses_ocr(compiled):
+            from selenium_ocr import get_ocr_engine
+            get_ocr_engine()
+
+        run_scheduler(
+            schedules,
+            lambda index: _run_flow(index, flows[index], compiled[index], runtime),
+            [_flow_name(index, flow) for index, flow in enumerate(flows)],
+            workers,
+            stop,
+        )
+    finally:
+        runtime.close()
 
 
 def write_report(path: str, results: List[Dict[str, Any]]) -> None:
@@ -366,9 +1028,12 @@ def write_report(path: str, results: List[Dict[str, Any]]) -> None:
         "total": len(results),
         "summary": {
             "pass": sum(1 for r in results if r["exit_code"] == 0),
+            "resumed": sum(1 for r in results if r.get("resumed")),
             "error_found": sum(1 for r in results if r["exit_code"] == 1),
             "failures": sum(1 for r in results if r["exit_code"] not in (0, 1)),
+            "perf_budget_exceeded": sum(1 for r in results if r["exit_code"] == 5),
         },
+        "timing": summarize_suite_timing(results),
         "results": results,
     }
     with open(path, "w", encoding="utf-8") as f:
@@ -378,8 +1043,32 @@ def write_report(path: str, results: List[Dict[str, Any]]) -> None:
 def main() -> None:
 
     args = parse_args()
-    suite = load_suite(args.suite)
-    results = run_suite(suite, args)
+    if args.rebuild_report:
+        results = read_jsonl_results(args.rebuild_report)
+        write_report(args.output, results)
+        sys.exit(1 if any(r["exit_code"] != 0 for r in results) else 0)
+
+    try:
+        suite, compiled = load_compiled_suite(args.suite, args)
+    except (OSError, ValueError) as err:
+        print(err, file=sys.stderr)
+        sys.exit(2)
+    problems = check_suite(suite, args, compiled, schedules=args.check or args.daemon)
+    for problem in problems:
+        print(f"{args.suite}: {problem}", file=sys.stderr)
+    if args.check:
+        sys.exit(1 if problems or any(isinstance(steps, ValueError) for steps in compiled) else 0)
+    if problems:
+        sys.exit(2)
+
+    try:
+        if args.daemon:
+            run_daemon(suite, args, compiled)
+            sys.exit(0)
+        results = run_suite(suite, args, compiled)
+    except (OSError, ValueError) as err:
+        print(err, file=sys.stderr)
+        sys.exit(2)
     write_report(args.output, results)
     if any(r["exit_code"] != 0 for r in results):
         sys.exit(1)
@@ -0,0 +1,149 @@
+"""
+数据驱动的 flow 展开
+flow 可以声明参数矩阵和/或外部数据集，运行时按需展开为多个 flow 实例，
+所有实例共用同一份编译好的步骤，只有 variables 不同：
+
+    "matrix": {"base": ["https://a.example", "https://b.example"],
+               "account": [{"username": "u1", "password": "p1"}, {"username": "u2", "password": "p2"}]}
+    "dataset": "accounts.csv"          每行一个实例（也支持 .jsonl / .json），与 matrix 同时存在时取笛卡尔积
+    "instance_name": "${base} ${username}"   实例名称模板，默认为 "<name>#<序号>"
+
+matrix 的取值为对象时，对象中的每个字段都作为变量（适合成组的用户名/密码）。
+展开通过生成器完成，数据集逐行读取，不会一次性生成全部实例。
+"""
+
+import csv
+import itertools
+import json
+import os
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from selenium_check import compile_template
+
+
+_EXPANSION_KEYS = ("matrix", "dataset", "instance_name")
+
+
+def is_parameterized(flow: Dict[str, Any]) -> bool:
+    return bool(flow.get("matrix") or flow.get("dataset"))
+
+
+def _matrix_axes(matrix: Any) -> List[List[Dict[str, Any]]]:
+    """把 matrix 规范化为每个维度的取值列表，每个取值是一组变量"""
+    if not isinstance(matrix, dict) or not matrix:
+        raise ValueError("'matrix' must be a non-empty object of value lists")
+    axes: List[List[Dict[str, Any]]] = []
+    for key, values in matrix.items():
+        if not isinstance(values, list) or not values:
+            raise ValueError(f"matrix '{key}' must be a non-empty list")
+        axes.append([dict(value) if isinstance(value, dict) else {key: value} for value in values])
+    return axes
+
+
+def _matrix_combinations(axes: List[List[Dict[str, Any]]]) -> Iterator[Dict[str, Any]]:
+    for combination in itertools.product(*axes):
+        params: Dict[str, Any] = {}
+        for part in combination:
+            params.update(part)
+        yield params
+
+
+def iter_dataset(path: str) -> Iterator[Dict[str, Any]]:
+    """逐行读取数据集，每行返回一组变量
+
+    Raises:
+        ValueError: 不支持的文件类型或某一行格式错误（包含行号）
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            yield from csv.DictReader(f)
+    elif ext in (".jsonl", ".ndjson"):
+        with open(path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as err:
+                    raise ValueError(f"{path}:{line_no}: invalid JSON: {err}") from err
+                if not isinstance(row, dict):
+                    raise ValueError(f"{path}:{line_no}: each line must be a JSON object")
+                yield row
+    elif ext == ".json":
+        with open(path, "r", encoding="utf-8") as f:
+            rows = json.load(f)
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ValueError(f"{path}: dataset must be an array of objects")
+        yield from rows
+    else:
+        raise ValueError(f"Unsupported dataset type: {path} (expected .csv, .jsonl or .json)")
+
+
+def parameter_names(flow: Dict[str, Any]) -> Set[str]:
+    """返回展开时会提供的变量名，用于编译时检查 ${var} 引用
+
+    数据集只读取表头（CSV）或第一条记录（JSON/JSONL）。
+
+    Raises:
+        ValueError: matrix 格式错误、数据集不存在或格式错误
+    """
+    names: Set[str] = set()
+    if flow.get("matrix"):
+        for axis in _matrix_axes(flow["matrix"]):
+            for params in axis:
+                names.update(params)
+    dataset = flow.get("dataset")
+    if dataset:
+        if not os.path.exists(dataset):
+            raise ValueError(f"Dataset not found: {dataset}")
+        first = next(iter_dataset(dataset), None)
+        if first is None:
+            raise ValueError(f"Dataset is empty: {dataset}")
+        names.update(first)
+    return names
+
+
+def compile_view(flow: Dict[str, Any]) -> Dict[str, Any]:
+    """返回用于编译检查的 flow：展开参数以占位值加入 variables"""
+    if not is_parameterized(flow):
+        return flow
+    variables = {name: "" for name in parameter_names(flow)}
+    variables.update(flow.get("variables") or {})
+    return dict(flow, variables=variables)
+
+
+def expand_flow(flow: Dict[str, Any], default_name: str = "flow") -> Iterator[Dict[str, Any]]:
+    """把带 matrix/dataset 的 flow 展开为实例，普通 flow 原样产出一次
+
+    实例是一个新的 flow 对象：合并后的 variables、实例名称，以及
+    "instance_of"（原 flow 名称）和 "instance"（从 1 开始的序号）。
+
+    Args:
+        flow: flow 配置
+        default_name: flow 未设置 name 时使用的名称
+    """
+    if not is_parameterized(flow):
+        yield flow
+        return
+
+    base = {key: value for key, value in flow.items() if key not in _EXPANSION_KEYS}
+    variables = dict(flow.get("variables") or {})
+    name = flow.get("name") or default_name
+    name_template = compile_template(flow["instance_name"]) if flow.get("instance_name") else None
+    axes: Optional[List[List[Dict[str, Any]]]] = _matrix_axes(flow["matrix"]) if flow.get("matrix") else None
+
+    if flow.get("dataset"):
+        rows: Iterator[Dict[str, Any]] = (
+            {**row, **combination}
+            for row in iter_dataset(flow["dataset"])
+            for combination in (_matrix_combinations(axes) if axes else ({},))
+        )
+    else:
+        rows = _matrix_combinations(axes or [])
+
+    for number, params in enumerate(rows, 1):
+        instance_variables = {**variables, **params}
+        instance = dict(base, variables=instance_variables, instance_of=name, instance=number)
+        instance["name"] = name_template.render(instance_variables) if name_template else f"{name}#{number}"
+        yield instance
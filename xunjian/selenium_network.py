@@ -0,0 +1,213 @@
+"""
+网络请求采集
+启用 network_capture 的浏览器会打开 Chrome 性能日志（goog:loggingPrefs），
+其中包含 CDP Network 事件。NetworkCapture 增量读取这些事件，按标签页分发到各 flow 的
+NetworkLog 中，每个请求只保留 URL、方法、类型、状态码、耗时和传输字节数。
+
+用于 assert_no_5xx / assert_api_latency 断言，以及报告中每个 flow 的网络摘要。
+"""
+
+import fnmatch
+import json
+import re
+import threading
+from typing import Any, Dict, List, Optional
+
+from selenium.common.exceptions import WebDriverException
+
+
+# 使用网络采集的动作；flow 中出现时自动为其浏览器启用采集
+NETWORK_ACTIONS = ("assert_no_5xx", "assert_api_latency")
+
+# 只解析需要的事件，dataReceived 等高频事件在 json.loads 之前就被跳过
+_WANTED_METHOD = re.compile(
+    r'"method"\s*:\s*"Network\.(requestWillBeSent|responseReceived|loadingFinished|loadingFailed)"'
+)
+
+# 报告中每个 flow 最多列出的错误请求和最慢请求数量
+_REPORT_LIMIT = 10
+
+
+class RequestRecord:
+    """单个请求的精简记录，时间为浏览器单调时钟（秒）"""
+
+    __slots__ = ("url", "method", "resource_type", "status", "started", "finished", "bytes", "error")
+
+    def __init__(self, url: str, method: str, resource_type: str, started: float):
+        self.url = url
+        self.method = method
+        self.resource_type = resource_type
+        self.status: Optional[int] = None
+        self.started = started
+        self.finished: Optional[float] = None
+        self.bytes = 0
+        self.error: Optional[str] = None
+
+    @property
+    def done(self) -> bool:
+        return self.finished is not None
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.finished is None:
+            return None
+        return round((self.finished - self.started) * 1000.0, 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        entry: Dict[str, Any] = {"url": self.url, "type": self.resource_type, "duration_ms": self.duration_ms}
+        if self.status is not None:
+            entry["status"] = self.status
+        if self.error:
+            entry["error"] = self.error
+        return entry
+
+
+def url_matches(url: str, pattern: Optional[str]) -> bool:
+    """pattern 含 * 或 ? 时按通配符匹配整个 URL，否则按子串匹配"""
+    if not pattern:
+        return True
+    if "*" in pattern or "?" in pattern:
+        return fnmatch.fnmatchcase(url, pattern)
+    return pattern in url
+
+
+class NetworkLog:
+    """一个 flow 的请求记录"""
+
+    def __init__(self, capture: "NetworkCapture", max_requests: int = 5000):
+        self._capture = capture
+        self.max_requests = max_requests
+        self.records: Dict[str, RequestRecord] = {}
+        # 超过 max_requests 后不再记录的请求数量
+        self.dropped = 0
+
+    def refresh(self) -> None:
+        """读取浏览器中尚未处理的网络事件"""
+        self._capture.poll()
+
+    def close(self) -> None:
+        """读取剩余事件并停止记录"""
+        self._capture.stop(self)
+
+    def requests(self, url_pattern: Optional[str] = None) -> List[RequestRecord]:
+        return [r for r in self.records.values() if url_matches(r.url, url_pattern)]
+
+    def handle(self, method: str, params: Dict[str, Any]) -> None:
+        request_id = params.get("requestId")
+        if method == "requestWillBeSent":
+            request = params.get("request") or {}
+            url = request.get("url", "")
+            if url.startswith("data:"):
+                return
+            record = self.records.get(request_id)
+            if record is not None:
+                # 重定向沿用同一个 requestId：保留开始时间，记录最终 URL
+                record.url = url
+                return
+            if len(self.records) >= self.max_requests:
+                self.dropped += 1
+                return
+            self.records[request_id] = RequestRecord(
+                url, request.get("method", "GET"), params.get("type", "Other"), float(params.get("timestamp", 0))
+            )
+            return
+        record = self.records.get(request_id)
+        if record is None:
+            return
+        if method == "responseReceived":
+            record.status = int((params.get("response") or {}).get("status", 0)) or None
+        elif method == "loadingFinished":
+            record.finished = float(params.get("timestamp", record.started))
+            record.bytes = int(params.get("encodedDataLength", 0))
+        elif method == "loadingFailed":
+            record.finished = float(params.get("timestamp", record.started))
+            record.error = params.get("errorText") or "failed"
+            if params.get("canceled"):
+                record.error = "canceled"
+
+    def summary(self) -> Dict[str, Any]:
+        """报告用的网络摘要：按状态码分类的数量、总字节数、错误请求和最慢的请求"""
+        by_status: Dict[str, int] = {}
+        errors: List[RequestRecord] = []
+        total_bytes = 0
+        for record in self.records.values():
+            total_bytes += record.bytes
+            if record.error and record.error != "canceled":
+                by_status["failed"] = by_status.get("failed", 0) + 1
+                errors.append(record)
+            elif record.status is not None:
+                bucket = f"{record.status // 100}xx"
+                by_status[bucket] = by_status.get(bucket, 0) + 1
+                if record.status >= 500:
+                    errors.append(record)
+        finished = sorted((r for r in self.records.values() if r.done), key=lambda r: r.finished - r.started, reverse=True)
+        summary: Dict[str, Any] = {
+            "requests": len(self.records),
+            "bytes": total_bytes,
+            "by_status": dict(sorted(by_status.items())),
+            "errors": [r.to_dict() for r in errors[:_REPORT_LIMIT]],
+            "slowest": [r.to_dict() for r in finished[:_REPORT_LIMIT]],
+        }
+        if self.dropped:
+            summary["dropped"] = self.dropped
+        return summary
+
+
+class NetworkCapture:
+    """读取一个浏览器的性能日志，把网络事件分发给各标签页的 NetworkLog
+
+    多标签页模式下按事件所属的标签页（webview，即 CDP targetId）分发；
+    用 start() 不带 webview 注册的记录接收所有未单独注册的标签页的事件。
+    """
+
+    def __init__(self, driver):
+        self._driver = driver
+        self._logs: Dict[Optional[str], NetworkLog] = {}
+        self._lock = threading.Lock()
+
+    def start(self, webview: Optional[str] = None) -> NetworkLog:
+        """开始记录一个 flow 的请求；之前残留的事件先分发给已注册的记录或丢弃"""
+        self.poll()
+        log = NetworkLog(self)
+        with self._lock:
+            self._logs[webview] = log
+        return log
+
+    def stop(self, log: NetworkLog) -> None:
+        """读取剩余事件后注销记录"""
+        self.poll()
+        with self._lock:
+            for key, value in list(self._logs.items()):
+                if value is log:
+                    del self._logs[key]
+
+    def poll(self) -> None:
+        # get_log 返回上次读取之后的全部条目；多个标签页共享一个浏览器时由锁保证不重复分发
+        with self._lock:
+            try:
+                entries = self._driver.get_log("performance")
+            except WebDriverException:
+                return
+            default = self._logs.get(None)
+            for entry in entries:
+                raw = entry.get("message", "")
+                if _WANTED_METHOD.search(raw) is None:
+                    continue
+                try:
+                    message = json.loads(raw)
+                except ValueError:
+                    continue
+                log = self._logs.get(message.get("webview"), default)
+                event = message.get("message") or {}
+                if log is not None and event.get("method", "").startswith("Network."):
+                    log.handle(event["method"][len("Network."):], event.get("params") or {})
+
+
+def network_capture(driver) -> Optional[NetworkCapture]:
+    """返回浏览器的网络采集器；启动时没有启用 network_capture 的浏览器返回 None"""
+    return getattr(driver, "_xunjian_network", None)
+
+
+def flow_uses_network(flow: Dict[str, Any]) -> bool:
+    steps = flow.get("steps")
+    return isinstance(steps, list) and any(isinstance(s, dict) and s.get("action") in NETWORK_ACTIONS for s in steps)
@@ -7,68 +7,326 @@ Selenium OCR 模块
 - 需要安装 Tesseract OCR 引擎
 """
 
+from __future__ import annotations
+
 import base64
-import io
+import importlib.util
+import os
 import re
-import time
-from typing import Optional
+import shlex
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
 
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
 from selenium_check import _resolve_locator
 
-# OCR imports with availability check
-try:
-    import cv2
-    import numpy as np
-    from PIL import Image
-    import pytesseract
-    OCR_AVAILABLE = True
-except ImportError:
-    OCR_AVAILABLE = False
+# cv2/numpy/PIL/pytesseract 导入耗时数百毫秒、占用数十 MB 内存，
+# 模块加载时只检查是否已安装，真正用到 OCR 时才由 load_ocr_stack 导入
+cv2 = None
+np = None
+Image = None
+pytesseract = None
+
+_OCR_MODULES = ("cv2", "numpy", "PIL", "pytesseract")
+
+
+def _module_installed(name: str) -> bool:
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+OCR_AVAILABLE = all(_module_installed(name) for name in _OCR_MODULES)
+
+# 可选：tesserocr 直接调用 Tesseract C API，引擎常驻内存，无需每次启动子进程
+TESSEROCR_AVAILABLE = _module_installed("tesserocr")
+
+_stack_loaded = False
+_stack_lock = threading.Lock()
 
 
 def is_ocr_available() -> bool:
-    """检查OCR依赖是否可用"""
+    """检查OCR依赖是否已安装（不导入依赖本身）"""
     return OCR_AVAILABLE
 
 
+def load_ocr_stack() -> None:
+    """导入 OCR 依赖，进程内只导入一次
+
+    Raises:
+        RuntimeError: 依赖缺失或导入失败时
+    """
+    global cv2, np, Image, pytesseract, _MORPH_KERNEL, _stack_loaded
+    if _stack_loaded:
+        return
+    with _stack_lock:
+        if _stack_loaded:
+            return
+        try:
+            import cv2 as _cv2
+            import numpy as _np
+            from PIL import Image as _Image
+            import pytesseract as _pytesseract
+        except ImportError as e:
+            raise RuntimeError(f"{get_ocr_dependencies_error()} ({e})") from e
+        cv2, np, Image, pytesseract = _cv2, _np, _Image, _pytesseract
+        _MORPH_KERNEL = np.ones((2, 2), np.uint8)
+        _stack_loaded = True
+
+
 def get_ocr_dependencies_error() -> str:
     """获取OCR依赖缺失的错误信息"""
     return "OCR libraries not available. Install: pip install pillow pytesseract opencv-python numpy"
 
 
+def _to_gray(img_cv: np.ndarray) -> np.ndarray:
+    if img_cv.ndim == 2:
+        return img_cv
+    if img_cv.shape[2] == 4:
+        return cv2.cvtColor(img_cv, cv2.COLOR_BGRA2GRAY)
+    return cv2.cvtColor(img_cv, cv2.COLOR_BGR2GRAY)
+
+
+def _otsu(gray: np.ndarray) -> np.ndarray:
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return binary
+
+
+# 由 load_ocr_stack 初始化
+_MORPH_KERNEL = None
+
+PREPROCESSORS = {
+    # 灰度处理
+    "grayscale": _to_gray,
+    # Otsu 二值化
+    "binary": lambda img: _otsu(_to_gray(img)),
+    # 去噪处理
+    "denoise": lambda img: cv2.fastNlMeansDenoising(_to_gray(img)),
+    # 二值化后膨胀背景，去掉细小干扰线（白底黑字时笔画变细）
+    "dilate": lambda img: cv2.dilate(_otsu(_to_gray(img)), _MORPH_KERNEL, iterations=1),
+    # 二值化后腐蚀背景，加粗断裂笔画
+    "erode": lambda img: cv2.erode(_otsu(_to_gray(img)), _MORPH_KERNEL, iterations=1),
+    # 放大两倍后二值化，小尺寸验证码识别率更高
+    "upscale": lambda img: _otsu(cv2.resize(_to_gray(img), None, fx=2, fy=2, interpolation=cv2.INTER_CUBIC)),
+}
+
+# ensemble 模式默认并行运行的预处理方式
+ENSEMBLE_VARIANTS: Tuple[str, ...] = ("grayscale", "binary", "denoise", "dilate", "erode", "upscale")
+
+# ocr_ensemble 的投票方式
+VOTE_MODES: Tuple[str, ...] = ("majority", "confidence")
+
+
+def validate_preprocessing(preprocessing: Any) -> None:
+    """检查 ocr_captcha 的 preprocessing：预处理方式名称、"default"、"ensemble" 或预处理方式列表
+
+    Raises:
+        ValueError: 未知的预处理方式或类型错误
+    """
+    if isinstance(preprocessing, str):
+        if preprocessing not in ("default", "ensemble") and preprocessing not in PREPROCESSORS:
+            raise ValueError(
+                f"Unknown preprocessing: {preprocessing} (expected default, ensemble, {', '.join(PREPROCESSORS)} or a list)"
+            )
+        return
+    if not isinstance(preprocessing, list) or not preprocessing:
+        raise ValueError(f"preprocessing must be a string or a non-empty list, got {preprocessing!r}")
+    unknown = [p for p in preprocessing if not isinstance(p, str) or p not in PREPROCESSORS]
+    if unknown:
+        raise ValueError(f"Unknown preprocessing variants: {unknown} (expected {', '.join(PREPROCESSORS)})")
+
+
 def preprocess_image(img_cv: np.ndarray, preprocessing: str = "default") -> np.ndarray:
     """图像预处理
     
     Args:
         img_cv: OpenCV格式的图像数组
-        preprocessing: 预处理方式 ("default", "binary", "grayscale", "denoise")
+        preprocessing: 预处理方式 ("default", "grayscale", "binary", "denoise", "dilate", "erode", "upscale")
         
     Returns:
-        np.ndarray: 预处理后的图像
+        np.ndarray: 预处理后的图像，"default" 原样返回
     """
-    # if preprocessing == "binary":
-    #     # 二值化处理
-    #     gray = cv2.cvtColor(img_cv, cv2.COLOR_BGR2GRAY)
-    #     _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-    #     return binary
-    # elif preprocessing == "grayscale":
-    #     # 灰度处理
-    #     return cv2.cvtColor(img_cv, cv2.COLOR_BGR2GRAY)
-    # elif preprocessing == "denoise":
-    #     # 去噪处理
-    #     gray = cv2.cvtColor(img_cv, cv2.COLOR_BGR2GRAY)
-    #     return cv2.fastNlMeansDenoising(gray)
-    # else:
-    #     # 默认处理：转灰度
-    #     return cv2.cvtColor(img_cv, cv2.COLOR_BGR2GRAY)
-    return img_cv
+    if preprocessing == "default":
+        return img_cv
+    load_ocr_stack()
+    try:
+        return PREPROCESSORS[preprocessing](img_cv)
+    except KeyError:
+        raise ValueError(f"Unknown preprocessing: {preprocessing}")
+
+
+DEFAULT_OCR_CONFIG = '--oem 3 --psm 8 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+
+
+class OcrResult(NamedTuple):
+    """OCR 识别结果，confidence 为 0-100，未知时为 -1"""
+    text: str
+    confidence: float
+
+
+def _parse_tesseract_config(config: str) -> Tuple[Optional[int], Optional[int], Dict[str, str]]:
+    """解析 pytesseract 风格的配置字符串，返回 (oem, psm, 变量)"""
+    oem: Optional[int] = None
+    psm: Optional[int] = None
+    variables: Dict[str, str] = {}
+    tokens = shlex.split(config or "")
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token in ("--oem", "--psm") and i + 1 < len(tokens):
+            if token == "--oem":
+                oem = int(tokens[i + 1])
+            else:
+                psm = int(tokens[i + 1])
+            i += 2
+            continue
+        if token == "-c" and i + 1 < len(tokens) and "=" in tokens[i + 1]:
+            key, value = tokens[i + 1].split("=", 1)
+            variables[key] = value
+            i += 2
+            continue
+        i += 1
+    return oem, psm, variables
+
+
+class OcrEngine:
+    """OCR 后端基类"""
+
+    name = "base"
+
+    def recognize(self, img_cv: np.ndarray, config: Optional[str] = None) -> OcrResult:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class PytesseractEngine(OcrEngine):
+    """pytesseract 后端：每次识别写临时文件并启动一个 tesseract 子进程"""
+
+    name = "pytesseract"
+
+    def __init__(self):
+        load_ocr_stack()
+
+    def recognize(self, img_cv: np.ndarray, config: Optional[str] = None) -> OcrResult:
+        text = pytesseract.image_to_string(img_cv, config=config or DEFAULT_OCR_CONFIG)
+        return OcrResult(text, -1.0)
+
+
+class TesserocrEngine(OcrEngine):
+    """tesserocr 后端：每个线程持有常驻的 PyTessBaseAPI，跨 flow 复用
+
+    PyTessBaseAPI 不是线程安全的，因此按线程以及 (oem, psm) 分别缓存实例。
+    """
+
+    name = "tesserocr"
+
+    def __init__(self, lang: str = "eng"):
+        if not TESSEROCR_AVAILABLE:
+            raise RuntimeError("tesserocr is not installed. Install: pip install tesserocr")
+        load_ocr_stack()
+        import tesserocr
+        self._tesserocr = tesserocr
+        self.lang = lang
+        self._local = threading.local()
+        self._all_apis = []
+        self._lock = threading.Lock()
+
+    def _api(self, oem: Optional[int], psm: Optional[int]):
+        apis = getattr(self._local, "apis", None)
+        if apis is None:
+            apis = self._local.apis = {}
+        key = (oem, psm)
+        api = apis.get(key)
+        if api is None:
+            kwargs: Dict[str, Any] = {"lang": self.lang}
+            # tesserocr 的 OEM/PSM 是不能实例化的常量类，直接传入整数值
+            if oem is not None:
+                kwargs["oem"] = oem
+            if psm is not None:
+                kwargs["psm"] = psm
+            api = apis[key] = self._tesserocr.PyTessBaseAPI(**kwargs)
+            with self._lock:
+                self._all_apis.append(api)
+        return api
+
+    def recognize(self, img_cv: np.ndarray, config: Optional[str] = None) -> OcrResult:
+        oem, psm, variables = _parse_tesseract_config(config or DEFAULT_OCR_CONFIG)
+        api = self._api(oem, psm)
+        for key, value in variables.items():
+            api.SetVariable(key, value)
+        if img_cv.ndim == 3:
+            img_cv = cv2.cvtColor(img_cv, cv2.COLOR_BGR2RGB)
+        api.SetImage(Image.fromarray(img_cv))
+        text = api.GetUTF8Text()
+        confidence = float(api.MeanTextConf())
+        # 清除本次设置的变量，避免影响同一线程的下一次调用
+        for key in variables:
+            api.SetVariable(key, "")
+        return OcrResult(text, confidence)
+
+    def close(self) -> None:
+        with self._lock:
+            apis, self._all_apis = self._all_apis, []
+        for api in apis:
+            try:
+                api.End()
+            except Exception:
+                pass
+
+
+OCR_ENGINES = {
+    PytesseractEngine.name: PytesseractEngine,
+    TesserocrEngine.name: TesserocrEngine,
+}
+
+_engine: Optional[OcrEngine] = None
+_engine_lock = threading.Lock()
+
+
+def configure_ocr_engine(name: Optional[str] = None) -> OcrEngine:
+    """选择并加载 OCR 后端，进程内只加载一次
+
+    Args:
+        name: "pytesseract"、"tesserocr" 或 "auto"（默认，优先 tesserocr），
+              未指定时读取环境变量 XUNJIAN_OCR_ENGINE
+    """
+    global _engine
+    name = name or os.environ.get("XUNJIAN_OCR_ENGINE") or "auto"
+    if name == "auto":
+        name = TesserocrEngine.name if TESSEROCR_AVAILABLE else PytesseractEngine.name
+    if name not in OCR_ENGINES:
+        raise ValueError(f"Unknown OCR engine: {name}")
+    with _engine_lock:
+        if _engine is None or _engine.name != name:
+            if _engine is not None:
+                _engine.close()
+            _engine = OCR_ENGINES[name]()
+        return _engine
+
+
+def get_ocr_engine() -> OcrEngine:
+    """返回当前 OCR 后端，首次调用时按默认规则加载"""
+    engine = _engine
+    if engine is None:
+        engine = configure_ocr_engine()
+    return engine
+
+
+def _clean_text(text: str) -> str:
+    # 清理结果，只保留字母和数字
+    return re.sub(r'[^a-zA-Z0-9]', '', text.strip())
 
 
 def ocr_recognize_text(img_cv: np.ndarray, config: Optional[str] = None) -> str:
-    """使用pytesseract识别图像中的文本
+    """使用当前 OCR 后端识别图像中的文本
     
     Args:
         img_cv: OpenCV格式的图像数组
@@ -77,16 +335,121 @@ def ocr_recognize_text(img_cv: np.ndarray, config: Optional[str] = None) -> str:
     Returns:
         str: 识别出的文本
     """
-    if config is None:
-        config = '--oem 3 --psm 8 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+    return _clean_text(get_ocr_engine().recognize(img_cv, config).text)
+
+
+_ensemble_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_ensemble_executor() -> ThreadPoolExecutor:
+    # OpenCV 与 Tesseract 在计算时会释放 GIL，线程池即可并行
+    global _ensemble_executor
+    with _engine_lock:
+        if _ensemble_executor is None:
+            _ensemble_executor = ThreadPoolExecutor(
+                max_workers=min(len(ENSEMBLE_VARIANTS), os.cpu_count() or 1),
+                thread_name_prefix="ocr",
+            )
+        return _ensemble_executor
+
+
+def ocr_ensemble(img_cv: np.ndarray, variants: Sequence[str] = ENSEMBLE_VARIANTS,
+                 config: Optional[str] = None, vote: str = "majority") -> str:
+    """对同一张图片并行运行多种预处理并投票选出识别结果
     
-    result = pytesseract.image_to_string(img_cv, config=config)
-    # 清理结果，只保留字母和数字
-    return re.sub(r'[^a-zA-Z0-9]', '', result.strip())
+    Args:
+        img_cv: OpenCV格式的图像数组
+        variants: 参与投票的预处理方式
+        config: pytesseract配置字符串
+        vote: "majority"（多数票，平票按置信度）或 "confidence"（直接取置信度最高）
+        
+    Returns:
+        str: 投票选出的文本，全部识别失败时返回空字符串
+    """
+    engine = get_ocr_engine()
 
+    def run(variant: str) -> OcrResult:
+        result = engine.recognize(preprocess_image(img_cv, variant), config)
+        return OcrResult(_clean_text(result.text), result.confidence)
 
-def extract_captcha_image(driver, captcha_selector: str, timeout: int = 10) -> Image.Image:
-    """从网页元素提取验证码图片
+    results: List[Tuple[str, OcrResult]] = list(zip(variants, _get_ensemble_executor().map(run, variants)))
+    candidates = [(variant, r) for variant, r in results if r.text]
+    if not candidates:
+        return ""
+
+    votes = Counter(r.text for _, r in candidates)
+    best_conf: Dict[str, float] = {}
+    for _, r in candidates:
+        best_conf[r.text] = max(best_conf.get(r.text, -1.0), r.confidence)
+    if vote == "confidence":
+        key = lambda text: (best_conf[text], votes[text])
+    else:
+        key = lambda text: (votes[text], best_conf[text])
+    # max 在完全相同时保留先出现的文本，即 variants 中靠前的预处理方式
+    winner = max(votes, key=key)
+    print("OCR 投票: " + ", ".join(f"{v}={r.text or '-'}" for v, r in results) + f" -> {winner}")
+    return winner
+
+
+# 把 <img> 绘制到 canvas 上并直接返回 RGBA 原始像素（base64），不经过 PNG 编解码。
+# 跨域图片会污染 canvas，此时返回 null 由调用方回退到元素截图。
+_CANVAS_CAPTURE_SCRIPT = """
+var img = arguments[0];
+if (!img || img.tagName !== "IMG" || !img.complete || !img.naturalWidth) return null;
+var w = img.naturalWidth, h = img.naturalHeight;
+var canvas = document.createElement("canvas");
+canvas.width = w;
+canvas.height = h;
+var ctx = canvas.getContext("2d");
+ctx.drawImage(img, 0, 0);
+var data;
+try { data = ctx.getImageData(0, 0, w, h).data; } catch (e) { return null; }
+var chunks = [], step = 0x8000;
+for (var i = 0; i < data.length; i += step) {
+    chunks.push(String.fromCharCode.apply(null, data.subarray(i, i + step)));
+}
+return [w, h, btoa(chunks.join(""))];
+"""
+
+
+def _flatten_alpha(pixels: np.ndarray, rgba: bool = False) -> np.ndarray:
+    """把 4 通道图像（BGRA，rgba=True 时为 RGBA）合成到白色背景上并返回 BGR
+
+    透明背景的验证码直接丢弃 alpha 时透明像素为黑色，深色文字与背景无法区分；
+    合成到白色背景与截图中看到的效果一致。
+    """
+    color = pixels[:, :, :3]
+    alpha = pixels[:, :, 3:4]
+    if alpha.min() < 255:
+        weight = alpha.astype(np.uint16)
+        color = ((color * weight + 255 * (255 - weight) + 127) // 255).astype(np.uint8)
+    color = np.ascontiguousarray(color)
+    return cv2.cvtColor(color, cv2.COLOR_RGB2BGR) if rgba else color
+
+
+def _decode_image_bytes(data: bytes) -> np.ndarray:
+    img_cv = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+    if img_cv is None:
+        raise ValueError("无法解码验证码图片数据")
+    if img_cv.dtype != np.uint8:
+        img_cv = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if img_cv.ndim == 2:
+        return cv2.cvtColor(img_cv, cv2.COLOR_GRAY2BGR)
+    if img_cv.shape[2] == 4:
+        return _flatten_alpha(img_cv)
+    return img_cv
+
+
+def capture_captcha_array(driver, captcha_selector: str, timeout: int = 10) -> np.ndarray:
+    """从网页元素提取验证码图片，直接返回 OpenCV(BGR) 数组
+    
+    依次尝试：
+    1. src 为 data URI 时直接解码
+    2. 在页面内把 <img> 绘制到 canvas 并返回 RGBA 原始像素，不生成 PNG
+    透明像素合成到白色背景上，与截图效果一致
+    3. 跨域图片（canvas 被污染）或非 <img> 元素时回退为元素截图
+    
+    不会重新请求图片 URL：大多数验证码接口每次请求都会生成新的验证码。
     
     Args:
         driver: WebDriver实例
@@ -94,38 +457,59 @@ def extract_captcha_image(driver, captcha_selector: str, timeout: int = 10) -> I
         timeout: 等待超时时间
         
     Returns:
-        PIL.Image: 验证码图片对象
-        
-    Raises:
-        Exception: 当找不到元素或提取图片失败时
+        np.ndarray: BGR 格式的图像数组
     """
-    # 找到验证码图片元素
+    load_ocr_stack()
     by, value = _resolve_locator(captcha_selector)
     captcha_element = WebDriverWait(driver, timeout).until(
         EC.presence_of_element_located((by, value))
     )
     
-    # 获取图片的base64数据或截图
     img_src = captcha_element.get_attribute("src")
     if img_src and img_src.startswith("data:image"):
         # 处理base64图片
-        img_data = base64.b64decode(img_src.split(",")[1])
-        return Image.open(io.BytesIO(img_data))
-    else:
-        # 截图验证码区域
-        return Image.open(io.BytesIO(captcha_element.screenshot_as_png))
+        return _decode_image_bytes(base64.b64decode(img_src.split(",", 1)[1]))
+    
+    captured = driver.execute_script(_CANVAS_CAPTURE_SCRIPT, captcha_element)
+    if captured:
+        width, height, pixels = captured
+        rgba = np.frombuffer(base64.b64decode(pixels), dtype=np.uint8).reshape(int(height), int(width), 4)
+        return _flatten_alpha(rgba, rgba=True)
+    
+    # 截图验证码区域
+    return _decode_image_bytes(captcha_element.screenshot_as_png)
+
+
+def extract_captcha_image(driver, captcha_selector: str, timeout: int = 10) -> Image.Image:
+    """从网页元素提取验证码图片
+    
+    Args:
+        driver: WebDriver实例
+        captcha_selector: 验证码图片的选择器
+        timeout: 等待超时时间
+        
+    Returns:
+        PIL.Image: 验证码图片对象
+        
+    Raises:
+        Exception: 当找不到元素或提取图片失败时
+    """
+    img_cv = capture_captcha_array(driver, captcha_selector, timeout)
+    return Image.fromarray(cv2.cvtColor(img_cv, cv2.COLOR_BGR2RGB))
 
 
-def ocr_captcha(driver, captcha_selector: str, preprocessing: str = "default", 
-                timeout: int = 10, config: Optional[str] = None) -> str:
-    """使用 pytesseract 识别验证码
+def ocr_captcha(driver, captcha_selector: str, preprocessing: Union[str, Sequence[str]] = "default", 
+                timeout: int = 10, config: Optional[str] = None, vote: str = "majority") -> str:
+    """使用当前 OCR 后端识别验证码
     
     Args:
         driver: WebDriver实例
         captcha_selector: 验证码图片的选择器
-        preprocessing: 图像预处理方式 ("default", "binary", "grayscale", "denoise")
+        preprocessing: 图像预处理方式（见 preprocess_image）；"ensemble" 或预处理方式列表时
+                       并行识别多个变体并投票
         timeout: 等待元素超时时间
         config: pytesseract配置字符串
+        vote: ensemble 模式的投票方式，见 ocr_ensemble
         
     Returns:
         str: 识别出的验证码文本
@@ -137,19 +521,20 @@ def ocr_captcha(driver, captcha_selector: str, preprocessing: str = "default",
         raise RuntimeError(get_ocr_dependencies_error())
     
     try:
-        # 提取验证码图片
-        img = extract_captcha_image(driver, captcha_selector, timeout)
-        
-        # 转换为OpenCV格式
-        img_cv = cv2.cvtColor(np.array(img), cv2.COLOR_RGB2BGR)
+        # 提取验证码图片（直接得到 OpenCV 格式）
+        img_cv = capture_captcha_array(driver, captcha_selector, timeout)
         
-        # 图像预处理
-        processed_img = preprocess_image(img_cv, preprocessing)
-        
-        # OCR识别
-        captcha_text = ocr_recognize_text(processed_img, config)
+        if preprocessing == "ensemble" or not isinstance(preprocessing, str):
+            variants = ENSEMBLE_VARIANTS if preprocessing == "ensemble" else tuple(preprocessing)
+            captcha_text = ocr_ensemble(img_cv, variants, config, vote)
+        else:
+            # 图像预处理
+            processed_img = preprocess_image(img_cv, preprocessing)
+            
+            # OCR识别
+            captcha_text = ocr_recognize_text(processed_img, config)
         
-        print(f"pytesseract 识别验证码: {captcha_text}")
+        print(f"{get_ocr_engine().name} 识别验证码: {captcha_text}")
         return captcha_text
         
     except Exception as e:
@@ -157,9 +542,147 @@ def ocr_captcha(driver, captcha_selector: str, preprocessing: str = "default",
         return ""
 
 
+# 一次往返读取判定验证码结果所需的页面状态
+_OUTCOME_PROBE_SCRIPT = """
+function find(by, sel) {
+    if (!sel) return null;
+    try {
+        if (by === "xpath") {
+            return document.evaluate(sel, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        }
+        return document.querySelector(sel);
+    } catch (e) { return null; }
+}
+// 提交前（mark 为 true）给当时已显示的成功/失败元素打标记，之后只有未打标记的元素显示出来才算"出现"：
+// 上一次尝试留下的错误提示不会被当作本次的结果，被新节点替换的提示仍然可以识别
+function appeared(el, mark) {
+    if (!el) return false;
+    var shown = el.getClientRects().length > 0;
+    if (mark) { el.__xunjianShownBefore = shown; return shown; }
+    return shown && !el.__xunjianShownBefore;
+}
+var mark = !!arguments[6];
+var captcha = find(arguments[0], arguments[1]);
+var resources = performance.getEntriesByType("resource"), lastEnd = 0;
+for (var i = 0; i < resources.length; i++) {
+    if (resources[i].responseEnd > lastEnd) lastEnd = resources[i].responseEnd;
+}
+return {
+    url: window.location.href,
+    src: captcha ? captcha.getAttribute("src") : null,
+    success_selector: appeared(find(arguments[2], arguments[3]), mark),
+    failure_selector: appeared(find(arguments[4], arguments[5]), mark),
+    resource_count: resources.length,
+    idle_ms: performance.now() - lastEnd
+};
+"""
+
+# 默认判定条件：跳转即成功，验证码图片刷新即失败
+DEFAULT_SUCCESS_CONDITIONS: Dict[str, Any] = {"url_changes": True}
+DEFAULT_FAILURE_CONDITIONS: Dict[str, Any] = {"captcha_src_changes": True}
+
+
+# 成功/失败条件支持的键
+OUTCOME_CONDITIONS: Tuple[str, ...] = ("url_changes", "selector", "captcha_src_changes", "network_idle")
+
+
+def validate_outcome_conditions(conditions: Any) -> Dict[str, Any]:
+    """检查 solve_captcha 的 success/failure 条件，如 {"selector": ".error", "network_idle": 500}
+
+    Raises:
+        ValueError: 不是对象、未知条件或条件值类型错误
+    """
+    if not isinstance(conditions, dict):
+        raise ValueError(f"must be an object, got {conditions!r}")
+    unknown = [k for k in conditions if k not in OUTCOME_CONDITIONS]
+    if unknown:
+        raise ValueError(f"unknown conditions {unknown} (expected {', '.join(OUTCOME_CONDITIONS)})")
+    for key in ("url_changes", "captcha_src_changes"):
+        if key in conditions and not isinstance(conditions[key], bool):
+            raise ValueError(f"'{key}' must be true or false, got {conditions[key]!r}")
+    if "selector" in conditions and not isinstance(conditions["selector"], str):
+        raise ValueError(f"'selector' must be a string, got {conditions['selector']!r}")
+    idle_ms = conditions.get("network_idle")
+    if idle_ms is not None and (isinstance(idle_ms, bool) or not isinstance(idle_ms, (int, float)) or idle_ms < 0):
+        raise ValueError(f"'network_idle' must be a non-negative number of milliseconds, got {idle_ms!r}")
+    return conditions
+
+
+def _js_locator(selector: Optional[str]):
+    if not selector:
+        return None, None
+    by, value = _resolve_locator(selector)
+    return ("xpath" if by == By.XPATH else "css"), value
+
+
+def _condition_met(conditions: Dict[str, Any], probe: Dict[str, Any], before: Dict[str, Any], kind: str) -> bool:
+    """判断一组条件中是否有任意一个成立"""
+    if conditions.get("url_changes") and probe["url"] != before["url"]:
+        return True
+    if conditions.get("selector") and probe[f"{kind}_selector"]:
+        return True
+    # 图片元素消失（页面已跳转）不算作刷新
+    if conditions.get("captcha_src_changes") and probe["src"] is not None and probe["src"] != before["src"]:
+        return True
+    idle_ms = conditions.get("network_idle")
+    if idle_ms and probe["resource_count"] > before["resource_count"] and probe["idle_ms"] >= float(idle_ms):
+        return True
+    return False
+
+
+def wait_for_captcha_outcome(driver, captcha_selector: str, before: Dict[str, Any],
+                             success: Optional[Dict[str, Any]] = None,
+                             failure: Optional[Dict[str, Any]] = None,
+                             timeout: float = 2.0) -> Optional[str]:
+    """等待提交验证码后的结果，任一条件先成立即返回
+
+    Args:
+        driver: WebDriver实例
+        captcha_selector: 验证码图片选择器
+        before: 提交前由 probe_captcha_state(..., mark=True) 记录的页面状态
+        success: 成功条件，支持 url_changes / selector / captcha_src_changes / network_idle(毫秒)；
+                 selector 在提交后有元素新显示出来时成立，提交前已显示的元素（如上一次的错误提示）不算
+        failure: 失败条件，键同上；失败条件优先判定
+        timeout: 最长等待秒数
+
+    Returns:
+        "success"、"failure"，超时未判定时返回 None
+
+    network_idle 以 Resource Timing 近似：提交后出现过新请求，且最后一个请求结束已超过指定毫秒数。
+    """
+    success = DEFAULT_SUCCESS_CONDITIONS if success is None else success
+    failure = DEFAULT_FAILURE_CONDITIONS if failure is None else failure
+
+    def outcome(_driver):
+        probe = probe_captcha_state(_driver, captcha_selector, success.get("selector"), failure.get("selector"))
+        if _condition_met(failure, probe, before, "failure"):
+            return "failure"
+        if _condition_met(success, probe, before, "success"):
+            return "success"
+        return False
+
+    try:
+        return WebDriverWait(driver, timeout, poll_frequency=0.1).until(outcome)
+    except TimeoutException:
+        return None
+
+
+def probe_captcha_state(driver, captcha_selector: str, success_selector: Optional[str] = None,
+                        failure_selector: Optional[str] = None, mark: bool = False) -> Dict[str, Any]:
+    """读取当前 URL、验证码 src、成功/失败元素是否新出现以及网络空闲情况
+
+    提交前以 mark=True 调用，记录当时已显示的成功/失败元素，之后的探测忽略这些元素。
+    """
+    args = _js_locator(captcha_selector) + _js_locator(success_selector) + _js_locator(failure_selector)
+    return driver.execute_script(_OUTCOME_PROBE_SCRIPT, *args, mark)
+
+
 def solve_simple_captcha(driver, captcha_selector: str, input_selector: str, 
                         submit_selector: Optional[str] = None, max_attempts: int = 3,
-                        preprocessing: str = "default", from_selenium_check=None) -> bool:
+                        preprocessing: str = "default", from_selenium_check=None,
+                        success: Optional[Dict[str, Any]] = None,
+                        failure: Optional[Dict[str, Any]] = None,
+                        outcome_timeout: float = 2.0) -> bool:
     """自动解决简单验证码
     
     Args:
@@ -170,6 +693,9 @@ def solve_simple_captcha(driver, captcha_selector: str, input_selector: str,
         max_attempts: 最大尝试次数
         preprocessing: 图像预处理方式
         from_selenium_check: selenium_check模块的函数引用 (get_body_text, _type, _click)
+        success: 成功条件，见 wait_for_captcha_outcome，默认 URL 变化
+        failure: 失败条件，见 wait_for_captcha_outcome，默认验证码图片刷新
+        outcome_timeout: 提交后等待判定条件的最长秒数
         
     Returns:
         bool: 是否成功解决验证码
@@ -189,20 +715,35 @@ def solve_simple_captcha(driver, captcha_selector: str, input_selector: str,
             
             # 输入验证码
             _type(driver, input_selector, captcha_text, 10)
+
+            # 记录提交前的页面状态（含已显示的成功/失败提示），用于判断提交结果
+            before = probe_captcha_state(
+                driver,
+                captcha_selector,
+                (DEFAULT_SUCCESS_CONDITIONS if success is None else success).get("selector"),
+                (DEFAULT_FAILURE_CONDITIONS if failure is None else failure).get("selector"),
+                mark=True,
+            )
             
             # 如果有提交按钮，点击提交
             if submit_selector:
                 _click(driver, submit_selector, 10)
             
-            # 等待一下看是否成功
-            time.sleep(2)
-            
-            # 检查是否还有验证码错误提示
-            page_text = get_body_text(driver)
-            if "验证码" in page_text and ("错误" in page_text or "invalid" in page_text.lower()):
+            # 等待任一成功/失败条件成立，而不是固定等待
+            outcome = wait_for_captcha_outcome(
+                driver, captcha_selector, before, success, failure, outcome_timeout
+            )
+            if outcome == "failure":
                 print(f"第{attempt + 1}次尝试：验证码错误，重试")
                 continue
             
+            if outcome is None:
+                # 条件均未触发时回退为检查页面上的验证码错误提示
+                page_text = get_body_text(driver)
+                if "验证码" in page_text and ("错误" in page_text or "invalid" in page_text.lower()):
+                    print(f"第{attempt + 1}次尝试：验证码错误，重试")
+                    continue
+            
             print(f"验证码识别成功：{captcha_text}")
             return True
             
@@ -229,6 +770,7 @@ class CaptchaSolver:
         
         if not OCR_AVAILABLE:
             raise RuntimeError(get_ocr_dependencies_error())
+        load_ocr_stack()
     
     def recognize(self, captcha_selector: str, preprocessing: str = "default", 
                   timeout: int = 10, config: Optional[str] = None) -> str:
@@ -237,14 +779,16 @@ class CaptchaSolver:
     
     def solve(self, captcha_selector: str, input_selector: str, 
               submit_selector: Optional[str] = None, max_attempts: int = 3,
-              preprocessing: str = "default") -> bool:
+              preprocessing: str = "default", success: Optional[Dict[str, Any]] = None,
+              failure: Optional[Dict[str, Any]] = None, outcome_timeout: float = 2.0) -> bool:
         """自动解决验证码"""
         if self.selenium_check_funcs is None:
             raise ValueError("需要提供selenium_check模块的函数引用")
         
         return solve_simple_captcha(
             self.driver, captcha_selector, input_selector, submit_selector,
-            max_attempts, preprocessing, self.selenium_check_funcs
+            max_attempts, preprocessing, self.selenium_check_funcs,
+            success, failure, outcome_timeout
         )
     
     def extract_image(self, captcha_selector: str, timeout: int = 10) -> Image.Image:
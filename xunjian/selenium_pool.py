@@ -0,0 +1,183 @@
+"""
+WebDriver 复用池
+避免每个 flow 都冷启动一次 Chrome
+
+驱动按 (headless, chromedriver_path, 浏览器配置) 分组缓存。每次借出时在新的 CDP
+浏览器上下文中打开一个标签页（见 selenium_tabs），归还时连同上下文一起销毁，
+上一个 flow 访问过的所有域名的 cookies、storage 和缓存都不会留给下一个 flow；
+启动时的标签页只作为 CDP 命令的落脚点，始终停在 about:blank。借出前做健康检查，
+超过 max_uses 或会话崩溃的驱动会被直接销毁。
+"""
+
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from selenium.common.exceptions import WebDriverException
+
+from selenium_check import BROWSER_PROFILES, BrowserProfile, _create_webdriver
+from selenium_tabs import IsolatedTab, close_isolated_tab, open_isolated_tab
+
+
+PoolKey = Tuple[bool, Optional[str], BrowserProfile]
+
+
+class _PooledDriver:
+    """池中的一个驱动、使用计数以及当前借用所在的隔离标签页"""
+
+    __slots__ = ("driver", "key", "uses", "home_handle", "tab")
+
+    def __init__(self, driver, key: PoolKey):
+        self.driver = driver
+        self.key = key
+        self.uses = 0
+        self.home_handle = driver.current_window_handle
+        self.tab: Optional[IsolatedTab] = None
+
+
+class WebDriverPool:
+    """线程安全的 WebDriver 池"""
+
+    def __init__(self, max_uses: int = 50, max_idle_per_key: int = 4):
+        """初始化驱动池
+
+        Args:
+            max_uses: 单个驱动最多被借出的次数，达到后销毁重建
+            max_idle_per_key: 每个分组最多保留的空闲驱动数量
+        """
+        self.max_uses = max_uses
+        self.max_idle_per_key = max_idle_per_key
+        self._idle: Dict[PoolKey, List[_PooledDriver]] = defaultdict(list)
+        self._leased: Dict[int, _PooledDriver] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def acquire(self, headless: bool, chromedriver_path: Optional[str] = None,
+                profile: Optional[BrowserProfile] = None, isolate: bool = True):
+        """借出一个健康的驱动，没有空闲驱动时新建
+
+        Args:
+            isolate: 为 True 时驱动已切换到一个新的浏览器上下文中的空白标签页；
+                自行管理隔离标签页的调用方（多标签页模式）传 False，拿到启动时的标签页
+        """
+        profile = profile or BROWSER_PROFILES["full"]
+        key: PoolKey = (bool(headless), chromedriver_path or None, profile)
+        while True:
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError("WebDriverPool is closed")
+                idle = self._idle[key]
+                entry = idle.pop() if idle else None
+            fresh = entry is None
+            if fresh:
+                driver = _create_webdriver(headless=headless, chromedriver_path=chromedriver_path, profile=profile)
+                try:
+                    entry = _PooledDriver(driver, key)
+                except Exception:
+                    self._quit(driver)
+                    raise
+            elif not self._is_healthy(entry.driver):
+                self._quit(entry.driver)
+                continue
+            if isolate:
+                try:
+                    entry.tab = open_isolated_tab(entry.driver, profile.blocked_urls)
+                except Exception:
+                    self._quit(entry.driver)
+                    # 新建的驱动都开不了隔离标签页说明浏览器不支持，直接报错；空闲驱动则换一个
+                    if fresh:
+                        raise
+                    continue
+            entry.uses += 1
+            with self._lock:
+                self._leased[id(entry.driver)] = entry
+            return entry.driver
+
+    def release(self, driver, discard: bool = False) -> None:
+        """归还驱动；discard 为 True 或驱动已失效时直接销毁"""
+        with self._lock:
+            entry = self._leased.pop(id(driver), None)
+        if entry is None:
+            self._quit(driver)
+            return
+
+        if discard or self._closed or entry.uses >= self.max_uses or not self._reset(entry):
+            self._quit(driver)
+            return
+
+        with self._lock:
+            idle = self._idle[entry.key]
+            if not self._closed and len(idle) < self.max_idle_per_key:
+                idle.append(entry)
+                return
+        self._quit(driver)
+
+    @contextmanager
+    def lease(self, headless: bool, chromedriver_path: Optional[str] = None,
+              profile: Optional[BrowserProfile] = None, isolate: bool = True) -> Iterator:
+        """以上下文管理器方式借用驱动，WebDriver 异常时销毁该驱动"""
+        driver = self.acquire(headless, chromedriver_path, profile, isolate=isolate)
+        discard = False
+        try:
+            yield driver
+        except WebDriverException:
+            discard = True
+            raise
+        finally:
+            self.release(driver, discard=discard)
+
+    def close(self) -> None:
+        """关闭池并退出所有驱动"""
+        with self._lock:
+            self._closed = True
+            entries = [e for idle in self._idle.values() for e in idle]
+            entries.extend(self._leased.values())
+            self._idle.clear()
+            self._leased.clear()
+        for entry in entries:
+            self._quit(entry.driver)
+
+    def __enter__(self) -> "WebDriverPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @staticmethod
+    def _is_healthy(driver) -> bool:
+        try:
+            return bool(driver.window_handles)
+        except Exception:
+            return False
+
+    @staticmethod
+    def _reset(entry: _PooledDriver) -> bool:
+        """销毁本次借用的浏览器上下文并回到启动时的标签页，失败则视为驱动不可复用"""
+        driver = entry.driver
+        try:
+            if entry.tab is not None:
+                close_isolated_tab(driver, entry.tab, entry.home_handle)
+                entry.tab = None
+            # 默认上下文中由 flow 打开的窗口（或未借助隔离标签页的借用）也一并清理
+            for handle in driver.window_handles:
+                if handle != entry.home_handle:
+                    driver.switch_to.window(handle)
+                    driver.close()
+            driver.switch_to.window(entry.home_handle)
+            driver.switch_to.default_content()
+            try:
+                driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            except Exception:
+                driver.delete_all_cookies()
+            driver.get("about:blank")
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _quit(driver) -> None:
+        try:
+            driver.quit()
+        except Exception:
+            pass
@@ -0,0 +1,252 @@
+"""
+巡检报告统计与结果输出
+计算单个 flow 以及整个 suite 的耗时分布（p50/p95），用于定位慢巡检和目标站点的性能回退；
+JsonlResultSink 在每个 flow（以及可选的每个步骤）结束时立即追加一行 JSON，
+进程中途崩溃也不会丢失已完成的结果，之后可以用 read_jsonl_results 重建汇总报告；
+SuiteCheckpoint 按 flow 名称和定义哈希记录结果，中断后可以跳过已通过的 flow 继续运行。
+"""
+
+import hashlib
+import json
+import math
+import os
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional
+
+
+def percentile(values: Iterable[float], pct: float) -> Optional[float]:
+    """最近秩法计算百分位数，空序列返回 None"""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = max(1, int(math.ceil(pct / 100.0 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def distribution(values: Iterable[float]) -> Dict[str, Any]:
+    """返回 count / p50 / p95 / max，单位与输入一致"""
+    values = list(values)
+    return {
+        "count": len(values),
+        "p50": _round(percentile(values, 50)),
+        "p95": _round(percentile(values, 95)),
+        "max": _round(max(values) if values else None),
+    }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 1)
+
+
+def summarize_flow_timing(timing: Dict[str, Any]) -> Dict[str, Any]:
+    """为单个 flow 的计时记录补充步骤耗时的 p50/p95"""
+    durations = [s["duration_ms"] for s in timing.get("steps", [])]
+    timing["step_p50_ms"] = _round(percentile(durations, 50))
+    timing["step_p95_ms"] = _round(percentile(durations, 95))
+    return timing
+
+
+def summarize_suite_timing(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """汇总所有 flow 的耗时：flow 总耗时、驱动启动/销毁耗时、按 action 分组的步骤耗时，
+    以及按浏览器配置分组的 goto 耗时和传输字节数（用于对比 lean 与 full 配置）、
+    网络请求摘要和 goto 之后采集的页面性能指标（TTFB、FCP、LCP 等）的分布"""
+    flow_total: List[float] = []
+    driver_create: List[float] = []
+    driver_teardown: List[float] = []
+    by_action: Dict[str, List[float]] = defaultdict(list)
+    goto_ms: Dict[str, List[float]] = defaultdict(list)
+    goto_bytes: Dict[str, List[float]] = defaultdict(list)
+    page_perf: Dict[str, List[float]] = defaultdict(list)
+    for result in results:
+        timing = result.get("timing")
+        if not timing:
+            continue
+        if timing.get("total_ms") is not None:
+            flow_total.append(timing["total_ms"])
+        if timing.get("driver_create_ms") is not None:
+            driver_create.append(timing["driver_create_ms"])
+        if timing.get("driver_teardown_ms") is not None:
+            driver_teardown.append(timing["driver_teardown_ms"])
+        profile = timing.get("browser_profile", "full")
+        for step in timing.get("steps", []):
+            by_action[step["action"]].append(step["duration_ms"])
+            if step["action"] == "goto" and step.get("status") == "ok":
+                goto_ms[profile].append(step["duration_ms"])
+                if step.get("page_bytes") is not None:
+                    goto_bytes[profile].append(step["page_bytes"])
+            if step["action"] == "goto":
+                for metric, value in (step.get("perf") or {}).items():
+                    if value is not None:
+                        page_perf[metric].append(value)
+
+    return {
+        "flow_total_ms": distribution(flow_total),
+        "driver_create_ms": distribution(driver_create),
+        "driver_teardown_ms": distribution(driver_teardown),
+        "by_action_ms": {action: distribution(values) for action, values in sorted(by_action.items())},
+        "goto_by_profile": _summarize_profiles(goto_ms, goto_bytes),
+        "network": _summarize_network(results),
+        "page_performance": {metric: distribution(values) for metric, values in sorted(page_perf.items())},
+    }
+
+
+def _summarize_network(results: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    # 只汇总启用了网络采集的 flow；slowest 为全部 flow 中最慢的请求
+    flows = 0
+    requests = 0
+    total_bytes = 0
+    by_status: Dict[str, int] = defaultdict(int)
+    flows_with_errors: List[str] = []
+    slowest: List[Dict[str, Any]] = []
+    for result in results:
+        network = (result.get("timing") or {}).get("network")
+        if not network:
+            continue
+        flows += 1
+        requests += network.get("requests", 0)
+        total_bytes += network.get("bytes", 0)
+        for bucket, count in network.get("by_status", {}).items():
+            by_status[bucket] += count
+        if network.get("errors"):
+            flows_with_errors.append(result.get("name"))
+        slowest.extend(dict(entry, flow=result.get("name")) for entry in network.get("slowest", []))
+    if not flows:
+        return None
+    slowest.sort(key=lambda entry: entry.get("duration_ms") or 0, reverse=True)
+    return {
+        "flows": flows,
+        "requests": requests,
+        "bytes": total_bytes,
+        "by_status": dict(sorted(by_status.items())),
+        "flows_with_errors": flows_with_errors,
+        "slowest": slowest[:10],
+    }
+
+
+def _summarize_profiles(goto_ms: Dict[str, List[float]], goto_bytes: Dict[str, List[float]]) -> Dict[str, Any]:
+    # 同一批页面分别用 full 和其他配置运行时，saved_vs_full 给出 p50 上节省的时间和字节数
+    summary: Dict[str, Any] = {}
+    for profile in sorted(goto_ms):
+        summary[profile] = {"duration_ms": distribution(goto_ms[profile]), "page_bytes": distribution(goto_bytes[profile])}
+    full = summary.get("full")
+    for profile, entry in summary.items():
+        if full is None or profile == "full":
+            continue
+        entry["saved_vs_full"] = {
+            metric: _round(full[metric]["p50"] - entry[metric]["p50"])
+            if full[metric]["p50"] is not None and entry[metric]["p50"] is not None else None
+            for metric in ("duration_ms", "page_bytes")
+        }
+    return summary
+
+
+class JsonlResultSink:
+    """线程安全的 JSONL 结果输出，每写一行立即 flush"""
+
+    def __init__(self, path: str, include_steps: bool = False, append: bool = False):
+        """初始化结果输出
+
+        Args:
+            path: JSONL 文件路径
+            include_steps: 是否为每个步骤单独输出一行
+            append: 追加到已有文件而不是覆盖
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.include_steps = include_steps
+        self._file = open(path, "a" if append else "w", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def write_step(self, index: int, flow_name: str, step: Dict[str, Any]) -> None:
+        if self.include_steps:
+            self.write({"type": "step", "index": index, "flow": flow_name, **step})
+
+    def write_flow(self, index: int, result: Dict[str, Any]) -> None:
+        self.write({"type": "flow", "index": index, **result})
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def __enter__(self) -> "JsonlResultSink":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def read_jsonl_results(path: str) -> List[Dict[str, Any]]:
+    """从 JSONL 结果文件读取 flow 结果，按 suite 顺序返回
+
+    进程被杀死时最后一行可能不完整，该行会被忽略。同一 index 出现多次时保留最后一次。
+    """
+    by_index: Dict[int, Dict[str, Any]] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("type") != "flow":
+                continue
+            record.pop("type")
+            by_index[int(record.pop("index"))] = record
+    return [by_index[index] for index in sorted(by_index)]
+
+
+def flow_fingerprint(flow: Dict[str, Any]) -> str:
+    """flow 定义的哈希，定义变化后旧的检查点记录自动失效"""
+    canonical = json.dumps(flow, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+class SuiteCheckpoint:
+    """记录每个 flow 结果的检查点文件（JSONL），用于中断后续跑"""
+
+    def __init__(self, path: str, resume: bool = False):
+        """初始化检查点
+
+        Args:
+            path: 检查点文件路径
+            resume: 为 True 时读取已有记录并在其后追加，否则清空重新记录
+        """
+        self.path = path
+        self._passed: Dict[tuple, Dict[str, Any]] = {}
+        if resume and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        key = (record["name"], record["hash"])
+                        result = record["result"]
+                    except (ValueError, KeyError, TypeError):
+                        continue
+                    # 同一 flow 以最后一次记录为准
+                    if result.get("exit_code") == 0:
+                        self._passed[key] = result
+                    else:
+                        self._passed.pop(key, None)
+        self._sink = JsonlResultSink(path, append=resume)
+
+    def passed(self, name: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """返回上次运行中已通过的结果，没有则返回 None"""
+        return self._passed.get((name, fingerprint))
+
+    def record(self, name: str, fingerprint: str, result: Dict[str, Any]) -> None:
+        self._sink.write({"name": name, "hash": fingerprint, "result": result})
+
+    def close(self) -> None:
+        self._sink.close()
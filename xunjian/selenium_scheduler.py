@@ -0,0 +1,207 @@
+"""
+巡检调度（守护进程模式）
+suite 只加载、编译一次，每个 flow 按自己的 interval/cron 周期反复运行，
+浏览器驱动池和 OCR 引擎在多次运行之间保持常驻，全局并发由 worker 数量限制。
+
+flow 调度配置:
+    "interval": 300            每 300 秒运行一次
+    "cron": "*/5 8-20 * * 1-5"  标准 5 字段 cron 表达式（分 时 日 月 周）
+未配置的 flow 使用 suite 级 "interval"/"cron"，再退回命令行 --interval。
+
+本模块只负责调度；加载 suite、运行 flow 由 selenium_flow_suite.run_daemon 传入。
+"""
+
+import heapq
+import signal
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
+
+
+# 周字段允许 0-7，其中 0 和 7 都表示周日
+_CRON_RANGES: Tuple[Tuple[int, int], ...] = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+
+def _parse_cron_field(field: str, low: int, high: int) -> Set[int]:
+    values: Set[int] = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+            if step <= 0:
+                raise ValueError(f"Invalid cron step: {step_text}")
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start_text, end_text = part.split("-", 1)
+            start, end = int(start_text), int(end_text)
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+        if start < low or end > high or start > end:
+            raise ValueError(f"Cron value out of range {low}-{high}: {part}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    """5 字段 cron 表达式（分 时 日 月 周，周日为 0 或 7）
+
+    Raises:
+        ValueError: 表达式格式错误，或在五年内不会触发（如 "0 0 31 2 *"）
+    """
+
+    def __init__(self, expression: str):
+        if not isinstance(expression, str) or len(expression.split()) != 5:
+            raise ValueError(f"Cron expression must have 5 fields: {expression!r}")
+        fields = expression.split()
+        self.expression = expression
+        try:
+            self.minutes, self.hours, self.days, self.months, weekdays = (
+                _parse_cron_field(f, low, high) for f, (low, high) in zip(fields, _CRON_RANGES)
+            )
+        except ValueError as err:
+            raise ValueError(f"Invalid cron expression {expression!r}: {err}") from None
+        self.weekdays = {day % 7 for day in weekdays}
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+        self.next_after(datetime.now())
+
+    def _day_matches(self, moment: datetime) -> bool:
+        weekday = (moment.weekday() + 1) % 7
+        if self._any_day or self._any_weekday:
+            return moment.day in self.days and weekday in self.weekdays
+        # 日和周都有限制时满足任意一个即可（与 cron 一致）
+        return moment.day in self.days or weekday in self.weekdays
+
+    def next_after(self, moment: datetime) -> datetime:
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 5)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                year, month = (candidate.year + 1, 1) if candidate.month == 12 else (candidate.year, candidate.month + 1)
+                candidate = candidate.replace(year=year, month=month, day=1, hour=0, minute=0)
+                continue
+            if not self._day_matches(candidate):
+                candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            if candidate.hour not in self.hours:
+                candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+                continue
+            if candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+                continue
+            return candidate
+        raise ValueError(f"Cron expression never fires: {self.expression!r}")
+
+
+class IntervalSchedule:
+    """固定间隔（秒）"""
+
+    def __init__(self, seconds: float):
+        if seconds <= 0:
+            raise ValueError(f"Interval must be positive: {seconds}")
+        self.seconds = float(seconds)
+
+    def next_after(self, moment: datetime) -> datetime:
+        return moment + timedelta(seconds=self.seconds)
+
+
+Schedule = Union[CronSchedule, IntervalSchedule]
+
+
+def _flow_schedule(flow: Dict[str, Any], suite: Dict[str, Any], default_interval: float) -> Schedule:
+    for source in (flow, suite):
+        if source.get("cron"):
+            return CronSchedule(source["cron"])
+        if source.get("interval"):
+            try:
+                seconds = float(source["interval"])
+            except (TypeError, ValueError):
+                raise ValueError(f"Interval must be a number of seconds: {source['interval']!r}") from None
+            return IntervalSchedule(seconds)
+    return IntervalSchedule(default_interval)
+
+
+def build_schedules(flows: List[Dict[str, Any]], suite: Dict[str, Any], default_interval: float) -> List[Schedule]:
+    """为每个 flow 解析调度配置，在启动前一次报告全部问题
+
+    Raises:
+        ValueError: 任意 flow（或 suite 级）的 cron/interval 无效
+    """
+    schedules: List[Schedule] = []
+    problems: List[str] = []
+    for number, flow in enumerate(flows, 1):
+        try:
+            schedules.append(_flow_schedule(flow, suite, default_interval))
+        except ValueError as err:
+            problems.append(f"flow '{flow.get('name') or f'flow_{number}'}': {err}")
+    if problems:
+        raise ValueError("Invalid schedule:\n" + "\n".join(problems))
+    return schedules
+
+
+def run_scheduler(
+    schedules: List[Schedule],
+    run: Callable[[int], Dict[str, Any]],
+    names: List[str],
+    workers: int = 1,
+    stop: Optional[threading.Event] = None,
+) -> None:
+    """按各 flow 的调度周期持续运行，直到收到 SIGINT/SIGTERM 或 stop 被设置
+
+    Args:
+        schedules: 每个 flow 的调度，由 build_schedules 生成
+        run: 运行第 index 个 flow 并返回结果（含 name、status）
+        names: 每个 flow 的名称，用于日志
+        workers: 同时运行的 flow 数量上限
+    """
+    stop = stop or threading.Event()
+
+    if threading.current_thread() is threading.main_thread():
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: stop.set())
+
+    now = datetime.now()
+    queue: List[Tuple[datetime, int]] = []
+    for index, schedule in enumerate(schedules):
+        # interval 类 flow 启动时立即运行一次
+        first = now if isinstance(schedule, IntervalSchedule) else schedule.next_after(now)
+        heapq.heappush(queue, (first, index))
+
+    running: Set[int] = set()
+    lock = threading.Lock()
+
+    def task(index: int) -> None:
+        try:
+            result = run(index)
+            print(f"[{datetime.now().isoformat(timespec='seconds')}] {result['name']}: {result['status']}")
+        except Exception as err:
+            print(f"Scheduled flow '{names[index]}' crashed: {err}", file=sys.stderr)
+        finally:
+            with lock:
+                running.discard(index)
+
+    print(f"Scheduler started with {len(schedules)} flows, {workers} workers")
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="patrol") as executor:
+        while not stop.is_set() and queue:
+            due, index = queue[0]
+            delay = (due - datetime.now()).total_seconds()
+            if delay > 0:
+                stop.wait(min(delay, 1.0))
+                continue
+            heapq.heappop(queue)
+            with lock:
+                overlapping = index in running
+                if not overlapping:
+                    running.add(index)
+            if overlapping:
+                # 上一次运行尚未结束，跳过本轮，避免同一 flow 堆积
+                print(f"Skipping '{names[index]}': previous run still in progress")
+            else:
+                executor.submit(task, index)
+            heapq.heappush(queue, (schedules[index].next_after(max(due, datetime.now())), index))
+        print("Scheduler stopping, waiting for running flows...")
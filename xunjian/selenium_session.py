@@ -0,0 +1,274 @@
+"""
+登录会话缓存
+flow 用 login_begin / login_end 包住登录步骤，登录成功后保存 cookies 和 localStorage，
+之后 origin 和凭据变量都相同的 flow 直接恢复会话并跳过整个登录块。
+
+缓存键为 (origin, 凭据变量取值) 的哈希，缓存文件中不保存明文凭据；
+条目超过 TTL 或恢复后的有效性检查失败时作废，回退为真正执行登录步骤。
+
+set_cookies 通过 CDP Network.setCookies 一次注入全部 cookies，不要求浏览器已经位于
+cookie 所属的域名，并报告被拒绝的 cookie 及原因。
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from selenium.common.exceptions import WebDriverException
+
+
+_READ_LOCAL_STORAGE_SCRIPT = """
+var items = {};
+try {
+    for (var i = 0; i < window.localStorage.length; i++) {
+        var key = window.localStorage.key(i);
+        items[key] = window.localStorage.getItem(key);
+    }
+} catch (e) {}
+return items;
+"""
+
+_WRITE_LOCAL_STORAGE_SCRIPT = """
+var items = arguments[0];
+for (var key in items) {
+    if (Object.prototype.hasOwnProperty.call(items, key)) window.localStorage.setItem(key, items[key]);
+}
+"""
+
+
+_SAME_SITE = {"strict": "Strict", "lax": "Lax", "none": "None"}
+
+
+class CookieRestoreResult(NamedTuple):
+    restored: int
+    rejected: List[Tuple[str, str]]  # (cookie 名称, 原因)
+
+
+def _cdp_cookie(cookie: Dict[str, Any], url: Optional[str] = None) -> Dict[str, Any]:
+    """把 get_cookies() 格式的 cookie 转换为 CDP CookieParam，字段无效时抛出 ValueError"""
+    if not cookie.get("name"):
+        raise ValueError("missing name")
+    if cookie.get("value") is None:
+        raise ValueError("missing value")
+    param: Dict[str, Any] = {"name": str(cookie["name"]), "value": str(cookie["value"]), "path": cookie.get("path") or "/"}
+    if cookie.get("domain"):
+        param["domain"] = cookie["domain"]
+    elif url:
+        param["url"] = url
+    else:
+        raise ValueError("missing domain (pass a url for host-only cookies)")
+    for field in ("secure", "httpOnly"):
+        if field in cookie:
+            param[field] = bool(cookie[field])
+    # get_cookies() 使用 expiry，CDP 导出的 cookie 使用 expires（-1 表示会话 cookie）
+    expires = cookie.get("expiry", cookie.get("expires"))
+    if expires is not None and float(expires) >= 0:
+        param["expires"] = float(expires)
+    if cookie.get("sameSite"):
+        same_site = _SAME_SITE.get(str(cookie["sameSite"]).lower())
+        if same_site is None:
+            raise ValueError(f"invalid sameSite {cookie['sameSite']!r}")
+        if same_site == "None" and not param.get("secure"):
+            raise ValueError("sameSite=None requires secure")
+        param["sameSite"] = same_site
+    return param
+
+
+def set_cookies(driver, cookies: Sequence[Dict[str, Any]], url: Optional[str] = None) -> CookieRestoreResult:
+    """一次性注入一组 cookies
+
+    Chrome 下使用 CDP Network.setCookies，一次往返完成且可以在第一次导航之前调用；
+    整批调用失败时逐个调用 Network.setCookie 找出被拒绝的 cookie。
+    不支持 CDP 的驱动回退为逐个 add_cookie（要求浏览器已位于 cookie 所属域名）。
+
+    Args:
+        driver: WebDriver实例
+        cookies: get_cookies() 格式的 cookie 列表
+        url: 没有 domain 的 cookie 所属的 URL
+
+    Returns:
+        CookieRestoreResult: 成功注入的数量以及被拒绝的 (名称, 原因) 列表
+    """
+    rejected: List[Tuple[str, str]] = []
+    if not hasattr(driver, "execute_cdp_cmd"):
+        restored = 0
+        for cookie in cookies:
+            cookie = dict(cookie)
+            cookie.pop("sameSite", None)  # 某些驱动对大小写敏感
+            try:
+                driver.add_cookie(cookie)
+                restored += 1
+            except WebDriverException as e:
+                rejected.append((str(cookie.get("name", "?")), e.msg or str(e)))
+        return CookieRestoreResult(restored, rejected)
+
+    now = time.time()
+    params: List[Dict[str, Any]] = []
+    for cookie in cookies:
+        try:
+            param = _cdp_cookie(cookie, url)
+        except (TypeError, ValueError) as e:
+            rejected.append((str(cookie.get("name", "?")), str(e)))
+            continue
+        if param.get("expires", now + 1) <= now:
+            rejected.append((param["name"], "expired"))
+            continue
+        params.append(param)
+    if not params:
+        return CookieRestoreResult(0, rejected)
+
+    try:
+        driver.execute_cdp_cmd("Network.setCookies", {"cookies": params})
+        return CookieRestoreResult(len(params), rejected)
+    except WebDriverException:
+        pass
+
+    # 任意一个 cookie 无效都会导致整批失败，逐个注入以定位被拒绝的 cookie
+    restored = 0
+    for param in params:
+        try:
+            success = (driver.execute_cdp_cmd("Network.setCookie", param) or {}).get("success", True)
+            reason = "rejected by browser"
+        except WebDriverException as e:
+            success, reason = False, e.msg or str(e)
+        if success:
+            restored += 1
+        else:
+            rejected.append((param["name"], reason))
+    return CookieRestoreResult(restored, rejected)
+
+
+def report_cookie_restore(result: CookieRestoreResult) -> None:
+    message = f"已恢复 {result.restored} 个 cookie"
+    if result.rejected:
+        message += f"，拒绝 {len(result.rejected)} 个: " + "; ".join(f"{name} ({reason})" for name, reason in result.rejected)
+    print(message)
+
+
+def url_origin(url: str) -> str:
+    """返回 URL 的 origin（scheme://host[:port]）"""
+    parts = urlsplit(url)
+    if not parts.scheme or not parts.netloc:
+        raise ValueError(f"Cannot determine origin of URL: {url!r}")
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def session_key(origin: str, credentials: Dict[str, Any]) -> str:
+    """由 origin 和凭据变量计算缓存键"""
+    canonical = json.dumps([origin, sorted((k, str(v)) for k, v in credentials.items())], ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class SessionCache:
+    """线程安全的登录会话缓存，可选持久化到 JSON 文件"""
+
+    def __init__(self, path: Optional[str] = None):
+        """初始化会话缓存
+
+        Args:
+            path: 持久化文件路径，为 None 时只保存在内存中
+        """
+        self.path = path
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    self._entries = data
+            except (OSError, ValueError):
+                # 损坏的缓存文件等同于空缓存
+                self._entries = {}
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """返回未过期的会话条目，没有则返回 None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.get("expires_at", 0) <= time.time():
+                del self._entries[key]
+                self._save()
+                return None
+            return entry
+
+    def put(self, key: str, origin: str, cookies: List[Dict[str, Any]],
+            local_storage: Dict[str, str], ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = {
+                "origin": origin,
+                "expires_at": time.time() + ttl,
+                "cookies": cookies,
+                "local_storage": local_storage,
+            }
+            self._save()
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._save()
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        # 会话 cookie 等同于登录凭据，只允许当前用户读写
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+_cache = SessionCache()
+_cache_lock = threading.Lock()
+
+
+def configure_session_cache(path: Optional[str] = None) -> SessionCache:
+    """替换进程内共享的会话缓存
+
+    Args:
+        path: 持久化文件路径，为 None 时只在内存中缓存（进程退出即失效）
+    """
+    global _cache
+    with _cache_lock:
+        if path != _cache.path:
+            _cache = SessionCache(path)
+        return _cache
+
+
+def get_session_cache() -> SessionCache:
+    """返回进程内共享的会话缓存"""
+    return _cache
+
+
+def capture_session(driver) -> Dict[str, Any]:
+    """读取当前页面的 cookies 和 localStorage"""
+    return {
+        "cookies": driver.get_cookies(),
+        "local_storage": driver.execute_script(_READ_LOCAL_STORAGE_SCRIPT) or {},
+    }
+
+
+def restore_session(driver, entry: Dict[str, Any]) -> None:
+    """恢复会话的 cookies 和 localStorage
+
+    cookies 在导航之前一次注入；localStorage 要求浏览器已经位于会话所属 origin。
+    """
+    result = set_cookies(driver, entry.get("cookies", []), entry["origin"])
+    if result.rejected:
+        report_cookie_restore(result)
+    if not entry.get("local_storage"):
+        return
+    driver.get(entry["origin"])
+    driver.execute_script(_WRITE_LOCAL_STORAGE_SCRIPT, entry["local_storage"])
+
+
+def credential_values(variables: Dict[str, Any], names: Sequence[str]) -> Dict[str, Any]:
+    """取出组成缓存键的凭据变量"""
+    return {name: variables.get(name, "") for name in names}
@@ -0,0 +1,370 @@
+"""
+suite 文件加载与编译缓存
+read_suite 以流式方式读取 suite 文件，逐个 flow、逐个步骤解析，不需要先把整个文件读入内存，
+并记录每个 flow 和每个步骤所在的行号，编译错误可以直接定位到文件位置。
+
+支持两种格式:
+    .json   flow 数组，或包含 "flows" 数组和 suite 级配置的对象
+    .jsonl  每行一个 flow；含 "suite" 字段的行为 suite 级配置，如 {"suite": {"timeout": 30}}
+
+编译缓存保存解析和编译后的结果（pickle）。suite 文件的 mtime/大小未变时直接使用；
+mtime 变化但内容哈希相同（如只是 touch）时同样命中。引用的数据集、插件列表
+或动作模块变化时缓存失效。
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import re
+import sys
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from selenium_actions import ACTIONS, load_plugins
+
+
+_CACHE_VERSION = 1
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# 能确认前一个值已经结束的字符：数字或字面量后面若是其他字符（如块边界处的 "123." 或 "1e"），
+# 说明值可能被截断，需要读入更多数据后重新解析
+_VALUE_TERMINATORS = frozenset(" \t\n\r,:]}")
+
+
+class SuiteError(ValueError):
+    """suite 文件无法使用；problems 为带文件位置的问题列表"""
+
+    def __init__(self, problems: List[str]):
+        super().__init__("\n".join(problems))
+        self.problems = problems
+
+    def __reduce__(self):
+        return type(self), (self.problems,)
+
+
+class FlowPosition(NamedTuple):
+    line: int  # flow 开始的行号
+    step_lines: List[int]  # 每个步骤开始的行号
+
+
+class _JsonStream:
+    """按块读取的 JSON 词法流，跟踪当前位置的行号"""
+
+    def __init__(self, f, path: str, chunk_size: int = 1 << 16):
+        self._f = f
+        self.path = path
+        self._chunk_size = chunk_size
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self.line = 1  # self._pos 处的行号
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        """读入更多数据，没有数据时返回 False"""
+        if self._eof:
+            return False
+        # 每次至少读入与未消费部分等长的数据，解析大的值时总开销保持线性
+        chunk = self._f.read(max(self._chunk_size, len(self._buf) - self._pos))
+        if not chunk:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _advance(self, end: int) -> None:
+        self.line += self._buf.count("\n", self._pos, end)
+        self._pos = end
+
+    def error(self, message: str, line: Optional[int] = None) -> SuiteError:
+        return SuiteError([f"{self.path}:{line or self.line}: {message}"])
+
+    def peek(self) -> str:
+        """跳过空白并返回下一个字符，文件结束时返回空字符串"""
+        while True:
+            self._advance(_WHITESPACE.match(self._buf, self._pos).end())
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise self.error(f"expected '{char}', found {found!r}" if found else f"expected '{char}', found end of file")
+        self._advance(self._pos + 1)
+
+    def value(self) -> Any:
+        """解析下一个完整的 JSON 值"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError as e:
+                # 可能只是值被块边界截断
+                if self._fill():
+                    continue
+                line = self.line + self._buf.count("\n", self._pos, e.pos)
+                raise self.error(f"invalid JSON: {e.msg}", line) from None
+            # 数字/字面量可能在块边界处被截断：raw_decode 会接受较短的前缀（"123." 解析为 123），
+            # 值后面不是空白或结构字符时读入更多数据后重新解析
+            if (end == len(self._buf) or self._buf[end] not in _VALUE_TERMINATORS) and self._fill():
+                continue
+            self._advance(end)
+            return value
+
+    def iter_array(self) -> Iterator[int]:
+        """逐个产出数组元素开始的行号，调用方在每次产出后消费该元素"""
+        self.expect("[")
+        if self.peek() == "]":
+            self._advance(self._pos + 1)
+            return
+        while True:
+            self.peek()
+            yield self.line
+            separator = self.peek()
+            if separator == "]":
+                self._advance(self._pos + 1)
+                return
+            if separator != ",":
+                raise self.error(f"expected ',' or ']' in array, found {separator!r}" if separator else "unterminated array")
+            self._advance(self._pos + 1)
+
+    def iter_object(self) -> Iterator[Tuple[str, int]]:
+        """逐个产出 (键, 行号)，调用方在每次产出后消费该键的值"""
+        self.expect("{")
+        if self.peek() == "}":
+            self._advance(self._pos + 1)
+            return
+        while True:
+            self.peek()
+            line = self.line
+            key = self.value()
+            if not isinstance(key, str):
+                raise self.error("object keys must be strings", line)
+            self.expect(":")
+            yield key, line
+            separator = self.peek()
+            if separator == "}":
+                self._advance(self._pos + 1)
+                return
+            if separator != ",":
+                raise self.error(f"expected ',' or '}}' in object, found {separator!r}" if separator else "unterminated object")
+            self._advance(self._pos + 1)
+
+    def at_end(self) -> bool:
+        return self.peek() == ""
+
+
+def _read_flow(stream: _JsonStream) -> Tuple[Any, FlowPosition]:
+    """读取一个 flow；steps 数组逐个步骤解析以记录行号"""
+    line = stream.line
+    if stream.peek() != "{":
+        return stream.value(), FlowPosition(line, [])
+    flow: Dict[str, Any] = {}
+    step_lines: List[int] = []
+    for key, _ in stream.iter_object():
+        if key == "steps" and stream.peek() == "[":
+            steps: List[Any] = []
+            for step_line in stream.iter_array():
+                step_lines.append(step_line)
+                steps.append(stream.value())
+            flow[key] = steps
+        else:
+            flow[key] = stream.value()
+    return flow, FlowPosition(line, step_lines)
+
+
+def _read_json_suite(f, path: str, chunk_size: int = 1 << 16) -> Tuple[Dict[str, Any], List[FlowPosition]]:
+    stream = _JsonStream(f, path, chunk_size)
+    suite: Dict[str, Any] = {}
+    flows: List[Any] = []
+    positions: List[FlowPosition] = []
+
+    def read_flows() -> None:
+        for _ in stream.iter_array():
+            flow, position = _read_flow(stream)
+            flows.append(flow)
+            positions.append(position)
+
+    first = stream.peek()
+    if first == "[":
+        read_flows()
+    elif first == "{":
+        has_flows = False
+        for key, line in stream.iter_object():
+            if key != "flows":
+                suite[key] = stream.value()
+            elif stream.peek() == "[":
+                has_flows = True
+                read_flows()
+            else:
+                stream.value()
+                raise stream.error("'flows' must be an array", line)
+        if not has_flows:
+            raise stream.error("Suite JSON object must contain a 'flows' array", 1)
+    else:
+        raise stream.error("Suite JSON must be an array of flows or an object with a 'flows' array")
+    if not stream.at_end():
+        raise stream.error("unexpected data after the suite")
+    suite["flows"] = flows
+    return suite, positions
+
+
+def _read_jsonl_suite(f, path: str) -> Tuple[Dict[str, Any], List[FlowPosition]]:
+    suite: Dict[str, Any] = {}
+    flows: List[Any] = []
+    positions: List[FlowPosition] = []
+    for line_no, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise SuiteError([f"{path}:{line_no}: invalid JSON: {e.msg}"]) from None
+        if isinstance(record, dict) and "suite" in record:
+            if not isinstance(record["suite"], dict):
+                raise SuiteError([f"{path}:{line_no}: 'suite' must be an object"])
+            suite.update(record["suite"])
+            continue
+        flows.append(record)
+        steps = record.get("steps") if isinstance(record, dict) else None
+        positions.append(FlowPosition(line_no, [line_no] * len(steps) if isinstance(steps, list) else []))
+    suite["flows"] = flows
+    return suite, positions
+
+
+def read_suite(path: str) -> Tuple[Dict[str, Any], List[FlowPosition]]:
+    """流式读取 suite 文件，返回 (suite, 每个 flow 的位置)
+
+    Raises:
+        FileNotFoundError: 文件不存在
+        SuiteError: JSON 语法错误、结构错误或不是对象的 flow（一次报告全部 flow 问题）
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Suite file not found: {path}")
+    reader = _read_jsonl_suite if os.path.splitext(path)[1].lower() in (".jsonl", ".ndjson") else _read_json_suite
+    with open(path, "r", encoding="utf-8") as f:
+        suite, positions = reader(f, path)
+    problems = [
+        f"{path}:{position.line}: flow {number} must be an object"
+        for number, (flow, position) in enumerate(zip(suite["flows"], positions), 1)
+        if not isinstance(flow, dict)
+    ]
+    if problems:
+        raise SuiteError(problems)
+    return suite, positions
+
+
+def problem_location(path: str, position: Optional[FlowPosition], step_index: Optional[int]) -> str:
+    """返回 "文件:行号" 形式的位置，步骤序号未知时使用 flow 的行号"""
+    if position is None:
+        return path
+    if step_index is not None and step_index < len(position.step_lines):
+        return f"{path}:{position.step_lines[step_index]}"
+    return f"{path}:{position.line}"
+
+
+# ---------------------------------------------------------------------------
+# 编译缓存
+# ---------------------------------------------------------------------------
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _stat(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _dataset_stats(suite: Dict[str, Any]) -> Dict[str, Optional[Tuple[int, int]]]:
+    return {
+        flow["dataset"]: _stat(flow["dataset"])
+        for flow in suite.get("flows", [])
+        if isinstance(flow, dict) and isinstance(flow.get("dataset"), str)
+    }
+
+
+def _action_module_stats() -> Dict[str, Optional[Tuple[int, int]]]:
+    """注册动作的模块文件状态；动作定义变化后旧的编译结果不再可用"""
+    stats: Dict[str, Optional[Tuple[int, int]]] = {}
+    for spec in ACTIONS.values():
+        module = sys.modules.get(spec.handler.__module__)
+        path = getattr(module, "__file__", None)
+        if path and path not in stats:
+            stats[path] = _stat(path)
+    return stats
+
+
+def load_compile_cache(
+    cache_path: str, suite_path: str, plugins: Sequence[str]
+) -> Optional[Tuple[Dict[str, Any], List[FlowPosition], list]]:
+    """读取编译缓存，返回 (suite, flow 位置, 编译结果)；缓存不存在或已失效时返回 None
+
+    命中前会先加载缓存中记录的 suite 插件，以便恢复插件动作。
+    """
+    current = _stat(suite_path)
+    if current is None or not os.path.exists(cache_path):
+        return None
+    try:
+        with open(cache_path, "rb") as f:
+            header = pickle.load(f)
+            if header.get("version") != _CACHE_VERSION or header.get("plugins") != list(plugins):
+                return None
+            if header.get("size") != current[1]:
+                return None
+            if header.get("mtime_ns") != current[0] and header.get("sha256") != _file_digest(suite_path):
+                return None
+            if any(_stat(path) != stat for path, stat in header.get("datasets", {}).items()):
+                return None
+            load_plugins(list(plugins) + list(header.get("suite_plugins", [])))
+            if header.get("modules") != _action_module_stats():
+                return None
+            suite, positions, compiled = pickle.load(f)
+    except Exception:
+        # 损坏或与当前代码不兼容的缓存等同于没有缓存
+        return None
+    return suite, positions, compiled
+
+
+def save_compile_cache(
+    cache_path: str,
+    suite_path: str,
+    plugins: Sequence[str],
+    suite: Dict[str, Any],
+    positions: List[FlowPosition],
+    compiled: list,
+) -> None:
+    """保存编译结果，写入失败只打印警告"""
+    current = _stat(suite_path)
+    if current is None:
+        return
+    header = {
+        "version": _CACHE_VERSION,
+        "mtime_ns": current[0],
+        "size": current[1],
+        "sha256": _file_digest(suite_path),
+        "plugins": list(plugins),
+        "suite_plugins": list(suite.get("plugins", [])),
+        "datasets": _dataset_stats(suite),
+        "modules": _action_module_stats(),
+    }
+    tmp_path = f"{cache_path}.tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+        # 缓存可能包含 flow 变量中的凭据，只允许当前用户读写
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump((suite, positions, compiled), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except (OSError, pickle.PicklingError, AttributeError, TypeError) as e:
+        print(f"Warning: could not write compile cache {cache_path}: {e}", file=sys.stderr)
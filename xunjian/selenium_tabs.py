@@ -0,0 +1,70 @@
+"""
+隔离标签页
+多标签页模式下，多个 flow 共用一个 Chrome 进程：每个 flow 在通过 CDP
+Target.createBrowserContext 创建的独立浏览器上下文中打开一个标签页，
+cookies、localStorage 和缓存互不可见，相当于各自一个无痕窗口。
+"""
+
+from typing import NamedTuple, Sequence
+
+from selenium.common.exceptions import WebDriverException
+
+from selenium_check import _apply_blocked_urls
+
+
+class IsolatedTab(NamedTuple):
+    context_id: str
+    target_id: str
+    handle: str
+
+
+def _window_handle(driver, target_id: str) -> str:
+    for handle in driver.window_handles:
+        # 旧版 chromedriver 的窗口句柄带有 "CDwindow-" 前缀
+        if handle == target_id or handle.endswith(target_id):
+            return handle
+    raise WebDriverException(f"Tab {target_id} is not visible to chromedriver")
+
+
+def open_isolated_tab(driver, blocked_urls: Sequence[str] = ()) -> IsolatedTab:
+    """在新的浏览器上下文中打开一个空白标签页并切换过去
+
+    Args:
+        driver: WebDriver实例
+        blocked_urls: 需要在新标签页上启用的 URL 屏蔽规则（见 BrowserProfile）
+
+    Raises:
+        WebDriverException: 浏览器不支持创建上下文或新标签页不可用时
+    """
+    context_id = driver.execute_cdp_cmd("Target.createBrowserContext", {})["browserContextId"]
+    try:
+        target_id = driver.execute_cdp_cmd(
+            "Target.createTarget", {"url": "about:blank", "browserContextId": context_id}
+        )["targetId"]
+        handle = _window_handle(driver, target_id)
+        driver.switch_to.window(handle)
+        _apply_blocked_urls(driver, blocked_urls)
+    except Exception:
+        _dispose_context(driver, context_id)
+        raise
+    return IsolatedTab(context_id, target_id, handle)
+
+
+def close_isolated_tab(driver, tab: IsolatedTab, home_handle: str) -> None:
+    """关闭标签页并销毁其浏览器上下文
+
+    CDP 命令发往当前标签页，因此先切换到 home_handle（浏览器启动时的标签页）再销毁。
+    """
+    try:
+        driver.switch_to.window(home_handle)
+    except WebDriverException:
+        pass
+    _dispose_context(driver, tab.context_id)
+
+
+def _dispose_context(driver, context_id: str) -> None:
+    # 销毁上下文会同时关闭其中的全部标签页
+    try:
+        driver.execute_cdp_cmd("Target.disposeBrowserContext", {"browserContextId": context_id})
+    except WebDriverException:
+        pass
@@ -0,0 +1,100 @@
+"""
+selenium_suite 流式解析测试：在所有块大小下重新解析同一个 suite，结果必须与 json.loads 一致
+"""
+
+import io
+import json
+import os
+import sys
+
+import pytest
+
+# 添加上级目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from selenium_suite import SuiteError, _read_json_suite, read_suite
+
+
+SUITE = """{
+  "timeout": 12.5,
+  "retries": -3,
+  "ratio": 1e-2,
+  "scale": 6.02E+23,
+  "flows": [
+    {
+      "name": "数字与字面量",
+      "weight": 123.456,
+      "enabled": true,
+      "skip": false,
+      "owner": null,
+      "steps": [
+        {"action": "goto", "url": "https://example.com/?q=\\"a\\"\\u00e9"},
+        {"action": "wait", "seconds": 0.25},
+        {"action": "type", "selector": "#n", "text": "1e5", "delay": 10E2}
+      ]
+    },
+    {"name": "empty", "steps": []},
+    {"name": "nested", "variables": {"a": [1, 2.5, [true, null]], "b": {}}, "steps": [{"action": "goto", "url": "x"}]}
+  ]
+}
+"""
+
+
+def _parse(text, chunk_size):
+    return _read_json_suite(io.StringIO(text), "suite.json", chunk_size)
+
+
+def test_every_chunk_size_matches_json_loads():
+    expected = json.loads(SUITE)
+    reference, reference_positions = _parse(SUITE, 1 << 16)
+    assert reference == expected
+    assert [p.line for p in reference_positions] == [7, 19, 20]
+    assert reference_positions[0].step_lines == [14, 15, 16]
+    for chunk_size in range(1, len(SUITE) + 2):
+        suite, positions = _parse(SUITE, chunk_size)
+        assert suite == expected, chunk_size
+        assert positions == reference_positions, chunk_size
+
+
+@pytest.mark.parametrize("number", ["123.456", "-0.5", "1e10", "1.5E-3", "42"])
+def test_number_split_at_chunk_boundary(number):
+    for split in range(1, len(number)):
+        text = '[{"n": ' + number + ', "steps": []}]'
+        chunk_size = text.index(number) + split
+        suite, _ = _parse(text, chunk_size)
+        assert suite["flows"][0]["n"] == json.loads(number)
+
+
+def test_float_on_default_chunk_boundary(tmp_path):
+    head, tail = '[{"name": "', '", "n": 123'
+    prefix = head + "x" * ((1 << 16) - len(head) - len(tail)) + tail
+    assert len(prefix) == 1 << 16
+    path = tmp_path / "suite.json"
+    path.write_text(prefix + '.456, "steps": []}]', encoding="utf-8")
+    suite, _ = read_suite(str(path))
+    assert suite["flows"][0]["n"] == 123.456
+
+
+@pytest.mark.parametrize(
+    "text, message",
+    [
+        ('[{"name": "a",\n "steps": [1,, 2]}]', "suite.json:2: invalid JSON"),
+        ('[{"name": "a"}\n {"name": "b"}]', "suite.json:2: expected ',' or ']'"),
+        ('{"timeout": 1}', "must contain a 'flows' array"),
+        ('[{"name": "a"}] []', "unexpected data after the suite"),
+        ('[{"n": 1.}]', "suite.json:1:"),
+    ],
+)
+def test_errors_report_location(text, message):
+    for chunk_size in (1, 3, 1 << 16):
+        with pytest.raises(SuiteError) as info:
+            _parse(text, chunk_size)
+        assert message in str(info.value), chunk_size
+
+
+def test_flows_must_be_objects(tmp_path):
+    path = tmp_path / "suite.json"
+    path.write_text('[\n{"name": "a"},\n 3\n]', encoding="utf-8")
+    with pytest.raises(SuiteError) as info:
+        read_suite(str(path))
+    assert info.value.problems == [f"{path}:3: flow 2 must be an object"]